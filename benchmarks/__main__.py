@@ -0,0 +1,92 @@
+# encoding:utf-8
+"""
+Run the benchmark suite and write the results to a JSON file, optionally
+comparing them with a previous run.
+
+    python -m benchmarks -o results.json
+    python -m benchmarks -o new.json --compare old.json
+    python -m benchmarks --quick dispatch event_heap
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from importlib import import_module
+
+SUITE = ["dispatch", "event_heap", "backtest_engine", "engine_wait", "codec", "mongo_decode"]
+
+
+def revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"]).decode().strip()
+    except Exception:
+        return None
+
+
+def flatten(result, prefix=""):
+    """
+    Flatten nested results into {"module.name.metric": value}.
+    """
+    flat = {}
+    for key, value in result.items():
+        name = prefix + str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif value is not None:
+            flat[name] = float(value)
+    return flat
+
+
+def compare(old, new):
+    """
+    Print metrics present in both runs with the ratio new / old.
+    """
+    old, new = flatten(old["results"]), flatten(new["results"])
+    print("%-56s %14s %14s %8s" % ("metric", "old", "new", "ratio"))
+    for name in sorted(set(old) & set(new)):
+        ratio = new[name] / old[name] if old[name] else float("nan")
+        print("%-56s %14.1f %14.1f %8.2f" % (name, old[name], new[name], ratio))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("modules", nargs="*", default=SUITE, help="benchmarks to run, default all")
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare with")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a smoke run")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.modules:
+        print("running %s ..." % name, file=sys.stderr)
+        results[name] = import_module("benchmarks." + name).collect(quick=args.quick)
+
+    run = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": revision(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(run, indent=2, sort_keys=True))
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), run)
+
+
+if __name__ == "__main__":
+    main()
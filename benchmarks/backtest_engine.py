@@ -0,0 +1,60 @@
+# encoding:utf-8
+"""
+Bars per second of the threaded Engine and the synchronous BacktestEngine
+on a synthetic backtest clock, with a few no-op handlers per bar.
+
+    python -m benchmarks.backtest_engine
+"""
+from __future__ import print_function
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from fxdayu.engine import Engine, BacktestEngine
+from fxdayu.event import EVENTS, TimeEvent, ExitEvent
+
+
+def measure(engine, bars=100000, handlers=3):
+    """
+    Args:
+        engine(fxdayu.engine.Engine): engine under test
+        bars(int): number of bars, two TimeEvents are put for each bar
+        handlers(int): number of no-op handlers on each topic
+
+    Returns:
+        float: bars per second
+    """
+    for i in range(handlers):
+        engine.register(lambda event, kwargs=None: None, EVENTS.TIME, topic="bar.open", priority=i)
+        engine.register(lambda event, kwargs=None: None, EVENTS.TIME, topic="bar.close", priority=i)
+    engine.set_context(threading.Lock())
+    start = datetime(2010, 1, 1)
+    for i in range(bars):
+        t = start + timedelta(minutes=i)
+        engine.put(TimeEvent(t, "bar.open"))
+        engine.put(TimeEvent(t, "bar.close"))
+    engine.put(ExitEvent())
+
+    st = time.time()
+    engine.start()
+    engine.join()
+    engine.stop()
+    return bars / (time.time() - st)
+
+
+ENGINES = [("Engine", Engine), ("BacktestEngine", BacktestEngine)]
+
+
+def collect(quick=False):
+    bars = 10000 if quick else 100000
+    return {name: {"bars/s": measure(constructor(), bars)} for name, constructor in ENGINES}
+
+
+def main():
+    for name, constructor in ENGINES:
+        print("%-16s %12.0f bars/s" % (name, measure(constructor())))
+
+
+if __name__ == "__main__":
+    main()
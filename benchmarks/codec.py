@@ -0,0 +1,113 @@
+# encoding:utf-8
+"""
+Throughput and size of fxdayu.engine.codec against pickle protocol 2, the
+default codec of the journal and of gateway processes, on typical events.
+
+    python -m benchmarks.codec
+"""
+from __future__ import print_function
+
+import time
+from datetime import datetime
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from fxdayu.const import OrderSide, OrderAction, OrderType, OrderStatus
+from fxdayu.engine import codec
+from fxdayu.event import TickEvent, OrderEvent, ExecutionEvent, OrderStatusEvent, PositionEvent, TimeEvent
+from fxdayu.models.data import TickData, ExecutionData, PositionData
+from fxdayu.models.order import OrderReq, OrderStatusData
+
+
+def samples():
+    now = datetime(2016, 1, 4, 9, 30)
+    tick = TickData()
+    tick.gateway, tick.exchange, tick.symbol = "CTP", "SHFE", "rb1701"
+    tick.lastPrice, tick.volume, tick.time, tick.date = 2550.0, 123456, "09:30:00.500", "20160104"
+    tick.askPrice[:5] = [2551, 2552, 2553, 2554, 2555]
+    tick.bidPrice[:5] = [2550, 2549, 2548, 2547, 2546]
+    tick.askVolume[:5] = tick.bidVolume[:5] = [10, 20, 30, 40, 50]
+
+    order = OrderReq()
+    order.account, order.gateway, order.clOrdID, order.symbol = "BACKTEST", "CTP", 1, "rb1701"
+    order.side, order.action, order.ordType = OrderSide.BUY, OrderAction.OPEN, OrderType.LIMIT
+    order.orderQty, order.price, order.transactTime = 10, 2550.0, now
+
+    execution = ExecutionData()
+    execution.account, execution.gateway, execution.clOrdID, execution.symbol = "BACKTEST", "CTP", 1, "rb1701"
+    execution.side, execution.action, execution.time = OrderSide.BUY, OrderAction.OPEN, now
+    execution.lastQty, execution.lastPx, execution.commission = 10, 2550.0, 2.5
+
+    status = OrderStatusData()
+    status.account, status.gateway, status.clOrdID, status.symbol = "BACKTEST", "CTP", 1, "rb1701"
+    status.ordStatus, status.orderQty, status.orderTime = OrderStatus.ALLTRADED, 10, now
+
+    position = PositionData()
+    position.account, position.gateway, position.symbol = "BACKTEST", "CTP", "rb1701"
+    position.volume, position.avgPrice = 10, 2550.0
+
+    return {
+        "tick": TickEvent(tick, now, tick.symbol),
+        "order": OrderEvent(order, now),
+        "execution": ExecutionEvent(execution, timestamp=now),
+        "order_status": OrderStatusEvent(status, timestamp=now),
+        "position": PositionEvent(position, timestamp=now),
+        "time": TimeEvent(now, "bar.close"),
+    }
+
+
+def pickle_dumps(obj):
+    return pickle.dumps(obj, 2)
+
+
+def measure(obj, encode, decode, n):
+    """
+    Args:
+        obj: object to encode
+        encode(function): obj -> bytes
+        decode(function): bytes -> obj
+        n(int): rounds
+
+    Returns:
+        dict: encode and decode per second and size of a record in bytes
+    """
+    st = time.time()
+    for _ in range(n):
+        data = encode(obj)
+    encoded = n / (time.time() - st)
+    st = time.time()
+    for _ in range(n):
+        decode(data)
+    decoded = n / (time.time() - st)
+    return {"encode/s": encoded, "decode/s": decoded, "bytes": len(data)}
+
+
+def collect(quick=False):
+    """
+    Returns:
+        dict: results of every benchmark in this module
+    """
+    n = 2000 if quick else 20000
+    return {
+        name: {
+            "codec": measure(obj, codec.encode, codec.decode, n),
+            "pickle": measure(obj, pickle_dumps, pickle.loads, n),
+        }
+        for name, obj in samples().items()
+    }
+
+
+def main():
+    result = collect()
+    print("%-14s %-8s %12s %12s %8s" % ("event", "codec", "encode/s", "decode/s", "bytes"))
+    for name, r in sorted(result.items()):
+        for way in ("codec", "pickle"):
+            print("%-14s %-8s %12.0f %12.0f %8d" % (
+                name, way, r[way]["encode/s"], r[way]["decode/s"], r[way]["bytes"]))
+
+
+if __name__ == "__main__":
+    main()
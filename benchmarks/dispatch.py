@@ -0,0 +1,233 @@
+# encoding:utf-8
+"""
+Micro-benchmarks of the dispatch path: PriorityList put/remove,
+StreamManager.get_iter resolution at different topic depths, engine queue
+put/get throughput and end-to-end events per second with N no-op handlers.
+
+    python -m benchmarks.dispatch
+"""
+from __future__ import print_function
+
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from heapq import heappop
+
+from fxdayu.engine import Engine, BacktestEngine, BusySpinWait
+from fxdayu.engine.stream import PriorityList, StreamManager
+from fxdayu.event import EVENTS, TimeEvent, ExitEvent
+
+try:
+    from Queue import Empty
+except ImportError:
+    from queue import Empty
+
+
+def noop(event, kwargs=None):
+    pass
+
+
+def handlers(n):
+    # distinct objects, PriorityList keys on the handler
+    return [lambda event, kwargs=None: None for _ in range(n)]
+
+
+def priority_list(n=200):
+    """
+    Args:
+        n(int): handlers in the list
+
+    Returns:
+        dict: put and remove operations per second
+    """
+    values = handlers(n)
+    priorities = [random.randint(-100, 100) for _ in values]
+    rounds = max(1, 100000 // n)
+    put = remove = 0.0
+    for _ in range(rounds):
+        pl = PriorityList()
+        st = time.time()
+        for priority, value in zip(priorities, values):
+            pl.put(priority, value)
+        put += time.time() - st
+        st = time.time()
+        for value in values:
+            pl.remove(value)
+        remove += time.time() - st
+    return {"put/s": rounds * n / put, "remove/s": rounds * n / remove}
+
+
+def topic_of(depth):
+    return ".".join("t%d" % i for i in range(depth))
+
+
+def get_iter(depth, calls=100000):
+    """
+    Resolve a topic of given depth with a head and a tail handler registered
+    on every level.
+
+    Args:
+        depth(int): number of dot separated levels of the topic
+        calls(int): resolutions measured
+
+    Returns:
+        dict: cached and uncached resolutions per second
+    """
+    manager = StreamManager()
+    manager.register_handler(noop, EVENTS.TIME, "")
+    manager.register_handler(noop, EVENTS.TIME, ".")
+    parts = topic_of(depth).split(".") if depth else []
+    for i in range(1, len(parts) + 1):
+        path = ".".join(parts[:i])
+        manager.register_handler(lambda event, kwargs=None: None, EVENTS.TIME, path)
+        manager.register_handler(lambda event, kwargs=None: None, EVENTS.TIME, path + ".")
+    topic = topic_of(depth)
+
+    resolve = manager._resolve
+    st = time.time()
+    for _ in range(calls):
+        tuple(resolve(EVENTS.TIME, topic))
+    uncached = calls / (time.time() - st)
+
+    get = manager.get_iter
+    st = time.time()
+    for _ in range(calls):
+        get(EVENTS.TIME, topic)
+    cached = calls / (time.time() - st)
+    return {"cached/s": cached, "uncached/s": uncached}
+
+
+def wildcard(symbols=5000):
+    """
+    Resolve "execution.<symbol>" topics of a universe of symbols, with a
+    handler on every symbol or a single handler on "execution.*".
+
+    Args:
+        symbols(int): size of the universe
+
+    Returns:
+        dict: registrations and uncached resolutions per second of each way
+    """
+    names = ["%06d" % i for i in range(symbols)]
+    result = {}
+    for way in ("per_symbol", "wildcard"):
+        manager = StreamManager()
+        manager.register_handler(noop, EVENTS.EXECUTION, "")
+        st = time.time()
+        if way == "wildcard":
+            manager.register_handler(noop, EVENTS.EXECUTION, "execution.*")
+        else:
+            for name in names:
+                manager.register_handler(noop, EVENTS.EXECUTION, "execution." + name)
+        registered = time.time() - st
+        topics = ["execution." + name for name in names]
+        resolve = manager._resolve
+        st = time.time()
+        for topic in topics:
+            tuple(resolve(EVENTS.EXECUTION, topic))
+        result[way] = {"register(s)": registered, "uncached/s": symbols / (time.time() - st)}
+    return result
+
+
+def events(n):
+    start = datetime(2010, 1, 1)
+    return [TimeEvent(start + timedelta(minutes=i), "bar.open") for i in range(n)]
+
+
+def queue_put_get(n=200000):
+    """
+    Put n events into an engine's queue and take them back in one thread.
+
+    Args:
+        n(int): number of events
+
+    Returns:
+        dict: put and get per second of each engine
+    """
+    result = {}
+    items = events(n)
+    for name, engine in [("Engine", Engine(wait=BusySpinWait())), ("BacktestEngine", BacktestEngine())]:
+        st = time.time()
+        for event in items:
+            engine.put(event)
+        put = n / (time.time() - st)
+        st = time.time()
+        if isinstance(engine, BacktestEngine):
+            queue = engine.event_queue
+            while queue:
+                heappop(queue)
+        else:
+            get, queue = engine._wait.get, engine.event_queue
+            try:
+                while True:
+                    get(queue)
+            except Empty:
+                pass
+        result[name] = {"put/s": put, "get/s": n / (time.time() - st)}
+    return result
+
+
+def end_to_end(engine, n=100000, handler_count=5):
+    """
+    Args:
+        engine(fxdayu.engine.Engine): engine under test
+        n(int): number of events
+        handler_count(int): no-op handlers on the topic
+
+    Returns:
+        float: events per second
+    """
+    for i, handler in enumerate(handlers(handler_count)):
+        engine.register(handler, EVENTS.TIME, topic="bar.open", priority=i)
+    engine.set_context(threading.Lock())
+    for event in events(n):
+        engine.put(event)
+    engine.put(ExitEvent())
+    st = time.time()
+    engine.start()
+    engine.join()
+    engine.stop()
+    return n / (time.time() - st)
+
+
+def collect(quick=False):
+    """
+    Returns:
+        dict: results of every benchmark in this module
+    """
+    scale = 10 if quick else 1
+    return {
+        "priority_list": {str(n): priority_list(n) for n in (10, 100, 1000)},
+        "get_iter": {str(depth): get_iter(depth, 100000 // scale) for depth in (0, 1, 2, 4, 8)},
+        "wildcard": wildcard(5000 // scale),
+        "queue": queue_put_get(200000 // scale),
+        "end_to_end": {
+            name: {str(count): end_to_end(constructor(), 100000 // scale, count) for count in (1, 5, 20)}
+            for name, constructor in [("Engine", Engine), ("BacktestEngine", BacktestEngine)]
+        },
+    }
+
+
+def main():
+    result = collect()
+    print("PriorityList")
+    for n, r in sorted(result["priority_list"].items(), key=lambda item: int(item[0])):
+        print("  %-6s handlers %12.0f put/s %12.0f remove/s" % (n, r["put/s"], r["remove/s"]))
+    print("StreamManager.get_iter")
+    for depth, r in sorted(result["get_iter"].items(), key=lambda item: int(item[0])):
+        print("  depth %-4s %12.0f cached/s %12.0f uncached/s" % (depth, r["cached/s"], r["uncached/s"]))
+    print("execution.<symbol> over %d symbols" % 5000)
+    for way, r in sorted(result["wildcard"].items()):
+        print("  %-16s %12.4f s to register %12.0f uncached/s" % (way, r["register(s)"], r["uncached/s"]))
+    print("queue")
+    for name, r in sorted(result["queue"].items()):
+        print("  %-16s %12.0f put/s %12.0f get/s" % (name, r["put/s"], r["get/s"]))
+    print("end to end")
+    for name, r in sorted(result["end_to_end"].items()):
+        for count, eps in sorted(r.items(), key=lambda item: int(item[0])):
+            print("  %-16s %3s handlers %12.0f events/s" % (name, count, eps))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# encoding:utf-8
+"""
+Tick-to-handler latency and idle CPU cost of the Engine under each wait strategy,
+and of the AsyncEngine where asyncio is available.
+
+    python -m benchmarks.engine_wait
+"""
+from __future__ import print_function
+
+import os
+import threading
+import time
+
+import numpy as np
+
+from fxdayu.engine import Engine, BusySpinWait, YieldingWait, BlockingWait
+
+try:
+    from fxdayu.engine import AsyncEngine
+except ImportError:
+    AsyncEngine = None
+from fxdayu.event import EVENTS, TickEvent
+
+STRATEGIES = [
+    ("busy-spin", BusySpinWait),
+    ("spin-then-yield", YieldingWait),
+    ("blocking", BlockingWait),
+]
+
+
+def cpu_time():
+    t = os.times()
+    return t[0] + t[1]
+
+
+def measure(engine, ticks=2000, interval=0.0005, idle=1.0):
+    """
+    Args:
+        engine(fxdayu.engine.Engine): engine under test
+        ticks(int): number of ticks sent by the producer thread
+        interval(float): seconds between two ticks
+        idle(float): seconds the engine stays idle when measuring cpu usage
+
+    Returns:
+        dict: latency percentiles in microseconds and idle cpu usage
+    """
+    latencies = []
+    done = threading.Event()
+
+    def on_tick(event, kwargs=None):
+        latencies.append(time.time() - event.data)
+        if len(latencies) == ticks:
+            done.set()
+
+    engine.register(on_tick, EVENTS.TICK, topic=".")
+    engine.set_context(threading.Lock())
+    engine.start()
+
+    time.sleep(0.1)
+    st, cpu = time.time(), cpu_time()
+    time.sleep(idle)
+    idle_cpu = (cpu_time() - cpu) / (time.time() - st)
+
+    for _ in range(ticks):
+        engine.put(TickEvent(time.time()))
+        time.sleep(interval)
+    done.wait(10)
+    engine.stop()
+
+    latencies = np.array(latencies) * 1e6
+    return {
+        "p50": np.percentile(latencies, 50),
+        "p99": np.percentile(latencies, 99),
+        "max": latencies.max(),
+        "idle_cpu": idle_cpu,
+    }
+
+
+def engines():
+    result = [(name, lambda strategy=strategy: Engine(wait=strategy())) for name, strategy in STRATEGIES]
+    if AsyncEngine is not None:
+        result.append(("asyncio", AsyncEngine))
+    return result
+
+
+def collect(quick=False):
+    ticks, idle = (200, 0.2) if quick else (2000, 1.0)
+    return {name: measure(make(), ticks=ticks, idle=idle) for name, make in engines()}
+
+
+def main():
+    print("%-16s %10s %10s %10s %10s" % ("strategy", "p50(us)", "p99(us)", "max(us)", "idle cpu"))
+    for name, make in engines():
+        result = measure(make())
+        print("%-16s %10.1f %10.1f %10.1f %9.0f%%" % (
+            name, result["p50"], result["p99"], result["max"], result["idle_cpu"] * 100
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# encoding:utf-8
+"""
+Heap push/pop throughput of events ordered by the legacy (priority, time, pid)
+tuples against the precomputed integer sort key.
+
+    python -m benchmarks.event_heap
+"""
+from __future__ import print_function
+
+import threading
+import time
+from datetime import datetime, timedelta
+from heapq import heappush, heappop
+
+from fxdayu.event import TimeEvent
+
+G = threading.local()
+
+
+class LegacyEvent(object):
+    """
+    Event ordered as before the integer sort key: a hex string pid built from
+    thread id and a thread-local counter, compared in a 3-tuple.
+    """
+    __slots__ = ["type", "priority", "topic", "time", "pid"]
+
+    def __init__(self, _type, priority, timestamp, topic=""):
+        self.type = _type
+        self.priority = priority
+        self.topic = topic
+        self.time = timestamp
+        self.pid = self.next_pid()
+
+    @classmethod
+    def next_pid(cls):
+        try:
+            G.count += 1
+        except AttributeError:
+            G.count = 1
+        result = hex(threading.current_thread().ident)[2:].replace("L", "").zfill(5)
+        result += hex(G.count)[2:].replace("L", "").zfill(12)
+        return result
+
+    def __lt__(self, other):
+        return (self.priority, self.time, self.pid) < (other.priority, other.time, other.pid)
+
+
+def times(n):
+    start = datetime(2010, 1, 1)
+    # events pushed out of order, as orders interleave with the clock
+    return [start + timedelta(minutes=(i * 7919) % n) for i in range(n)]
+
+
+def push_pop(items, wrap=None):
+    st = time.time()
+    heap = []
+    if wrap:
+        for item in items:
+            heappush(heap, wrap(item))
+    else:
+        for item in items:
+            heappush(heap, item)
+    while heap:
+        heappop(heap)
+    return len(items) / (time.time() - st)
+
+
+def construct(constructor, stamps):
+    st = time.time()
+    events = [constructor(t) for t in stamps]
+    return events, len(stamps) / (time.time() - st)
+
+
+def collect(quick=False, n=200000):
+    if quick:
+        n //= 10
+    stamps = times(n)
+    legacy, legacy_build = construct(lambda t: LegacyEvent(7, 1, t, "bar.open"), stamps)
+    events, build = construct(lambda t: TimeEvent(t, "bar.open"), stamps)
+    return {
+        "legacy": {"build/s": legacy_build, "push+pop/s": push_pop(legacy)},
+        "key": {"build/s": build, "push+pop/s": push_pop(events)},
+        "key_tuple": {"push+pop/s": push_pop(events, lambda e: (e.key, e))},
+    }
+
+
+def main():
+    result = collect()
+    print("%-32s %12s %12s" % ("", "build/s", "push+pop/s"))
+    print("%-32s %12.0f %12.0f" % ("legacy (priority, time, pid)",
+                                    result["legacy"]["build/s"], result["legacy"]["push+pop/s"]))
+    print("%-32s %12.0f %12.0f" % ("Event.__lt__ on key", result["key"]["build/s"], result["key"]["push+pop/s"]))
+    print("%-32s %12s %12.0f" % ("(key, event) tuples", "-", result["key_tuple"]["push+pop/s"]))
+
+
+if __name__ == "__main__":
+    main()
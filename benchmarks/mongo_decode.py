@@ -0,0 +1,81 @@
+# encoding:utf-8
+"""
+Time to turn a Mongo cursor of minute bars into a DataFrame: the legacy
+list(cursor) -> DataFrame -> pop('_id') path against read_columns, which
+writes each cursor batch into preallocated NumPy columns. The cursor is an
+in-process stand-in yielding fresh dicts, as pymongo does, so no mongod is
+needed and only the decoding on the client side is measured.
+
+    python -m benchmarks.mongo_decode
+"""
+from __future__ import print_function
+
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from fxdayu.data.handler import read_columns
+
+FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+class StandInCursor(object):
+    """
+    Yields a new dict per document like a pymongo cursor, projection applied.
+    """
+
+    def __init__(self, n, with_id=True):
+        self.n = n
+        self.with_id = with_id
+
+    def __iter__(self):
+        start = datetime(2010, 1, 4, 9, 31)
+        minute = timedelta(minutes=1)
+        for i in range(self.n):
+            doc = {"datetime": start + i * minute, "open": 10.0 + i, "high": 10.5 + i, "low": 9.5 + i,
+                   "close": 10.2 + i, "volume": 1000.0 + i}
+            if self.with_id:
+                doc["_id"] = i
+            yield doc
+
+
+def legacy(cursor, index="datetime"):
+    data = pd.DataFrame(list(cursor))
+    data.index = data.pop(index)
+    data.pop("_id")
+    return data
+
+
+def measure(n, rounds):
+    """
+    Returns:
+        dict: documents decoded per second by each path
+    """
+    result = {}
+    for name, read in [("legacy", lambda: legacy(StandInCursor(n))),
+                       ("columns", lambda: read_columns(StandInCursor(n, False), "datetime", n))]:
+        st = time.time()
+        for _ in range(rounds):
+            read()
+        result[name] = n * rounds / (time.time() - st)
+    return result
+
+
+def collect(quick=False):
+    """
+    Returns:
+        dict: results of every benchmark in this module
+    """
+    n = 20000 if quick else 500000
+    return {"docs/s": measure(n, 1 if quick else 3)}
+
+
+def main():
+    result = collect()
+    for name, value in sorted(result["docs/s"].items()):
+        print("%-8s %12.0f docs/s" % (name, value))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,12 @@ class OrderType(Enum):
     FOK = "FOK"
 
 
+class TimeInForce(Enum):
+    DAY = "当日有效"
+    GTC = "撤销前有效"
+    GTD = "指定时间前有效"
+
+
 class OrderStatus(Enum):
     GENERATE = "已生成"
     TRIGGERED = "已触发"
@@ -1,6 +1,12 @@
+# encoding:utf-8
 from fxdayu.data.handler import MongoHandler
+from fxdayu.data.mmap_cache import MmapCacheHandler
+from fxdayu.data.resampler import A_SHARE_SESSIONS, SessionCalendar, groupers
+from fxdayu.data.store import BarStore, ResampledBars, RollingWindow, to_ns, union_times
 from fxdayu.engine.handler import HandlerCompose
-from datetime import datetime, timedelta
+from datetime import datetime
+from multiprocessing.pool import ThreadPool
+import numpy as np
 import pandas as pd
 from collections import Iterable, defaultdict
 
@@ -11,6 +17,9 @@ OANDA_MAPPER = {'open': 'openMid',
                 'close': 'closeMid'}
 
 
+LOAD_WORKERS = 8  # init同时读取数据库的线程数
+
+
 RESAMPLE_MAP = {'high': 'max',
                 'low': 'min',
                 'close': 'last',
@@ -27,28 +36,19 @@ def mapper(fields):
         return RESAMPLE_MAP
 
 
-class TimeEdge():
-    def __init__(self, edge):
-        self.edge = edge
-        self.start = None
-        self.end = None
-
-    def range(self, end):
-        self.end = end
-        self.start = self.edge(end)
-        return end
+def bin_labels(times, frequency):
+    """
+    每根K线按frequency重采样(label='right', closed='right')后所在K线的时间索引。
 
-    def __call__(self, x):
-        self.range(x[-1])
-        return pd.DatetimeIndex(
-            reversed(map(self.scheduler, reversed(x)))
-        )
+    Args:
+        times(pandas.DatetimeIndex): K线时间
+        frequency(str): 重采样周期
 
-    def scheduler(self, t):
-        if t < self.end and (t > self.start):
-            return self.end
-        else:
-            return self.range(t)
+    Returns:
+        pandas.DatetimeIndex
+    """
+    last = pd.Series(times, index=times).resample(frequency, label='right', closed='right').last().dropna()
+    return last.index[last.values.searchsorted(times.values)]
 
 
 class MarketData(object):
@@ -246,50 +246,115 @@ class MarketData(object):
 
 class MarketDataFreq(object):
 
-    def __init__(self, client=None, host='localhost', port=27017, users=None, db=None, **kwargs):
+    def __init__(self, client=None, host='localhost', port=27017, users=None, db=None, cache=None,
+                 sessions=A_SHARE_SESSIONS, **kwargs):
+        """
+        Args:
+            client(fxdayu.data.handler.DataHandler): 数据库，None时按host、port等创建MongoHandler
+            cache(str): 磁盘缓存目录，不为None时经过MmapCacheHandler读取数据库
+            sessions(list): 交易时段[(开始时间, 结束时间)]，用于按周和小时重采样，默认为A股
+        """
         self.client = client if client else MongoHandler(host, port, users, db, **kwargs)
+        if cache is not None:
+            self.client = MmapCacheHandler(self.client, cache)
         self.read = self.client.read
         self.write = self.client.write
         self.inplace = self.client.inplace
         self.initialized = False
         self.frequency = None
-        self._panels = {}
+        self._store = BarStore()
+        self._resampled = {}
+        self._windows = {}
+        self._all_time = None
+        self._key_time = None
+        self._key = None
         self.name_map = {}
         self._db = self.client.db
         self.sample_factor = {'min': 1, 'H': 60, 'D': 240, 'W': 240*5, 'M': 240*5*31}
-        self.grouper = {
-            'W': TimeEdge(lambda x: x.replace(hour=0, minute=0)-timedelta(days=x.weekday())),
-            'H': TimeEdge(lambda x: x.replace(minute=30, hour=x.hour if x.minute > 30 else x.hour-1) if x.hour < 12
-                          else x.replace(minute=0, hour=x.hour if x.minute != 0 else x.hour-1))
-        }
+        self.grouper = groupers(SessionCalendar(sessions))
         self.fields = list(RESAMPLE_MAP.keys())
 
     @property
     def time(self):
         return datetime.now()
 
-    def init(self, symbols, frequency=None, start=None, end=None, db=None):
+    def init(self, symbols, frequency=None, start=None, end=None, db=None, workers=LOAD_WORKERS, progress=None):
+        """
+        从数据库加载各品种的K线。多个品种由线程池同时读取，共用同一个数据库连接，
+        读取的结果按品种顺序加入内存，与逐个读取的结果相同。
+
+        Args:
+            symbols(str | list | dict): 品种，dict时为{数据库名: [品种]}
+            frequency(str): K线周期
+            start(datetime): 开始时间
+            end(datetime): 结束时间
+            db(str): 数据库名
+            workers(int): 同时读取的线程数，1时逐个读取
+            progress(function): 每个品种读取完成后以(已完成数, 总数, 品种)调用
+
+        Returns:
+            None
+        """
         self._db = defaultdict(lambda: db)
-
-        def initialize(_symbol, _db):
-            result = self._read_db(_symbol, ['open', 'high', 'low', 'close', 'volume'], start, end, None, _db)
-            if len(result):
-                self._panels[_symbol] = result
-                self._db[_symbol] = _db
+        self._windows.clear()
 
         if isinstance(symbols, str):
-            initialize(symbols, db)
+            tasks = [(symbols, db)]
         elif isinstance(symbols, dict):
-            for db_, symbol in symbols.items():
-                for s in symbol:
-                    initialize(s, db_)
+            tasks = [(s, db_) for db_, symbol in symbols.items() for s in symbol]
         elif isinstance(symbols, Iterable):
-            for symbol in symbols:
-                initialize(symbol, db)
+            tasks = [(symbol, db) for symbol in symbols]
+        else:
+            tasks = []
+
+        def load(task):
+            return self._read_db(task[0], ['open', 'high', 'low', 'close', 'volume'], start, end, None, task[1])
 
+        workers = min(workers or 1, len(tasks))
+        pool = ThreadPool(workers) if workers > 1 else None
+        try:
+            results = pool.imap(load, tasks) if pool else (load(task) for task in tasks)
+            for done, (symbol, db_) in enumerate(tasks, 1):
+                result = next(results)
+                if len(result):
+                    self._store.add(symbol, result)
+                    self._db[symbol] = db_
+                if progress is not None:
+                    progress(done, len(tasks), symbol)
+        finally:
+            if pool:
+                pool.terminate()
+                pool.join()
+
+        self._all_time = self._store.times()
         self.frequency = frequency
         self.initialized = True
 
+    def extend(self, end=None):
+        """
+        从数据库读取各品种已加载的最后一根K线之后的数据，追加到内存中，用于增量回测。
+
+        Args:
+            end(datetime): 读取的截止时间，None表示读取全部
+
+        Returns:
+            pandas.DatetimeIndex: 追加的K线中all_time原来没有的时间，已排序
+        """
+        appended = []
+        for symbol, bars in list(self._store.items()):
+            last = bars.times[-1]
+            result = self._read_db(symbol, ['open', 'high', 'low', 'close', 'volume'], last, end, None,
+                                   self._db[symbol])
+            if len(result):
+                result = result[result.index > last]
+            if len(result):
+                bars.append(result)
+                appended.append(bars.index[-len(result):])
+        index = np.setdiff1d(union_times(appended), self.all_time.asi8, assume_unique=True)
+        if len(index):
+            self._all_time = pd.DatetimeIndex(union_times([self.all_time.asi8, index]).view("M8[ns]"))
+        return pd.DatetimeIndex(index.view("M8[ns]"))
+
     def _read_db(self, symbol, fields, start, end, length, db):
         if fields is None:
             fields = ['datetime', 'open', 'high', 'low', 'close', 'volume']
@@ -311,9 +376,72 @@ class MarketDataFreq(object):
     def current(self, symbol=None):
         return self.history(symbol, length=1)
 
+    def values(self, symbol, fields=None, start=None, end=None, length=None):
+        """
+        取出已加载品种的K线数组视图，不构造pandas对象，用于逐根K线调用的计算。
+        参数含义与history相同，length为1时返回当前K线的值。
+
+        Args:
+            symbol(str): 品种
+            fields(str | list): 字段，默认为全部
+            start(datetime): 开始时间
+            end(datetime): 结束时间
+            length(int): K线数
+
+        Returns:
+            单个字段时为标量或numpy.ndarray(只读视图)，多个字段时为{字段: 标量或numpy.ndarray}
+        """
+        bars = self._store[symbol]
+        return bars.values(self._locate(bars, start, end, length), fields if fields is not None else self.fields)
+
+    def rolling(self, symbol, length, fields=None):
+        """
+        品种截至当前时间最近length根K线的滚动窗口。窗口在多次调用间保留，
+        时间前进时只写入新的K线，每根K线的代价与length无关。
+        窗口中的数组是只读视图，在下一根K线写入前有效；需要DataFrame时调用window.frame()。
+
+        Args:
+            symbol(str): 已加载的品种
+            length(int): 窗口长度，已有的K线不足length根时窗口中为全部已有的K线
+            fields(list): 字段，默认为全部
+
+        Returns:
+            fxdayu.data.store.RollingWindow
+        """
+        bars = self._store[symbol]
+        fields = tuple(self.fields if fields is None else fields)
+        key = (symbol, length, fields)
+        window = self._windows.get(key, None)
+        if window is None:
+            window = self._windows[key] = RollingWindow(length, fields,
+                                                        {field: bars.columns[field].dtype for field in fields})
+        last = bars.locate(self._now_key())
+        if last != window.position:
+            if last < window.position or last - window.position > length:
+                # 时间后退或跳过了整个窗口，重新填充
+                window.clear()
+            start = max(window.position + 1, last - length + 1, 0)
+            window.write(bars.index[start:last + 1], bars.values(slice(start, last + 1), fields))
+            window.position = last
+        return window
+
+    def _now_key(self):
+        now = self.time
+        if now is not self._key_time:
+            self._key = to_ns(now)
+            self._key_time = now
+        return self._key
+
+    def _locate(self, bars, start, end, length):
+        now = self._now_key()
+        return self.major_slice(bars.index, now,
+                                to_ns(start) if start else None,
+                                to_ns(end) if end else None,
+                                length, bars.locate(now))
+
     def history(self, symbol=None, frequency=None, fields=None, start=None, end=None, length=None, db=None):
         if symbol is None:
-            symbol = self._panels.keys()
+            symbol = self._store.symbols()
 
         if fields is None:
             fields = self.fields
@@ -361,8 +489,9 @@ class MarketDataFreq(object):
         else:
             return len(axis) - 1
 
-    def major_slice(self, axis, now, start, end, length):
-        last = self.search_axis(axis, now)
+    def major_slice(self, axis, now, start, end, length, last=None):
+        if last is None:
+            last = self.search_axis(axis, now)
 
         if end:
             end = self.search_axis(axis, end)
@@ -394,9 +523,8 @@ class MarketDataFreq(object):
 
     def _find_candle(self, symbol, fields, start, end, length):
         try:
-            frame = self._panels[symbol]
-            time_slice = self.major_slice(frame.index, self.time, start, end, length)
-            return frame.iloc[time_slice][fields]
+            bars = self._store[symbol]
+            return bars.get(self._locate(bars, start, end, length), fields)
         except KeyError:
             if not end or end > self.time:
                 end = self.time
@@ -411,7 +539,26 @@ class MarketDataFreq(object):
             else:
                 return result.iloc[0] if len(result) else result
 
+    def _resampled_bars(self, symbol, frequency, grouper):
+        bars = self._store[symbol]
+        resampled = self._resampled.get((symbol, frequency), None)
+        if resampled is None or resampled.bars is not bars:
+            if grouper is not None:
+                resampled = ResampledBars(bars, grouper, RESAMPLE_MAP, label_last=True)
+            else:
+                resampled = ResampledBars(bars, lambda times: bin_labels(times, frequency), RESAMPLE_MAP)
+            self._resampled[(symbol, frequency)] = resampled
+        return resampled
+
     def resample(self, symbol, frequency, fields, start, end, length, n, w, grouper, agg):
+        if start is None and symbol in self._store:
+            # 已加载的品种从增量维护的高周期K线中截取，最后一根K线只聚合到当前时间
+            bars = self._store[symbol]
+            last = self._locate(bars, None, end, None).stop - 1
+            if last < 0:
+                raise KeyError("data required out of range")
+            return self._resampled_bars(symbol, frequency, grouper).get(last, length, fields)
+
         frame = self._find_candle(symbol, fields, start, end, length*n*self.sample_factor[w] if length else None)
         if grouper is not None:
             return frame.groupby(grouper).agg(agg)
@@ -432,16 +579,17 @@ class MarketDataFreq(object):
 
     @property
     def all_time(self):
-        all_ = []
-        for item in self._panels.items():
-            all_.extend(filter(lambda x: x not in all_, item[1].index))
-
-        return sorted(all_)
+        """
+        pandas.DatetimeIndex: 所有已加载品种K线时间的并集，已排序。在init时计算，extend时合并新的时间
+        """
+        if self._all_time is None:
+            self._all_time = self._store.times()
+        return self._all_time
 
     def can_trade(self, symbol=None):
         if symbol:
             try:
-                return self.time in self._panels[symbol].index
+                return self._store[symbol].contains(self._now_key())
             except KeyError:
                 try:
                     data = self.client.read('.'.join((symbol, self.frequency)), self._db[symbol], end=self.time, length=1)
@@ -453,8 +601,9 @@ class MarketDataFreq(object):
                 return False
         else:
             trades = []
-            for s, frame in self._panels.items():
-                if self.time in frame.index:
+            key = self._now_key()
+            for s, bars in self._store.items():
+                if bars.contains(key):
                     trades.append(s)
             return trades
 
@@ -1,8 +1,11 @@
 # encoding:utf-8
 from pymongo.mongo_client import database
+import numpy as np
 import pandas as pd
 import pymongo
 
+BATCH_SIZE = 10000  # 每批从游标取出的文档数
+
 
 class DataHandler(object):
 
@@ -25,6 +28,123 @@ class DataHandler(object):
         pass
 
 
+def _empty(dtype, size, missing_to):
+    """
+    分配size行的列，前missing_to行为缺失值，int和bool列含缺失值时与DataFrame一样改为float和object。
+    """
+    if missing_to:
+        if dtype.kind in "iu":
+            dtype = np.dtype(np.float64)
+        elif dtype.kind == "b":
+            dtype = np.dtype(object)
+    column = np.empty(size, dtype)
+    if missing_to:
+        column[:missing_to] = _missing(dtype)
+    return column
+
+
+def _missing(dtype):
+    if dtype.kind == "f":
+        return np.nan
+    elif dtype.kind == "M":
+        return np.datetime64("NaT")
+    return np.nan
+
+
+def _common(a, b):
+    if a == b:
+        return a
+    if a.kind in "iuf" and b.kind in "iuf":
+        return np.result_type(a, b)
+    return np.dtype(object)
+
+
+def read_columns(cursor, index=None, count=None, reverse=False, batch_size=BATCH_SIZE):
+    """
+    按批将查询结果写入预先分配的numpy列，不构造全部文档的list和中间DataFrame，
+    内存中同时只有一批文档。每列的类型推断与pandas.DataFrame(list of dict)相同，
+    缺失的字段和None为NaN。
+
+    Args:
+        cursor(pymongo.cursor.Cursor): 查询游标
+        index(str): 作为索引的字段，None时为默认的整数索引
+        count(int): 结果的记录数，用于预先分配，None或不准确时按需扩展
+        reverse(bool): 结果是否为倒序，是则恢复为正序
+        batch_size(int): 每批写入的文档数
+
+    Returns:
+        pandas.DataFrame: 列按字段名排序
+    """
+    capacity = count or batch_size
+    columns = {}
+    n = 0
+    batch = []
+    iterator = iter(cursor)
+    while True:
+        batch[:] = []
+        for doc in iterator:
+            batch.append(doc)
+            if len(batch) == batch_size:
+                break
+        if not batch:
+            break
+
+        k = len(batch)
+        if n + k > capacity:
+            capacity = max(capacity * 2, n + k)
+            for field, column in columns.items():
+                grown = np.empty(capacity, column.dtype)
+                grown[:n] = column[:n]
+                columns[field] = grown
+
+        # 一批文档的列由pandas一次转换，再写入预先分配的列
+        frame = pd.DataFrame(batch)
+        keys = set(frame.columns)
+        keys.discard("_id")
+        for field in list(keys):
+            array = frame[field].values
+            column = columns.get(field, None)
+            if column is not None and column.dtype.kind != "O" and array.dtype.kind == "O" \
+                    and frame[field].isnull().all():
+                # 全为None的一批不改变数值列的类型
+                keys.discard(field)
+                continue
+            if column is None:
+                column = columns[field] = _empty(array.dtype, capacity, n)
+            else:
+                if column.dtype.kind == "O" and array.dtype.kind in "iuf" and pd.isnull(column[:n]).all():
+                    # 之前全为None的列遇到数值时为float
+                    column = columns[field] = column.astype(np.float64)
+                dtype = _common(column.dtype, array.dtype)
+                if dtype != column.dtype:
+                    column = columns[field] = column.astype(dtype)
+            column[n:n + k] = array
+        del frame
+        for field in set(columns).difference(keys):
+            # 这一批中没有该字段
+            column = columns[field]
+            if column.dtype.kind in "iub":
+                column = columns[field] = column.astype(np.float64 if column.dtype.kind != "b" else object)
+            column[n:n + k] = _missing(column.dtype)
+        n += k
+
+    step = -1 if reverse else 1
+    columns = {field: column[:n][::step] for field, column in columns.items()}
+    for field, column in columns.items():
+        if column.dtype.kind == "O" and pd.isnull(column).all() and any(value is not None for value in column):
+            # 与pandas一致，None和缺失值混合的列为float
+            columns[field] = column.astype(np.float64)
+    if index:
+        try:
+            values = columns.pop(index)
+        except KeyError:
+            raise KeyError(index)
+        idx = pd.Index(values, name=index)
+    else:
+        idx = None
+    return pd.DataFrame(columns, index=idx, columns=sorted(columns))
+
+
 class MongoHandler(DataHandler):
 
     def __init__(self, host='localhost', port=27017, users=None, db=None, **kwargs):
@@ -116,20 +236,29 @@ class MongoHandler(DataHandler):
 
     @staticmethod
     def _read(collection, index=None, **kwargs):
-        data = list(collection.find(**kwargs))
+        # 不从数据库读取_id
+        projection = kwargs.get('projection', None)
+        if projection is None:
+            projection = {'_id': 0}
+        elif isinstance(projection, dict):
+            projection = dict(projection)
+            projection.setdefault('_id', 0)
+        else:
+            projection = dict.fromkeys(projection, 1)
+            projection['_id'] = 0
+        kwargs = dict(kwargs, projection=projection)
+        batch_size = kwargs.setdefault('batch_size', BATCH_SIZE)
+
+        cursor = collection.find(**kwargs)
+        # 不单独查询记录数，有limit时按limit预先分配，否则由read_columns按倍数扩展
+        count = kwargs.get('limit', None) or None
 
+        reverse = False
         for key, value in kwargs.get('sort', []):
             if value < 0:
-                data.reverse()
-        data = pd.DataFrame(data)
-
-        if index:
-            data.index = data.pop(index)
-
-        if len(data):
-            data.pop('_id')
+                reverse = not reverse
 
-        return data
+        return read_columns(cursor, index, count, reverse, batch_size)
 
     def inplace(self, data, collection, db=None, index='datetime'):
         """
@@ -0,0 +1,423 @@
+# encoding:utf-8
+import json
+import os
+import time
+from collections import defaultdict
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from fxdayu.data.handler import DataHandler
+from fxdayu.data.store import to_ns
+
+__all__ = ["MmapCacheHandler"]
+
+try:
+    string_types = (str, unicode)
+except NameError:
+    string_types = (str,)
+
+MIN_KEY = -(1 << 63)
+MAX_KEY = (1 << 63) - 1
+MANIFEST = "manifest.json"
+INDEX_FILE = "__index__"
+
+
+def _key(timestamp, default):
+    return default if timestamp is None else to_ns(timestamp)
+
+
+def coverage(start, end, length, index):
+    """
+    一次数据库查询的结果覆盖的时间范围，范围内数据库中的所有记录都在结果中。
+    不指定结束时间的查询只覆盖到结果中最后一条记录，之后数据库中新增的记录不在范围内。
+
+    Args:
+        start(int): 查询的开始时间
+        end(int): 查询的结束时间
+        length(int): 查询的记录数
+        index(numpy.ndarray): 结果的int64时间索引，已排序
+
+    Returns:
+        tuple: (lo, hi)
+    """
+    if end is None:
+        if len(index):
+            end = int(index[-1])
+        else:
+            end = MIN_KEY if start is None else start
+    if start is not None:
+        return start, end
+    if length and len(index) >= length:
+        return int(index[0]), end
+    return MIN_KEY, end
+
+
+def locate(ranges, index, start, end, length):
+    """
+    在缓存中查找查询的结果，查询与MongoHandler.read的语义相同。
+    缓存无法确定数据库中是否有比已缓存的记录更新的记录，因此除了从start开始读取length条记录，
+    不指定结束时间的查询都不从缓存读取，其中不指定记录数的查询见locate_open。
+
+    Args:
+        ranges(list): 缓存覆盖的时间范围[(lo, hi)]
+        index(numpy.ndarray): 缓存的int64时间索引
+        start(int): 查询的开始时间，None表示不限
+        end(int): 查询的结束时间，None表示不限
+        length(int): 查询的记录数，None表示不限
+
+    Returns:
+        slice: 结果在缓存中的位置，缓存未覆盖时为None
+    """
+    for lo, hi in ranges:
+        if start is not None:
+            if not lo <= start <= hi:
+                continue
+            i = index.searchsorted(start, "left")
+            if end is not None:
+                if end > hi:
+                    continue
+                return slice(i, index.searchsorted(end, "right"))
+            if length and index.searchsorted(hi, "right") - i >= length:
+                return slice(i, i + length)
+        else:
+            if end is None or not lo <= end <= hi:
+                continue
+            j = index.searchsorted(end, "right")
+            if length:
+                i = index.searchsorted(lo, "left")
+                if j - i >= length:
+                    return slice(j - length, j)
+                if lo == MIN_KEY:
+                    return slice(i, j)
+                continue
+            if lo == MIN_KEY:
+                return slice(0, j)
+    return None
+
+
+def locate_open(ranges, index, start):
+    """
+    在缓存中查找不指定结束时间和记录数的查询已缓存的部分，之后的记录需从数据库补读。
+
+    Args:
+        ranges(list): 缓存覆盖的时间范围[(lo, hi)]
+        index(numpy.ndarray): 缓存的int64时间索引
+        start(int): 查询的开始时间，None表示不限
+
+    Returns:
+        tuple: (slice, hi)，已缓存部分在缓存中的位置和覆盖到的时间，缓存未覆盖开始时间时为None
+    """
+    for lo, hi in ranges:
+        if start is None:
+            if lo == MIN_KEY:
+                return slice(0, index.searchsorted(hi, "right")), hi
+        elif lo <= start <= hi:
+            return slice(index.searchsorted(start, "left"), index.searchsorted(hi, "right")), hi
+    return None
+
+
+def merge_ranges(ranges):
+    ranges = sorted(tuple(r) for r in ranges)
+    merged = [list(ranges[0])]
+    for lo, hi in ranges[1:]:
+        if lo <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return merged
+
+
+class CacheEntry(object):
+    """
+    一个表在磁盘上的缓存：每个字段一个.npy列文件，以内存映射方式读取，
+    manifest记录字段、覆盖的时间范围和文件的版本号。
+    写入时先写新版本的列文件，最后替换manifest，读取方不会读到写了一半的数据。
+    """
+
+    def __init__(self, path, manifest, index, columns):
+        self.path = path
+        self.manifest = manifest
+        self.index = index
+        self.columns = columns
+
+    @property
+    def generation(self):
+        return self.manifest["generation"]
+
+    @property
+    def fields(self):
+        return self.manifest["fields"]
+
+    @property
+    def ranges(self):
+        return self.manifest["ranges"]
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(os.path.join(path, MANIFEST)) as f:
+                manifest = json.load(f)
+            g = manifest["generation"]
+            index = np.load(os.path.join(path, "%s.%s.npy" % (INDEX_FILE, g)), mmap_mode="r")
+            columns = {
+                field: np.load(os.path.join(path, "%s.%s.npy" % (field, g)), mmap_mode="r")
+                for field in manifest["fields"]
+            }
+        except (IOError, OSError, ValueError, KeyError):
+            # 不存在，或被其他进程替换为新的版本
+            return None
+        if len(index):
+            # 旧版本的缓存把不指定结束时间的查询记录为覆盖到MAX_KEY
+            last = int(index[-1])
+            manifest["ranges"] = [[lo, last if hi == MAX_KEY else hi] for lo, hi in manifest["ranges"]]
+        return cls(path, manifest, index, columns)
+
+    @staticmethod
+    def save(path, frame, ranges, all_fields):
+        """
+        Args:
+            path(str): 缓存目录
+            frame(pandas.DataFrame): 全部缓存数据，按时间排序
+            ranges(list): 覆盖的时间范围
+            all_fields(bool): 是否包含表的全部字段
+
+        Returns:
+            None
+        """
+        # 版本号在多个进程间不重复
+        generation = "%d_%d" % (int(time.time() * 1000000), os.getpid())
+        if not os.path.isdir(path):
+            try:
+                os.makedirs(path)
+            except OSError:
+                if not os.path.isdir(path):
+                    raise
+        fields = [str(field) for field in frame.columns]
+        arrays = [(INDEX_FILE, np.asarray(frame.index.asi8, dtype=np.int64))]
+        arrays.extend((field, np.ascontiguousarray(frame[field].values)) for field in fields)
+        for name, array in arrays:
+            target = os.path.join(path, "%s.%s.npy" % (name, generation))
+            temp = "%s.%d.tmp" % (target, os.getpid())
+            with open(temp, "wb") as f:
+                np.save(f, array)
+            os.rename(temp, target)
+        manifest = {
+            "generation": generation,
+            "fields": fields,
+            "index": frame.index.name,
+            "all_fields": all_fields,
+            "ranges": ranges,
+        }
+        temp = os.path.join(path, "%s.%d.tmp" % (MANIFEST, os.getpid()))
+        with open(temp, "w") as f:
+            json.dump(manifest, f)
+        target = os.path.join(path, MANIFEST)
+        try:
+            os.rename(temp, target)
+        except OSError:
+            # windows不能覆盖已存在的文件
+            os.remove(target)
+            os.rename(temp, target)
+        for name in os.listdir(path):
+            parts = name.rsplit(".", 2)
+            if len(parts) == 3 and parts[2] == "npy" and parts[1] != generation:
+                try:
+                    os.remove(os.path.join(path, name))
+                except OSError:
+                    pass
+
+    def frame(self, locator, fields=None):
+        if fields is None:
+            fields = self.fields
+        index = pd.DatetimeIndex(np.asarray(self.index[locator]).view("M8[ns]"), name=self.manifest["index"])
+        return pd.DataFrame({field: self.columns[field][locator] for field in fields},
+                            index=index, columns=fields)
+
+
+class MmapCacheHandler(DataHandler):
+    """
+    在数据库之前的磁盘读缓存，接口与MongoHandler相同。
+    读取时若缓存中已有查询覆盖的时间范围，直接从内存映射的列文件中取出，
+    否则从数据库读取并合并进缓存，重复的回测和参数优化不必再访问数据库。
+    多个进程可以共用同一个缓存目录。
+
+    缓存只覆盖到读取时数据库中最后一条记录，不指定结束时间的查询仍会访问数据库，
+    已缓存的部分从缓存读取，只查询缓存之后的记录，因此能读到之后追加的新数据(如DataSupport.extend)；修改已缓存时间范围内的数据后
+    需调用invalidate清除对应的缓存。非数值字段的表不缓存。
+    """
+
+    def __init__(self, handler, root):
+        """
+        Args:
+            handler(fxdayu.data.handler.MongoHandler): 数据库
+            root(str): 缓存目录
+        """
+        self.handler = handler
+        self.root = root
+        self.db = handler.db
+        self._entries = {}
+        self._locks = defaultdict(Lock)
+        self._lock = Lock()
+
+    def _lock_of(self, path):
+        with self._lock:
+            return self._locks[path]
+
+    def _path(self, collection, db):
+        if db is None:
+            db = self.handler.db
+        name = db if isinstance(db, string_types) else getattr(db, "name", None)
+        return os.path.join(self.root, name or "_", collection)
+
+    def _entry(self, path):
+        try:
+            with open(os.path.join(path, MANIFEST)) as f:
+                generation = json.load(f)["generation"]
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+        entry = self._entries.get(path, None)
+        if entry is None or entry.generation != generation:
+            entry = CacheEntry.load(path)
+            if entry is not None:
+                self._entries[path] = entry
+        return entry
+
+    def read(self, collection, db=None, index='datetime', start=None, end=None, length=None, projection=None,
+             **kwargs):
+        """
+        参数与MongoHandler.read相同，只有collection为表名、按index读取的查询经过缓存。
+        """
+        if kwargs or index is None or not isinstance(collection, string_types):
+            return self.handler.read(collection, db, index, start, end, length, projection=projection, **kwargs)
+
+        fields = None if projection is None else sorted(set(projection) - {index})
+        start_key = _key(start, None)
+        end_key = _key(end, None)
+        path = self._path(collection, db)
+        with self._lock_of(path):
+            entry = self._entry(path)
+            if entry is not None and (entry.manifest["all_fields"] if fields is None
+                                      else set(fields).issubset(entry.fields)):
+                locator = locate(entry.ranges, entry.index, start_key, end_key, length)
+                if locator is not None:
+                    if locator.stop <= locator.start:
+                        # 与MongoHandler一致，没有数据时抛出KeyError
+                        raise KeyError(index)
+                    return entry.frame(locator, fields)
+                if end_key is None and not length:
+                    covered = locate_open(entry.ranges, entry.index, start_key)
+                    if covered is not None:
+                        result = self._read_after(entry, path, collection, db, index, covered, fields)
+                        if result is not None:
+                            return result
+
+            if entry is None or fields is None:
+                fetch = fields
+            elif entry.manifest["all_fields"]:
+                fetch = None
+            else:
+                # 同时读取已缓存的字段，合并后缓存的字段不变少
+                fetch = sorted(set(fields).union(entry.fields))
+            result = self.handler.read(collection, db, index, start, end, length,
+                                       projection=None if fetch is None else fetch + [index])
+            if not self._cacheable(result):
+                return result
+            result = result.sort_index()
+            ranges = [coverage(start_key, end_key, length, result.index.asi8)]
+            # 字段不同时旧的缓存作废
+            if entry is not None and set(result.columns) == set(entry.fields):
+                cached = entry.frame(slice(None))
+                cached = cached[~cached.index.isin(result.index)]
+                merged = pd.concat([cached, result.reindex(columns=cached.columns)]).sort_index()
+                ranges.extend(entry.ranges)
+            else:
+                merged = result
+            CacheEntry.save(path, merged, merge_ranges(ranges), fetch is None)
+            self._entries.pop(path, None)
+        return result if fields is None else result[[field for field in fields if field in result.columns]]
+
+    def _read_after(self, entry, path, collection, db, index, covered, fields):
+        """
+        已缓存的部分从缓存读取，只从数据库读取缓存覆盖范围之后的记录，有新记录时合并进缓存。
+
+        Returns:
+            pandas.DataFrame: 查询结果，数据库返回的字段与缓存不同时为None，改为按未缓存处理
+        """
+        locator, hi = covered
+        try:
+            result = self.handler.read(collection, db, index, pd.Timestamp(hi).to_pydatetime(),
+                                       projection=None if entry.manifest["all_fields"] else entry.fields + [index])
+        except KeyError:
+            # 数据库中没有更新的记录
+            result = None
+        if result is not None:
+            if not self._cacheable(result) or set(result.columns) != set(entry.fields):
+                return None
+            result = result.sort_index()
+            result = result[result.index.asi8 > hi]
+        if result is None or not len(result):
+            if locator.stop <= locator.start:
+                raise KeyError(index)
+            return entry.frame(locator, fields)
+
+        cached = entry.frame(slice(None))
+        result = result.reindex(columns=cached.columns)
+        ranges = entry.ranges + [coverage(hi, None, None, result.index.asi8)]
+        CacheEntry.save(path, pd.concat([cached, result]), merge_ranges(ranges), entry.manifest["all_fields"])
+        self._entries.pop(path, None)
+        result = pd.concat([entry.frame(locator), result])
+        return result if fields is None else result[fields]
+
+    @staticmethod
+    def _cacheable(frame):
+        if not isinstance(frame, pd.DataFrame) or not isinstance(frame.index, pd.DatetimeIndex):
+            return False
+        if frame.index.tz is not None or not frame.index.is_unique:
+            return False
+        return all(dtype.kind in "biuf" for dtype in frame.dtypes)
+
+    def invalidate(self, collection, db=None):
+        """
+        清除表的缓存。
+
+        Args:
+            collection(str): 表名
+            db(str): 数据库名
+
+        Returns:
+            None
+        """
+        path = self._path(collection, db)
+        with self._lock_of(path):
+            self._entries.pop(path, None)
+            if os.path.isdir(path):
+                for name in os.listdir(path):
+                    try:
+                        os.remove(os.path.join(path, name))
+                    except OSError:
+                        pass
+
+    def write(self, data, collection, db=None, index=None):
+        result = self.handler.write(data, collection, db, index)
+        self.invalidate(collection, db)
+        return result
+
+    def inplace(self, data, collection, db=None, index='datetime'):
+        result = self.handler.inplace(data, collection, db, index)
+        self.invalidate(collection, db)
+        return result
+
+    def update(self, data, collection, db=None, index='datetime', how='$set'):
+        result = self.handler.update(data, collection, db, index, how)
+        self.invalidate(collection, db)
+        return result
+
+    def delete(self, filter, collection, db=None):
+        result = self.handler.delete(filter, collection, db)
+        self.invalidate(collection, db)
+        return result
+
+    def table_names(self, *args, **kwargs):
+        return self.handler.table_names(*args, **kwargs)
@@ -1,38 +1,144 @@
 # encoding:utf-8
-from datetime import timedelta
+from datetime import time
+import numpy as np
 import pandas as pd
-
-
-class TimeEdge():
-    def __init__(self, edge):
-        self.edge = edge
-        self.start = None
-        self.end = None
-
-    def range(self, end):
-        self.end = end
-        self.start = self.edge(end)
-        return end
+from pandas.tseries.frequencies import to_offset
+
+
+DAY = 24 * 60 * 60 * 10 ** 9  # 一天的纳秒数
+A_SHARE_SESSIONS = (("09:30", "11:30"), ("13:00", "15:00"))
+
+
+def _clock(value):
+    """
+    "HH:MM"、"HH:MM:SS"或datetime.time转换为当天零点起的纳秒数
+    """
+    if isinstance(value, time):
+        parts = [value.hour, value.minute, value.second]
+    else:
+        parts = [int(part) for part in value.split(":")]
+    parts.extend([0] * (3 - len(parts)))
+    return ((parts[0] * 60 + parts[1]) * 60 + parts[2]) * 10 ** 9
+
+
+class SessionCalendar(object):
+    """
+    交易时段日历，由每个交易日的交易时段按时间顺序声明。
+    交易时段可以跨越零点(如期货夜盘("21:00", "02:30"))，此时交易日从第一个交易时段开始时算起。
+    时间都是int64纳秒，按交易时段分组只用numpy的向量运算。
+    """
+
+    def __init__(self, sessions=A_SHARE_SESSIONS, week_start=0):
+        """
+        Args:
+            sessions(list): [(开始时间, 结束时间)]，时间为"HH:MM"、"HH:MM:SS"或datetime.time
+            week_start(int): 每周开始的星期，0为星期一
+        """
+        self.sessions = tuple(sessions)
+        self.week_start = week_start
+        self.day_start = _clock(sessions[0][0])
+        opens, closes = [], []
+        last = -1
+        for start, end in sessions:
+            start = (_clock(start) - self.day_start) % DAY
+            end = (_clock(end) - self.day_start) % DAY or DAY
+            if not last <= start < end:
+                raise ValueError("sessions must be in time order within a day: %s" % (sessions,))
+            opens.append(start)
+            closes.append(end)
+            last = end
+        self.opens = np.array(opens, np.int64)
+        self.closes = np.array(closes, np.int64)
+
+    def session_bins(self, x, interval):
+        """
+        每个交易时段从开始时间起按interval分为左开右闭的区间，开始时间及之前(上一时段结束之后)的K线单独为一个区间，
+        最后一个时段结束之后的K线延续该时段的区间。
+
+        Args:
+            x(numpy.ndarray): int64纳秒时间
+            interval(int): 区间长度，纳秒
+
+        Returns:
+            numpy.ndarray: 每个时间所在区间的结束时间，int64纳秒
+        """
+        shifted = x - self.day_start
+        day = shifted // DAY
+        clock = shifted - day * DAY
+        session = np.minimum(self.closes.searchsorted(clock, "left"), len(self.closes) - 1)
+        opens = self.opens[session]
+        bins = np.where(clock > opens, (clock - opens - 1) // interval + 1, 0)
+        return day * DAY + self.day_start + opens + bins * interval
+
+    def week_bins(self, x):
+        """
+        按周分组，每周从week_start的零点开始(左闭右开)。
+
+        Args:
+            x(numpy.ndarray): int64纳秒时间
+
+        Returns:
+            numpy.ndarray: 每个时间所在周的开始时间，int64纳秒
+        """
+        day = x // DAY
+        # 1970-01-01是星期四
+        week = (day + 3 - self.week_start) // 7
+        return (week * 7 - 3 + self.week_start) * DAY
+
+
+class TimeEdge(object):
+    """
+    按交易时段日历分组的groupby分组函数，每根K线映射到其所在分组中最后一根K线的时间。
+
+    Attributes:
+        calendar(SessionCalendar): 交易时段日历
+        frequency(str): 'W'按周分组，其他为交易时段内的区间长度，如'H'、'30min'
+    """
+
+    def __init__(self, calendar=None, frequency="H"):
+        self.calendar = calendar if calendar is not None else SessionCalendar()
+        self.frequency = frequency
+        self.interval = None if frequency == "W" else to_offset(frequency).nanos
+
+    def keys(self, x):
+        """
+        Args:
+            x(numpy.ndarray): int64纳秒时间
+
+        Returns:
+            numpy.ndarray: 每个时间所在分组的标识，int64
+        """
+        if self.interval is None:
+            return self.calendar.week_bins(x)
+        return self.calendar.session_bins(x, self.interval)
 
     def __call__(self, x):
-        self.range(x[-1])
-        return pd.DatetimeIndex(
-            reversed(map(self.scheduler, reversed(x)))
-        )
-
-    def scheduler(self, t):
-        if t < self.end and (t > self.start):
-            return self.end
-        else:
-            return self.range(t)
+        if not hasattr(x, "__len__"):
+            # groupby逐个传入时间时无法分组
+            raise TypeError("TimeEdge groups a whole DatetimeIndex")
+        x = pd.DatetimeIndex(x)
+        values = x.asi8
+        if not len(values):
+            return x
+        keys = self.keys(values)
+        ends = np.append(np.flatnonzero(keys[1:] != keys[:-1]), len(keys) - 1)
+        counts = np.diff(np.concatenate([[-1], ends]))
+        return pd.DatetimeIndex(np.repeat(values[ends], counts).view("M8[ns]"), name=x.name)
+
+
+def groupers(calendar):
+    """
+    Args:
+        calendar(SessionCalendar): 交易时段日历
+
+    Returns:
+        dict: 周期: TimeEdge，用于按交易时段重采样的周期
+    """
+    return {'W': TimeEdge(calendar, 'W'), 'H': TimeEdge(calendar, 'H')}
 
 
 MIN1FACTOR = {'min': 1, 'H': 60, 'D': 240, 'W': 240*5, 'M': 240*5*31}
-STOCK_GROUPER = {
-    'W': TimeEdge(lambda x: x.replace(hour=0, minute=0)-timedelta(days=x.weekday())),
-    'H': TimeEdge(lambda x: x.replace(minute=30, hour=x.hour if x.minute > 30 else x.hour-1) if x.hour < 12
-                  else x.replace(minute=0, hour=x.hour if x.minute != 0 else x.hour-1))
-    }
+STOCK_GROUPER = groupers(SessionCalendar(A_SHARE_SESSIONS))
 
 RESAMPLE_MAP = {'high': 'max',
                 'low': 'min',
@@ -80,5 +186,5 @@ if __name__ == '__main__':
     candle = mh.read('000001.1min', end=datetime(2016, 2, 1))
     rsl = Resampler()
 
-    print rsl.resample(candle, 'H').iloc[30: 20]
+    print(rsl.resample(candle, 'H').iloc[30: 20])
 
@@ -0,0 +1,492 @@
+# encoding:utf-8
+import numpy as np
+import pandas as pd
+
+__all__ = ["SymbolBars", "BarStore", "ResampledBars", "RollingWindow", "to_ns", "union_times"]
+
+try:
+    string_types = (str, unicode)
+except NameError:
+    string_types = (str,)
+
+
+CURSOR_STEPS = 8  # locate向后移动的最大步数，超过后改为二分查找
+
+
+def _frozen(array):
+    array.flags.writeable = False
+    return array
+
+
+def to_ns(timestamp):
+    """
+    将时间转换为自epoch起的纳秒数，与BarStore中时间索引的单位一致。
+
+    Args:
+        timestamp(datetime | pandas.Timestamp | str): 时间
+
+    Returns:
+        int
+    """
+    value = getattr(timestamp, "value", None)
+    if value is None:
+        value = pd.Timestamp(timestamp).value
+    return value
+
+
+def union_times(indexes):
+    """
+    多个升序int64时间索引的并集。各索引本身已排序，拼接后以mergesort排序即为归并，再去掉重复的时间。
+
+    Args:
+        indexes(list): [numpy.ndarray]
+
+    Returns:
+        numpy.ndarray: 升序不重复的int64时间
+    """
+    indexes = [index for index in indexes if len(index)]
+    if not indexes:
+        return np.empty(0, np.int64)
+    merged = np.sort(np.concatenate(indexes), kind="mergesort")
+    keep = np.empty(len(merged), bool)
+    keep[0] = True
+    np.not_equal(merged[1:], merged[:-1], out=keep[1:])
+    return merged[keep]
+
+
+class SymbolBars(object):
+    """
+    单个品种的K线，按字段存放为连续的只读numpy数组，时间索引为int64纳秒。
+    按位置取出的是数组的视图，只有在需要pandas对象时才构造Series或DataFrame。
+    locate保存上次查找的位置，时间单调前进时(如回测中)从该位置向后移动，不必二分查找。
+
+    Attributes:
+        index(numpy.ndarray): int64时间索引，升序
+        columns(dict): 字段名: numpy.ndarray
+        fields(list): 字段名，与原DataFrame的列顺序一致
+        index_name(str): 时间索引的名字
+    """
+
+    def __init__(self, index, columns, fields, index_name=None):
+        self.index = index
+        self.columns = columns
+        self.fields = fields
+        self.index_name = index_name
+        self._times = None
+        self._cursor = -1
+        self._cursor_key = None
+
+    @classmethod
+    def from_frame(cls, frame):
+        """
+        Args:
+            frame(pandas.DataFrame): 以DatetimeIndex为索引的K线
+
+        Returns:
+            SymbolBars
+        """
+        index = _frozen(np.array(pd.DatetimeIndex(frame.index).asi8, dtype=np.int64))
+        fields = list(frame.columns)
+        columns = {field: _frozen(np.array(frame[field].values)) for field in fields}
+        return cls(index, columns, fields, frame.index.name)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def times(self):
+        """
+        pandas.DatetimeIndex: 时间索引，首次访问时构造并缓存
+        """
+        if self._times is None:
+            self._times = pd.DatetimeIndex(self.index.view("M8[ns]"), name=self.index_name)
+        return self._times
+
+    def append(self, frame):
+        """
+        在末尾追加时间晚于已有K线的数据。
+
+        Args:
+            frame(pandas.DataFrame): 新的K线
+
+        Returns:
+            None
+        """
+        other = self.from_frame(frame)
+        self.index = _frozen(np.concatenate([self.index, other.index]))
+        for field in self.fields:
+            if field in other.columns:
+                column = other.columns[field]
+            else:
+                column = np.empty(len(other))
+                column.fill(np.nan)
+            self.columns[field] = _frozen(np.concatenate([self.columns[field], column]))
+        self._times = None
+
+    def locate(self, key):
+        """
+        最后一根时间不晚于key的K线的位置。
+
+        Args:
+            key(int): to_ns转换后的时间
+
+        Returns:
+            int: 位置，key早于所有K线时为-1
+        """
+        index = self.index
+        if self._cursor_key is not None and key >= self._cursor_key:
+            i = self._cursor
+            last = len(index) - 1
+            steps = CURSOR_STEPS
+            while i < last and index[i + 1] <= key:
+                i += 1
+                steps -= 1
+                if not steps:
+                    # 时间跳过了很多根K线
+                    i = index.searchsorted(key, "right") - 1
+                    break
+        else:
+            i = index.searchsorted(key, "right") - 1
+        self._cursor = i
+        self._cursor_key = key
+        return i
+
+    def contains(self, key):
+        """
+        与locate共用游标，时间单调前进时同样不必二分查找。
+
+        Args:
+            key(int): to_ns转换后的时间
+
+        Returns:
+            bool: 是否有该时间的K线
+        """
+        i = self.locate(key)
+        return i >= 0 and self.index[i] == key
+
+    def values(self, locator, fields):
+        """
+        按位置取出数组视图，不构造pandas对象。
+
+        Args:
+            locator(int | slice): 位置
+            fields(str | list): 字段
+
+        Returns:
+            单个字段时为标量或numpy.ndarray，多个字段时为{字段: 标量或numpy.ndarray}
+        """
+        if isinstance(fields, string_types):
+            return self.columns[fields][locator]
+        columns = self.columns
+        return {field: columns[field][locator] for field in fields}
+
+    def get(self, locator, fields):
+        """
+        按位置取出pandas对象，结果与DataFrame.iloc[locator][fields]相同。
+
+        Args:
+            locator(int | slice): 位置
+            fields(str | list): 字段
+
+        Returns:
+            标量、pandas.Series或pandas.DataFrame
+        """
+        columns = self.columns
+        if isinstance(locator, slice):
+            index = pd.DatetimeIndex(self.index[locator].view("M8[ns]"), name=self.index_name)
+            if isinstance(fields, string_types):
+                return pd.Series(columns[fields][locator], index=index, name=fields, copy=True)
+            return pd.DataFrame({field: columns[field][locator] for field in fields}, index=index,
+                                columns=fields)
+        if isinstance(fields, string_types):
+            return columns[fields][locator]
+        return pd.Series([columns[field][locator] for field in fields], index=fields,
+                         name=pd.Timestamp(self.index[locator]))
+
+
+def _reduce(values, starts, ends, how):
+    """
+    按位置分组聚合，每组为[starts[i], ends[i])，组连续且覆盖到values末尾。
+    与DataFrame.groupby的聚合一致忽略NaN：first和last取组内第一个和最后一个非NaN值，
+    全为NaN的组为NaN。
+    """
+    if how == "first" or how == "last":
+        if values.dtype.kind != "f":
+            return values[starts] if how == "first" else values[ends - 1]
+        valid = np.flatnonzero(~np.isnan(values))
+        result = np.full(len(starts), np.nan, values.dtype)
+        if not len(valid):
+            return result
+        if how == "first":
+            i = valid.searchsorted(starts, "left")
+            position = valid[np.minimum(i, len(valid) - 1)]
+            found = (i < len(valid)) & (position < ends)
+        else:
+            i = valid.searchsorted(ends, "left") - 1
+            position = valid[np.maximum(i, 0)]
+            found = (i >= 0) & (position >= starts)
+        result[found] = values[position[found]]
+        return result
+    elif how == "max":
+        return np.fmax.reduceat(values, starts)
+    elif how == "min":
+        return np.fmin.reduceat(values, starts)
+    elif how == "sum":
+        if values.dtype.kind == "f":
+            values = np.where(np.isnan(values), 0, values)
+        return np.add.reduceat(values, starts)
+    raise ValueError("unsupported aggregation: %s" % how)
+
+
+class ResampledBars(object):
+    """
+    由SymbolBars重采样得到的高周期K线，基础K线追加后增量更新。
+    保存每根高周期K线第一根基础K线的位置和完整的聚合值，查询时已完成的K线直接取出，
+    当前未完成的K线只聚合从其开始到当前位置的基础K线，不必每次重新分组。
+
+    Attributes:
+        starts(numpy.ndarray): 每根高周期K线第一根基础K线的位置
+        labels(numpy.ndarray): 每根高周期K线的int64时间索引
+        columns(dict): 字段名: 每根高周期K线的聚合值
+    """
+
+    def __init__(self, bars, keys, how, label_last=False):
+        """
+        Args:
+            bars(SymbolBars): 基础K线
+            keys(function): pandas.DatetimeIndex -> pandas.DatetimeIndex，
+                每根基础K线所属高周期K线的标识，单调不减，同一根高周期K线相同
+            how(dict): 字段: 聚合方式，'first'、'last'、'max'、'min'或'sum'
+            label_last(bool): True时以高周期K线中最后一根基础K线的时间为时间索引，否则以keys为时间索引
+        """
+        self.bars = bars
+        self.keys = keys
+        self.how = how
+        self.label_last = label_last
+        self.starts = np.empty(0, np.int64)
+        self.labels = np.empty(0, np.int64)
+        self.columns = {field: np.empty(0, bars.columns[field].dtype) for field in how if field in bars.columns}
+        self._size = 0
+        self.update()
+
+    def update(self):
+        """
+        重采样基础K线中新追加的部分。最后一根高周期K线可能还未完成，从它开始重新计算。
+
+        Returns:
+            None
+        """
+        bars = self.bars
+        total = len(bars)
+        if total == self._size:
+            return
+        keep = max(len(self.starts) - 1, 0)
+        offset = int(self.starts[-1]) if len(self.starts) else 0
+        keys = np.asarray(self.keys(pd.DatetimeIndex(bars.index[offset:].view("M8[ns]"))).asi8)
+        starts = np.concatenate([[0], np.flatnonzero(keys[1:] != keys[:-1]) + 1]).astype(np.int64)
+        ends = np.append(starts[1:], len(keys))
+        labels = bars.index[offset + ends - 1] if self.label_last else keys[starts]
+        starts += offset
+        self.starts = np.concatenate([self.starts[:keep], starts])
+        self.labels = np.concatenate([self.labels[:keep], labels])
+        for field, column in self.columns.items():
+            self.columns[field] = np.concatenate(
+                [column[:keep], _reduce(bars.columns[field], starts, ends + offset, self.how[field])]
+            )
+        self._size = total
+
+    def __len__(self):
+        return len(self.starts)
+
+    def get(self, last, length, fields):
+        """
+        截至基础K线last的高周期K线，最后一根只聚合到last。
+
+        Args:
+            last(int): 当前基础K线的位置
+            length(int): K线数，None表示全部
+            fields(str | list): 字段
+
+        Returns:
+            pandas.Series(单个字段)或pandas.DataFrame
+        """
+        self.update()
+        b = self.starts.searchsorted(last, "right") - 1
+        lo = 0 if length is None else max(b - length + 1, 0)
+        first = self.starts[b] if b >= 0 else 0
+        labels = self.labels[lo:b + 1].copy()
+        if b >= 0 and self.label_last:
+            labels[-1] = self.bars.index[last]
+        index = pd.DatetimeIndex(labels.view("M8[ns]"), name=self.bars.index_name)
+
+        def column(field):
+            result = self.columns[field][lo:b + 1].copy()
+            if b >= 0:
+                values = self.bars.columns[field][first:last + 1]
+                result[-1] = _reduce(values, np.zeros(1, np.int64), np.array([len(values)]), self.how[field])[0]
+            return result
+
+        if isinstance(fields, string_types):
+            return pd.Series(column(fields), index=index, name=fields)
+        return pd.DataFrame({field: column(field) for field in fields}, index=index, columns=fields)
+
+
+class RollingWindow(object):
+    """
+    最近length根K线的滚动窗口，每个字段一个长度为2*length的numpy环形缓冲区。
+    每根K线同时写入位置i和i+length，最近的K线总是连续存放，取出的是只读视图，不复制。
+    视图在写入下一根K线前有效，需要保留时copy。
+
+    Attributes:
+        length(int): 窗口长度
+        fields(list): 字段
+        position(int): 最后写入的K线在SymbolBars中的位置，未写入时为-1
+    """
+
+    def __init__(self, length, fields, dtypes):
+        """
+        Args:
+            length(int): 窗口长度
+            fields(list): 字段
+            dtypes(dict): 字段: numpy.dtype
+        """
+        self.length = length
+        self.fields = list(fields)
+        self.position = -1
+        self._buffers = {field: np.empty(2 * length, dtypes[field]) for field in fields}
+        self._index = np.empty(2 * length, np.int64)
+        self._head = 0  # 下一根K线写入的位置
+        self._count = 0
+        self._frame = None
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        self.position = -1
+        self._head = 0
+        self._count = 0
+        self._frame = None
+
+    def write(self, index, columns):
+        """
+        依次写入若干根K线，超过length根时只保留最后length根。
+
+        Args:
+            index(numpy.ndarray): int64时间
+            columns(dict): 字段: numpy.ndarray，与index等长
+
+        Returns:
+            None
+        """
+        n = len(index)
+        if not n:
+            return
+        length = self.length
+        skip = max(n - length, 0)
+        slots = (self._head + skip + np.arange(n - skip)) % length
+        mirror = slots + length
+        for array, values in [(self._index, index)] + [(self._buffers[field], columns[field])
+                                                          for field in self.fields]:
+            values = values[skip:]
+            array[slots] = values
+            array[mirror] = values
+        self._head = (self._head + n) % length
+        self._count = min(self._count + n, length)
+        self._frame = None
+
+    def _window(self, array):
+        end = self._head + self.length
+        view = array[end - self._count:end]
+        view.flags.writeable = False
+        return view
+
+    def values(self, fields=None):
+        """
+        Args:
+            fields(str | list): 字段，默认为全部
+
+        Returns:
+            单个字段时为numpy.ndarray(只读视图)，多个字段时为{字段: numpy.ndarray}
+        """
+        if fields is None:
+            fields = self.fields
+        if isinstance(fields, string_types):
+            return self._window(self._buffers[fields])
+        return {field: self._window(self._buffers[field]) for field in fields}
+
+    @property
+    def index(self):
+        """
+        numpy.ndarray: 窗口中K线的int64时间，只读视图
+        """
+        return self._window(self._index)
+
+    def frame(self):
+        """
+        窗口的DataFrame，首次调用时构造，写入新的K线前重复调用返回同一个对象。
+
+        Returns:
+            pandas.DataFrame
+        """
+        if self._frame is None:
+            index = pd.DatetimeIndex(self.index.view("M8[ns]"))
+            self._frame = pd.DataFrame({field: self._window(self._buffers[field]) for field in self.fields},
+                                       index=index, columns=self.fields)
+        return self._frame
+
+
+class BarStore(object):
+    """
+    按品种存放SymbolBars。
+    """
+
+    def __init__(self):
+        self._bars = {}
+
+    def __contains__(self, symbol):
+        return symbol in self._bars
+
+    def __getitem__(self, symbol):
+        return self._bars[symbol]
+
+    def __len__(self):
+        return len(self._bars)
+
+    def symbols(self):
+        return list(self._bars.keys())
+
+    def items(self):
+        return self._bars.items()
+
+    def times(self):
+        """
+        Returns:
+            pandas.DatetimeIndex: 所有品种K线时间的并集，已排序
+        """
+        return pd.DatetimeIndex(union_times([bars.index for bars in self._bars.values()]).view("M8[ns]"))
+
+    def add(self, symbol, frame):
+        """
+        Args:
+            symbol(str): 品种
+            frame(pandas.DataFrame): 以DatetimeIndex为索引的K线
+
+        Returns:
+            SymbolBars
+        """
+        bars = self._bars[symbol] = SymbolBars.from_frame(frame)
+        return bars
+
+    def append(self, symbol, frame):
+        """
+        在品种已有K线末尾追加，品种不存在时新建。
+
+        Returns:
+            SymbolBars
+        """
+        bars = self._bars.get(symbol, None)
+        if bars is None:
+            return self.add(symbol, frame)
+        bars.append(frame)
+        return bars
@@ -1 +1,12 @@
 from ._engine import Engine
+from ._backtest import BacktestEngine
+from .wait import BusySpinWait, YieldingWait, BlockingWait
+from .profiler import DispatchProfiler
+from .journal import JournalWriter
+from .ring import SharedRing
+
+try:
+    from ._async import AsyncEngine
+except ImportError:
+    # asyncio is not available on python 2
+    pass
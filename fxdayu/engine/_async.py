@@ -0,0 +1,221 @@
+# encoding:utf-8
+
+import asyncio
+import logging
+import threading
+from functools import partial
+from heapq import heappush, heappop
+from timeit import default_timer
+
+from fxdayu.engine._engine import Engine
+from fxdayu.engine.stream import StreamEnd
+from fxdayu.event import EVENTS
+
+__all__ = ["AsyncEngine"]
+
+
+def is_awaitable(result):
+    return asyncio.iscoroutine(result) or isinstance(result, asyncio.Future)
+
+
+class AsyncEngine(Engine):
+    """
+    在asyncio事件循环中运行的事件驱动引擎，注册和put接口与 :class:`Engine` 相同，
+    工作流仍由StreamManager管理。
+
+    事件处理函数既可以是普通函数，也可以是协程函数：处理函数返回协程或Future时，
+    引擎等待其完成后再调用工作流中的下一个处理函数，期间不处理其他事件，
+    因此事件之间的处理顺序与多线程引擎相同；等待期间事件循环可以继续运行网关的IO任务。
+
+    交易网关可以通过spawn将协程作为任务运行在引擎的事件循环中，
+    通过run_blocking将阻塞的IO调用交给共享的线程池，而不必各自启动线程。
+    put是线程安全的，在其他线程中调用时通过call_soon_threadsafe转入事件循环线程。
+
+    Attributes:
+        BATCH(int): 每次调度最多连续处理的事件数，处理完一批后让出事件循环给IO回调
+        loop(asyncio.AbstractEventLoop): 引擎运行的事件循环
+    """
+
+    BATCH = 256
+
+    def __init__(self, manager=None, loop=None, executor=None):
+        """
+        Args:
+            manager(type): 工作流管理器类型
+            loop(asyncio.AbstractEventLoop): 运行引擎的事件循环，默认新建一个
+            executor(concurrent.futures.Executor): run_blocking使用的线程池，默认为事件循环的默认线程池
+        """
+        super(AsyncEngine, self).__init__(queue=list, manager=manager)
+        self._loop = loop if loop is not None else asyncio.new_event_loop()
+        self._executor = executor
+        self._loop_thread = None
+        self._scheduled = False
+        self._awaiting = False
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def queue_depth(self):
+        return len(self.event_queue)
+
+    def run(self):
+        """
+        在调用者线程中运行事件循环直到引擎停止。
+
+        Returns:
+            None
+        """
+        with self._context:
+            asyncio.set_event_loop(self._loop)
+            self._loop_thread = threading.current_thread().ident
+            self._is_running = True
+            self._schedule()
+            try:
+                self._loop.run_forever()
+            finally:
+                self._is_running = False
+                self._loop_thread = None
+
+    def _stop(self, event, kwargs):
+        self._is_running = False
+        self._loop.stop()
+
+    def stop(self):
+        """
+        停止事件循环，结束事件驱动引擎的运行。若事件引擎已停止，直接返回。
+
+        Returns:
+            None
+        """
+        if not self._is_running:
+            return
+        self._loop.call_soon_threadsafe(self._stop, None, None)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+            self._thread = None
+
+    def put(self, event):
+        if self._profiler is not None:
+            self._profiler.on_put(event)
+        if self._loop_thread is None or self._loop_thread == threading.current_thread().ident:
+            self._push(event)
+        else:
+            self._loop.call_soon_threadsafe(self._push, event)
+
+    def _push(self, event):
+        heappush(self.event_queue, (event.key, event))
+        self._schedule()
+
+    def _schedule(self):
+        if self._is_running and not self._scheduled and not self._awaiting:
+            self._scheduled = True
+            self._loop.call_soon(self._drain)
+
+    def _drain(self):
+        """
+        处理队列中的事件，每次最多处理BATCH个，遇到需要等待的处理函数时暂停。
+
+        Returns:
+            None
+        """
+        self._scheduled = False
+        queue = self.event_queue
+        get_iter = self._stream_manager.get_iter
+        count = 0
+        while queue and self._is_running and not self._awaiting:
+            if count == self.BATCH:
+                self._schedule()
+                return
+            count += 1
+            event = queue[0][1]
+            if self._timers is not None and event.type == EVENTS.TIME and self._fire_timers(event.time):
+                # 定时器放入的事件(如撤单)可能排在该TimeEvent之前，重新选择下一个事件
+                continue
+            heappop(queue)
+            if self._journal is not None:
+                self._journal.write(event)
+            if self._profiler is not None:
+                self._profiler.dequeue(event, len(queue))
+            self._dispatch(event, iter(get_iter(event.type, event.topic)), {})
+
+    def _dispatch(self, event, handlers, kwargs):
+        """
+        依次调用工作流中的处理函数，处理函数返回可等待对象时注册回调并返回，
+        在其完成后由_resume继续调用剩余的处理函数。
+
+        Returns:
+            None
+        """
+        handle = None
+        profiler = self._profiler
+        try:
+            for handle in handlers:
+                if profiler is None:
+                    result = handle(event, kwargs)
+                else:
+                    st = default_timer()
+                    result = None
+                    try:
+                        result = handle(event, kwargs)
+                    finally:
+                        # 出错时同样记录，返回可等待对象时在其完成后由_resume记录
+                        if result is None or not is_awaitable(result):
+                            profiler.record(event.type, event.topic, handle, default_timer() - st)
+                if result is not None and is_awaitable(result):
+                    future = asyncio.ensure_future(result, loop=self._loop)
+                    self._awaiting = True
+                    future.add_done_callback(
+                        partial(self._resume, event, handlers, kwargs, handle,
+                                None if profiler is None else st)
+                    )
+                    return
+        except StreamEnd:
+            pass
+        except Exception as e:
+            if handle:
+                logging.error("error occurs when in handler: %s" % handle)
+            logging.exception(e)
+
+    def _resume(self, event, handlers, kwargs, handle, st, future):
+        self._awaiting = False
+        if st is not None and self._profiler is not None:
+            self._profiler.record(event.type, event.topic, handle, default_timer() - st)
+        if future.cancelled():
+            logging.error("handler cancelled: %s" % handle)
+        else:
+            e = future.exception()
+            if e is None:
+                self._dispatch(event, handlers, kwargs)
+            elif not isinstance(e, StreamEnd):
+                logging.error("error occurs when in handler: %s" % handle)
+                logging.error(e, exc_info=(type(e), e, e.__traceback__))
+        self._schedule()
+
+    def spawn(self, coro):
+        """
+        将协程作为任务运行在引擎的事件循环中，可在任意线程中调用。
+
+        Args:
+            coro: 协程对象
+
+        Returns:
+            concurrent.futures.Future | asyncio.Future: 任务结果
+        """
+        if self._loop_thread is None or self._loop_thread == threading.current_thread().ident:
+            return asyncio.ensure_future(coro, loop=self._loop)
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def run_blocking(self, func, *args):
+        """
+        在线程池中运行阻塞的函数(如REST请求)，返回可在协程处理函数中等待的Future。
+        需在事件循环线程中调用。
+
+        Args:
+            func(function): 阻塞的函数
+            *args: 函数参数
+
+        Returns:
+            asyncio.Future: 函数返回值
+        """
+        return self._loop.run_in_executor(self._executor, func, *args)
@@ -0,0 +1,198 @@
+# encoding:utf-8
+
+import logging
+from heapq import heappush, heappop, merge
+
+from fxdayu.engine._engine import Engine
+from fxdayu.engine.stream import StreamEnd
+from fxdayu.event import EVENTS, time_key
+
+__all__ = ["BacktestEngine"]
+
+
+class BacktestEngine(Engine):
+    """
+    回测用的同步事件驱动引擎，注册和put接口与 :class:`Engine` 相同。
+    引擎在调用start的线程中直接运行，事件队列为不加锁的堆(heapq)，
+    堆中元素为(event.key, event)，比较时直接比较整数排序键。
+    通过add_clock添加的时钟事件不放入堆中，运行时每次惰性地取出下一个时钟事件
+    与堆顶事件比较，因此堆的大小只取决于处理中的订单、成交等事件。
+    队列和时钟都为空或收到EVENTS.EXIT事件时结束运行。
+    run_until和step可以在中途暂停，追加时钟后继续运行，用于增量回测。
+
+    该引擎不是线程安全的，不能在其他线程中调用put。
+    """
+
+    def __init__(self, manager=None):
+        super(BacktestEngine, self).__init__(queue=list, manager=manager)
+        self._clock = None
+        self._clock_head = None
+
+    def run(self):
+        """
+        事件驱动引擎的工作逻辑，在调用者线程中运行直到事件队列和时钟都为空或收到退出事件。
+
+        Returns:
+            None
+        """
+        self._run()
+
+    def run_until(self, timestamp):
+        """
+        运行到第一个时间晚于timestamp的时钟事件前暂停，排在它之前的事件(如订单、成交)都会被处理。
+        暂停后可以检查策略和账户状态、通过add_clock追加新的时钟(如新加入的行情)，
+        再次调用run_until、step或start从暂停处继续运行，不必从头回测。
+        回测时钟末尾的ExitEvent时间为其创建时的当前时间，run_until会暂停在它之前。
+
+        Args:
+            timestamp(datetime): 暂停的时间
+
+        Returns:
+            int: 处理的事件数
+        """
+        return self._run(until=time_key(timestamp))
+
+    def step(self, n=1):
+        """
+        处理接下来的n个事件后暂停，参见run_until。
+
+        Args:
+            n(int): 处理的事件数
+
+        Returns:
+            int: 实际处理的事件数，队列和时钟为空或收到退出事件时可能少于n
+        """
+        return self._run(count=n)
+
+    @property
+    def next_event(self):
+        """
+        下一个将要处理的事件，队列和时钟都为空时为None。
+        """
+        head = self._clock_head
+        if head is None and self._clock is not None:
+            head = self._clock_head = next(self._clock, None)
+            if head is None:
+                self._clock = None
+        queue = self.event_queue
+        if queue and (head is None or queue[0][0] < head[0]):
+            return queue[0][1]
+        return head[1] if head is not None else None
+
+    def _run(self, until=None, count=None):
+        """
+        Args:
+            until(int): 在时间(time_key)晚于until的时钟事件前暂停，None表示不限
+            count(int): 最多处理的事件数，None表示不限
+
+        Returns:
+            int: 处理的事件数
+        """
+        processed = 0
+        with self._context:
+            self._is_running = True
+            handle = None
+            queue = self.event_queue
+            get_iter = self._stream_manager.get_iter
+            while self._is_running:
+                if count is not None and processed >= count:
+                    break
+                head = self._clock_head
+                if head is None and self._clock is not None:
+                    head = self._clock_head = next(self._clock, None)
+                    if head is None:
+                        self._clock = None
+                if queue and (head is None or queue[0][0] < head[0]):
+                    event = queue[0][1]
+                    queued = True
+                elif head is not None:
+                    event = head[1]
+                    if until is not None and time_key(event.time) > until:
+                        break
+                    queued = False
+                else:
+                    break
+                if self._timers is not None and event.type == EVENTS.TIME and self._fire_timers(event.time):
+                    # 定时器放入的事件(如撤单)可能排在该TimeEvent之前，重新选择下一个事件
+                    continue
+                if queued:
+                    heappop(queue)
+                else:
+                    self._clock_head = None
+                processed += 1
+                if self._journal is not None:
+                    self._journal.write(event)
+                try:
+                    kwargs = {}
+                    handle = None
+                    if self._profiler is None:
+                        for handle in get_iter(event.type, event.topic):
+                            handle(event, kwargs)
+                    else:
+                        self._profiler.dispatch(event, get_iter(event.type, event.topic), len(queue), kwargs)
+                except StreamEnd:
+                    pass
+                except Exception as e:
+                    # 开启性能统计时由DispatchProfiler.dispatch调用处理函数，出错的处理函数记录在异常上
+                    handle = getattr(e, "handler", handle)
+                    if handle:
+                        logging.error("error occurs when in handler: %s" % handle)
+                    logging.exception(e)
+            self._is_running = False
+        return processed
+
+    def start(self):
+        """
+        在当前线程中启动事件驱动引擎，运行结束后返回。若事件引擎已启动，直接返回。
+
+        Returns:
+            None
+        """
+        if self._is_running:
+            return
+        self.run()
+
+    def join(self):
+        """
+        引擎在调用者线程中运行，start返回时已运行结束，无需等待。
+
+        Returns:
+            None
+        """
+        pass
+
+    def stop(self):
+        """
+        停止事件驱动引擎的运行，引擎在处理完当前事件后返回。
+
+        Returns:
+            None
+        """
+        self._is_running = False
+
+    def put(self, event):
+        if self._profiler is not None:
+            self._profiler.on_put(event)
+        heappush(self.event_queue, (event.key, event))
+
+    def queue_depth(self):
+        return len(self.event_queue)
+
+    def add_clock(self, clock):
+        """
+        添加时钟事件源，运行时惰性地从中取出事件并与事件队列合并。
+        可多次调用，多个时钟按事件顺序合并。
+
+        Args:
+            clock(iterable): 按顺序排列的事件迭代器
+
+        Returns:
+            None
+        """
+        clock = ((event.key, event) for event in clock)
+        if self._clock_head is not None:
+            clock = merge([self._clock_head], clock)
+            self._clock_head = None
+        if self._clock is not None:
+            clock = merge(self._clock, clock)
+        self._clock = clock
@@ -7,7 +7,11 @@ try:
     from Queue import Empty, PriorityQueue
 except ImportError:
     from queue import Empty, PriorityQueue
+from fxdayu.engine.journal import JournalWriter
+from fxdayu.engine.profiler import DispatchProfiler
 from fxdayu.engine.stream import StreamManager, StreamEnd
+from fxdayu.engine.wait import BlockingWait
+from fxdayu.engine.wheel import TimerWheel
 from fxdayu.event import EVENTS
 
 __all__ = ["Engine"]
@@ -22,16 +26,28 @@ class Engine(object):
         queue(type): 事件队列类型，推荐使用优先级队列PriorityQueue。
         is_running(bool): 引擎是否在运行的标记。
         _stream_manager(StreamManager): 工作流管理器对象。
+        _wait(fxdayu.engine.wait.WaitStrategy): 等待事件的策略，默认为阻塞等待BlockingWait，
+            空闲时不占用CPU。
+        _profiler(fxdayu.engine.profiler.DispatchProfiler): 事件分发性能统计，默认不开启。
+        _journal(fxdayu.engine.journal.JournalWriter): 事件日志，默认不开启。
+        _timers(fxdayu.engine.wheel.TimerWheel): 定时器，第一次调用call_at时创建，
+            由引擎在分发EVENTS.TIME事件之前推动。
         _thread(Thread): 工作线程
     """
 
-    def __init__(self, queue=None, manager=None):
+    def __init__(self, queue=None, manager=None, wait=None):
         if queue is None:
             queue = PriorityQueue
         if manager is None:
             manager = StreamManager
+        if wait is None:
+            wait = BlockingWait()
         self.event_queue = queue()
         self._stream_manager = manager()
+        self._wait = wait
+        self._profiler = None
+        self._journal = None
+        self._timers = None
         self._is_running = False
         self._thread = None
         self._context = None
@@ -41,6 +57,54 @@ class Engine(object):
     def is_running(self):
         return self._is_running
 
+    @property
+    def profiler(self):
+        return self._profiler
+
+    def enable_profiler(self):
+        """
+        开启事件分发性能统计，记录每个事件处理函数的调用次数、总耗时和最大耗时，
+        以及事件出队时的队列深度和事件在队列中的等待时间。
+
+        Returns:
+            fxdayu.engine.profiler.DispatchProfiler: 性能统计对象
+        """
+        if self._profiler is None:
+            self._profiler = DispatchProfiler()
+        return self._profiler
+
+    def disable_profiler(self):
+        self._profiler = None
+
+    @property
+    def journal(self):
+        return self._journal
+
+    def enable_journal(self, path, encode=None):
+        """
+        开启事件日志，之后引擎处理的每个事件在分发给处理函数之前追加写入path，
+        日志中事件的顺序即处理顺序，记录的是处理时的内容(包括被ConflatingIngress合并后的数据)。
+
+        Args:
+            path(str): 日志文件路径
+            encode(function): 事件序列化函数，None时使用pickle，
+                如 :func:`fxdayu.engine.codec.encode` ，读取时须使用对应的反序列化函数
+
+        Returns:
+            fxdayu.engine.journal.JournalWriter: 事件日志
+        """
+        if self._journal is None:
+            self._journal = JournalWriter(path) if encode is None else JournalWriter(path, encode)
+        return self._journal
+
+    def disable_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def queue_depth(self):
+        return self.event_queue.qsize()
+
     def run(self):
         """
         事件驱动引擎的工作逻辑，一般运行在单独的线程中。
@@ -51,17 +115,31 @@ class Engine(object):
         with self._context:
             self._is_running = True
             handle = None
+            get = self._wait.get
+            get_iter = self._stream_manager.get_iter
             while self._is_running:
                 try:
-                    event = self.event_queue.get(timeout=0)
+                    event = get(self.event_queue)
+                    if self._timers is not None and event.type == EVENTS.TIME and self._fire_timers(event.time):
+                        # 定时器放入的事件(如撤单)可能排在该TimeEvent之前，放回队列重新取出
+                        self.event_queue.put(event)
+                        continue
+                    if self._journal is not None:
+                        self._journal.write(event)
                     kwargs = {}
-                    for handle in self._stream_manager.get_iter(event.type, event.topic):
-                        handle(event, kwargs)
+                    handle = None
+                    if self._profiler is None:
+                        for handle in get_iter(event.type, event.topic):
+                            handle(event, kwargs)
+                    else:
+                        self._profiler.dispatch(event, get_iter(event.type, event.topic), self.queue_depth(), kwargs)
                 except StreamEnd:
                     pass
                 except Empty:
                     pass
                 except Exception as e:
+                    # 开启性能统计时由DispatchProfiler.dispatch调用处理函数，出错的处理函数记录在异常上
+                    handle = getattr(e, "handler", handle)
                     if handle:
                         logging.error("error occurs when in handler: %s" % handle)
                     logging.exception(e)
@@ -110,13 +188,85 @@ class Engine(object):
         if not self._is_running:
             return
         self._is_running = False
+        self._wait.wake(self.event_queue)
         if self._thread:
             self._thread.join()
             self._thread = None
 
     def put(self, event):
+        if self._profiler is not None:
+            self._profiler.on_put(event)
         self.event_queue.put(event)
 
+    def add_clock(self, clock):
+        """
+        添加时钟事件源，时钟是按事件顺序排列的事件迭代器(如回测中的TimeEvent序列)。
+        多线程引擎无法在加锁的队列外合并事件，直接将时钟中所有事件放入事件队列。
+
+        Args:
+            clock(iterable): 按顺序排列的事件迭代器
+
+        Returns:
+            None
+        """
+        for event in clock:
+            self.put(event)
+
+    @property
+    def timers(self):
+        return self._timers
+
+    def call_at(self, timestamp, callback, *args):
+        """
+        添加定时器，在引擎时钟(EVENTS.TIME事件的时间)到达timestamp时调用callback(*args)。
+        定时器在第一个时间不早于timestamp的TimeEvent分发之前触发，
+        触发时放入的事件若排在该TimeEvent之前(如撤单)，会先于该TimeEvent被处理。
+        需在引擎线程中调用。
+
+        Args:
+            timestamp(datetime): 触发时间
+            callback(function): 触发时调用的函数
+            *args: 函数参数
+
+        Returns:
+            fxdayu.engine.wheel.Timer: 定时器，调用其cancel方法取消
+        """
+        if self._timers is None:
+            self._timers = TimerWheel()
+        return self._timers.add(timestamp, callback, *args)
+
+    def put_at(self, timestamp, event):
+        """
+        在引擎时钟到达timestamp时将event放入引擎，参见call_at。
+
+        Args:
+            timestamp(datetime): 触发时间
+            event(fxdayu.event.Event): 事件
+
+        Returns:
+            fxdayu.engine.wheel.Timer: 定时器，调用其cancel方法取消
+        """
+        return self.call_at(timestamp, self.put, event)
+
+    def _fire_timers(self, timestamp):
+        """
+        将定时器推进到timestamp并触发到期的定时器，由引擎在分发EVENTS.TIME事件之前调用。
+
+        Args:
+            timestamp(datetime): TimeEvent的时间
+
+        Returns:
+            bool: 是否有定时器触发
+        """
+        fired = self._timers.advance(timestamp)
+        for timer in fired:
+            try:
+                timer.fire()
+            except Exception as e:
+                logging.error("error occurs when in timer: %s" % timer.callback)
+                logging.exception(e)
+        return len(fired) > 0
+
     def set_context(self, context):
         self._context = context
 
@@ -0,0 +1,306 @@
+# encoding:utf-8
+import struct
+from datetime import datetime, timedelta
+from enum import Enum
+
+import numpy as np
+import pandas as pd
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from fxdayu.const import OrderType, TimeInForce, OrderStatus, Direction, OrderSide, OrderAction, GatewayType
+from fxdayu.event import *
+from fxdayu.event import EPOCH, PRIORITY_OFFSET, TIME_BITS, TIME_OFFSET, SEQUENCE_BITS, time_key
+from fxdayu.models.data import TickData, AccountData, PositionData, ExecutionData, LogData, ErrorData, Security
+from fxdayu.models.order import OrderStatusData, OrderReq, CancelReq, OrderGroupData
+
+__all__ = ["encode", "decode", "register", "register_enum"]
+
+try:
+    text_type, integer_types = unicode, (int, long)
+except NameError:
+    text_type, integer_types = str, (int,)
+
+# 记录头：类型编号，标志位
+HEADER = struct.Struct("<HB")
+EXTRA = 1  # 带有类型定义之外的属性
+PICKLED = 0  # 类型编号0表示未注册的类型，整条记录为pickle
+
+# 每个字段的类型标记及其在定长部分中的格式
+# n:None ?:bool q:int d:float t:datetime T:pandas.Timestamp -:缺失的属性
+# s:bytes u:unicode a:float64 ndarray e:Enum o:已注册的对象 P:pickle x:其他属性的dict
+FIXED = {"n": "", "-": "", "?": "?", "q": "q", "d": "d", "t": "q", "T": "q",
+         "s": "I", "u": "I", "a": "I", "e": "I", "o": "I", "P": "I", "x": "I"}
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+_classes = {}  # cls: (id, names, is_event, set of names)
+_ids = {}  # id: (cls, names, is_event)
+_enums = {}  # member: bytes
+_members = {}  # bytes: member
+_structs = {}  # tags: struct.Struct
+_sizes = {}  # id: number of names
+_decoders = {}  # (id, tags): (struct.Struct, function)
+
+
+class _Missing(object):
+    pass
+
+
+MISSING = _Missing()
+
+
+def event_fields(cls):
+    """
+    事件类所有__slots__中的属性名，key由priority、time和seq在解码时重新计算，不编码。
+    """
+    names = []
+    for klass in reversed(cls.__mro__):
+        for name in klass.__dict__.get("__slots__", ()):
+            if name not in names and name != "key":
+                names.append(name)
+    return names
+
+
+def register(cls, cid, prototype=None):
+    """
+    注册可编码的类型，编号须在各进程和各版本间保持一致。
+    事件按__slots__编码，数据对象按原型实例的属性编码，实例中多出的属性以dict附在记录末尾。
+
+    Args:
+        cls(type): Event或BaseData的子类
+        cid(int): 类型编号，1到65535
+        prototype: 数据对象的原型实例，None时以cls()创建
+
+    Returns:
+        None
+    """
+    if cid == PICKLED or cid in _ids:
+        raise ValueError("invalid or duplicated codec id: %s" % cid)
+    is_event = issubclass(cls, Event)
+    if is_event:
+        names = event_fields(cls)
+    else:
+        names = sorted((prototype if prototype is not None else cls()).__dict__)
+    _classes[cls] = (cid, names, is_event, frozenset(names))
+    _ids[cid] = (cls, names, is_event)
+    _sizes[cid] = len(names)
+
+
+def register_enum(cls):
+    """
+    注册Enum类型，成员按"类名.成员名"编码。
+
+    Args:
+        cls(type): Enum的子类
+
+    Returns:
+        None
+    """
+    for member in cls:
+        data = ("%s.%s" % (cls.__name__, member.name)).encode("ascii")
+        _enums[member] = data
+        _members[data] = member
+
+
+def _struct(tags):
+    s = _structs.get(tags, None)
+    if s is None:
+        s = _structs[tags] = struct.Struct("<" + "".join(FIXED[tag] for tag in tags))
+    return s
+
+
+def _encode_values(values, tags, fixed, var):
+    for value in values:
+        cls = value.__class__
+        if cls is float:
+            tags.append("d")
+            fixed.append(value)
+        elif cls is bool:
+            tags.append("?")
+            fixed.append(value)
+        elif cls in integer_types and INT64_MIN <= value <= INT64_MAX:
+            tags.append("q")
+            fixed.append(value)
+        elif value is None:
+            tags.append("n")
+        elif cls is bytes:
+            tags.append("s")
+            fixed.append(len(value))
+            var.append(value)
+        elif cls is text_type:
+            value = value.encode("utf-8")
+            tags.append("u")
+            fixed.append(len(value))
+            var.append(value)
+        elif cls is datetime and value.tzinfo is None:
+            tags.append("t")
+            fixed.append(time_key(value))
+        elif cls is pd.Timestamp and value.tzinfo is None:
+            tags.append("T")
+            fixed.append(value.value)
+        elif cls is np.ndarray and value.dtype == np.float64 and value.ndim == 1:
+            value = value.tobytes()
+            tags.append("a")
+            fixed.append(len(value))
+            var.append(value)
+        elif isinstance(value, Enum) and value in _enums:
+            value = _enums[value]
+            tags.append("e")
+            fixed.append(len(value))
+            var.append(value)
+        elif cls in _classes:
+            value = encode(value)
+            tags.append("o")
+            fixed.append(len(value))
+            var.append(value)
+        elif value is MISSING:
+            tags.append("-")
+        elif isinstance(value, float):
+            # numpy.float64等
+            tags.append("d")
+            fixed.append(float(value))
+        elif isinstance(value, (np.integer,) + integer_types) and INT64_MIN <= value <= INT64_MAX:
+            tags.append("q")
+            fixed.append(int(value))
+        else:
+            value = pickle.dumps(value, 2)
+            tags.append("P")
+            fixed.append(len(value))
+            var.append(value)
+
+
+def encode(obj):
+    """
+    将事件或数据对象编码为bytes。记录由类型编号、每个字段的类型标记、
+    一次struct.pack的定长部分和依次排列的变长数据组成，字段名不写入记录。
+    未注册的类型整体pickle。
+
+    Args:
+        obj: 已注册的事件或数据对象
+
+    Returns:
+        bytes
+    """
+    schema = _classes.get(obj.__class__, None)
+    if schema is None:
+        return HEADER.pack(PICKLED, 0) + pickle.dumps(obj, 2)
+    cid, names, is_event, fields = schema
+    flags = 0
+    if is_event:
+        values = [getattr(obj, name, MISSING) for name in names]
+    else:
+        attrs = obj.__dict__
+        values = [attrs.get(name, MISSING) for name in names]
+        if not fields.issuperset(attrs):
+            values.append({key: value for key, value in attrs.items() if key not in fields})
+            flags |= EXTRA
+    tags, fixed, var = [], [], []
+    _encode_values(values, tags, fixed, var)
+    if flags & EXTRA:
+        tags[-1] = "x"
+    tags = "".join(tags)
+    return b"".join([HEADER.pack(cid, flags), tags.encode("ascii"), _struct(tags).pack(*fixed)] + var)
+
+
+# 解码时变长字段的取值表达式，chunk为该字段的变长数据
+CHUNK = {"s": "chunk", "u": "chunk.decode('utf-8')", "e": "_members[chunk]",
+         "a": "_frombuffer(chunk, _float64).copy()", "o": "decode(chunk)", "P": "_loads(chunk)"}
+
+
+def _compile(cid, tags):
+    """
+    按类型编号和字段的类型标记生成解码函数，逐个字段直接赋值，不在每条记录上遍历标记。
+    同一类型的记录通常只有少数几种标记组合，生成的函数按组合缓存。
+
+    Args:
+        cid(int): 类型编号
+        tags(str): 每个字段的类型标记
+
+    Returns:
+        function: (data, fixed, offset) -> 对象
+    """
+    cls, names, is_event = _ids[cid]
+    lines = ["def _decode(data, fixed, offset):", "    obj = _new(cls)"]
+    if not is_event:
+        lines.append("    attrs = obj.__dict__")
+    i = 0
+    time = "_time_key(obj.time)"
+    for name, tag in zip(names + ["__extra__"], tags):
+        if tag == "-":
+            continue
+        if tag in "q?d":
+            value = "fixed[%d]" % i
+        elif tag == "n":
+            value = "None"
+        elif tag == "t":
+            value = "_epoch + _timedelta(0, 0, fixed[%d])" % i
+            if name == "time":
+                # 编码的值即为time_key
+                time = "fixed[%d]" % i
+        elif tag == "T":
+            value = "_timestamp(fixed[%d])" % i
+        else:
+            lines.append("    end = offset + fixed[%d]" % i)
+            lines.append("    chunk = data[offset:end]")
+            lines.append("    offset = end")
+            value = "_loads(chunk)" if tag == "x" else CHUNK[tag]
+        if tag in FIXED and FIXED[tag]:
+            i += 1
+        if tag == "x":
+            lines.append("    attrs.update(%s)" % value)
+        elif is_event:
+            lines.append("    obj.%s = %s" % (name, value))
+        else:
+            lines.append("    attrs[%r] = %s" % (name, value))
+    if is_event:
+        lines.append("    obj.key = ((((obj.priority + %d) << %d) | (%s + %d)) << %d) | obj.seq" % (
+            PRIORITY_OFFSET, TIME_BITS, time, TIME_OFFSET, SEQUENCE_BITS))
+    lines.append("    return obj")
+    namespace = {
+        "cls": cls, "_new": cls.__new__, "_members": _members, "_frombuffer": np.frombuffer, "_float64": np.float64,
+        "decode": decode, "_loads": pickle.loads, "_epoch": EPOCH, "_timedelta": timedelta,
+        "_timestamp": pd.Timestamp, "_time_key": time_key
+    }
+    exec("\n".join(lines), namespace)
+    return namespace["_decode"]
+
+
+def decode(data):
+    """
+    将encode编码的bytes解码为对象。
+
+    Args:
+        data(bytes): 记录
+
+    Returns:
+        事件或数据对象
+    """
+    cid, flags = HEADER.unpack_from(data, 0)
+    if cid == PICKLED:
+        return pickle.loads(data[HEADER.size:])
+    offset = HEADER.size
+    end = offset + _sizes[cid] + (flags & EXTRA)
+    tags = data[offset:end]
+    decoder = _decoders.get((cid, tags), None)
+    if decoder is None:
+        text = tags.decode("ascii")
+        decoder = _decoders[(cid, tags)] = (_struct(text), _compile(cid, text))
+    s, function = decoder
+    return function(data, s.unpack_from(data, end), end + s.size)
+
+
+for _enum in (EVENTS, OrderType, TimeInForce, OrderStatus, Direction, OrderSide, OrderAction, GatewayType):
+    register_enum(_enum)
+
+for _cid, _cls in enumerate([TickEvent, BarEvent, OrderEvent, CancelEvent, ExecutionEvent, TimeEvent,
+                             ScheduleEvent, ConfigEvent, ExitEvent, AccountEvent, PositionEvent,
+                             OrderStatusEvent, LogEvent, ErrorEvent, InitEvent], 1):
+    register(_cls, _cid)
+
+for _cid, _cls in enumerate([TickData, AccountData, PositionData, ExecutionData, LogData, ErrorData,
+                             Security, OrderStatusData, OrderReq, OrderGroupData], 64):
+    register(_cls, _cid)
+register(CancelReq, 74, CancelReq(None))
@@ -0,0 +1,149 @@
+# encoding:utf-8
+from threading import Lock
+
+from fxdayu.engine.handler import HandlerCompose, Handler
+from fxdayu.event import EVENTS
+
+__all__ = ["ConflatingIngress", "TickIngress", "PositionIngress", "AccountIngress"]
+
+
+class ConflatingIngress(HandlerCompose):
+    """
+    有界的事件合并入口，放在外部线程(如交易网关)与事件引擎之间。
+
+    同一key的事件在引擎中只保留一个待处理事件：若上一个事件仍在队列中尚未处理，
+    新事件的数据和时间直接覆盖到该事件上(计入merged)，不再放入队列；待处理事件
+    的key数目达到maxsize时，新的key的事件被丢弃(计入dropped)。因此引擎处理不及时时
+    队列长度有界，处理到的总是最新的数据。
+
+    事件在队列中的位置由其创建时计算的排序键决定，覆盖数据不影响队列顺序。
+
+    Attributes:
+        stream(EVENTS): 所合并的事件类型
+        maxsize(int): 待处理事件key的最大数目，None表示不限
+        merged(int): 被合并(覆盖)的事件数
+        dropped(int): 被丢弃的事件数
+    """
+
+    RELEASE_PRIORITY = 10000
+
+    def __init__(self, engine, stream, key=None, maxsize=None):
+        """
+        Args:
+            engine(fxdayu.engine.Engine): 事件驱动引擎
+            stream(EVENTS): 所合并的事件类型
+            key(function): 计算事件合并key的函数，默认为事件的topic
+            maxsize(int): 待处理事件key的最大数目，None表示不限
+        """
+        super(ConflatingIngress, self).__init__(engine)
+        self.stream = stream
+        self.maxsize = maxsize
+        self.merged = 0
+        self.dropped = 0
+        self._key = key if key is not None else self.topic_key
+        self._pending = {}
+        self._lock = Lock()
+        self._handlers["on_release"] = Handler(self.on_release, stream, topic="", priority=self.RELEASE_PRIORITY)
+
+    @staticmethod
+    def topic_key(event):
+        return event.topic
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def put(self, event):
+        """
+        将事件放入引擎，同一key已有待处理事件时合并到该事件上，可在任意线程中调用。
+
+        Args:
+            event(fxdayu.event.Event): 事件
+
+        Returns:
+            None
+        """
+        key = self._key(event)
+        with self._lock:
+            pending = self._pending.get(key, None)
+            if pending is not None:
+                pending.data = event.data
+                pending.time = event.time
+                self.merged += 1
+                self._discard(event)
+                return
+            if self.maxsize is not None and len(self._pending) >= self.maxsize:
+                self.dropped += 1
+                self._discard(event)
+                return
+            self._pending[key] = event
+        self.engine.put(event)
+
+    def _discard(self, event):
+        # 合并或丢弃的事件不会被处理，性能统计中不保留其放入时间
+        profiler = getattr(self.engine, "profiler", None)
+        if profiler is not None:
+            profiler.discard(event)
+
+    def on_release(self, event, kwargs=None):
+        """
+        事件开始处理时将其移出待处理表，之后到达的同key事件重新放入队列。
+        该函数以最高优先级注册在工作流最前端。
+
+        Args:
+            event(fxdayu.event.Event): 事件
+            kwargs(dict): 共享数据字典
+
+        Returns:
+            None
+        """
+        key = self._key(event)
+        with self._lock:
+            if self._pending.get(key, None) is event:
+                del self._pending[key]
+
+    def reset_counts(self):
+        with self._lock:
+            self.merged = 0
+            self.dropped = 0
+
+
+class TickIngress(ConflatingIngress):
+    """
+    行情tick的合并入口，按品种topic只保留最新的TickEvent。
+    在Trader的settings中以"tick_ingress"为名加入该组件后，交易网关会自动通过它推送行情。
+    """
+
+    def __init__(self, engine, maxsize=None):
+        super(TickIngress, self).__init__(engine, EVENTS.TICK, maxsize=maxsize)
+
+
+class PositionIngress(ConflatingIngress):
+    """
+    持仓回报的合并入口，按(gateway, account, symbol, side)只保留最新的PositionEvent。
+    网关轮询持仓或断线重连时会集中推送大量持仓回报，合并后每个持仓只处理和保存最新的一条。
+    在Trader的settings中以"position_ingress"为名加入该组件后，交易网关会自动通过它推送持仓。
+    """
+
+    def __init__(self, engine, maxsize=None):
+        super(PositionIngress, self).__init__(engine, EVENTS.POSITION, key=self.position_key, maxsize=maxsize)
+
+    @staticmethod
+    def position_key(event):
+        position = event.data
+        return position.gateway, position.account, position.symbol, position.side
+
+
+class AccountIngress(ConflatingIngress):
+    """
+    账户回报的合并入口，按(gateway, accountID)只保留最新的AccountEvent。
+    在Trader的settings中以"account_ingress"为名加入该组件后，交易网关会自动通过它推送账户信息。
+    """
+
+    def __init__(self, engine, maxsize=None):
+        super(AccountIngress, self).__init__(engine, EVENTS.ACCOUNT, key=self.account_key, maxsize=maxsize)
+
+    @staticmethod
+    def account_key(event):
+        account = event.data
+        return account.gateway, account.accountID
@@ -0,0 +1,129 @@
+# encoding:utf-8
+import struct
+from threading import Lock
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from fxdayu.event import ExitEvent
+
+__all__ = ["JournalWriter", "read_journal", "replay"]
+
+MAGIC = b"FXJ1"
+HEADER = struct.Struct("<I")
+
+
+def dumps(event):
+    return pickle.dumps(event, 2)
+
+
+loads = pickle.loads
+
+
+class JournalWriter(object):
+    """
+    追加写入的二进制事件日志，每条记录为4字节小端长度加序列化后的事件。
+    通过 :meth:`fxdayu.engine.Engine.enable_journal` 开启后，引擎在分发每个事件之前写入日志，
+    包括时钟事件，记录的顺序和内容即处理时的顺序和内容。写入加锁，flush可在其他线程中调用。
+
+    Attributes:
+        path(str): 日志文件路径
+        count(int): 已写入的记录数
+    """
+
+    def __init__(self, path, encode=dumps, buffering=1 << 16):
+        """
+        Args:
+            path(str): 日志文件路径，文件已存在时在末尾追加
+            encode(function): 事件序列化函数，返回bytes
+            buffering(int): 文件写缓冲大小
+        """
+        self.path = path
+        self.count = 0
+        self._encode = encode
+        self._lock = Lock()
+        self._file = open(path, "ab", buffering)
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+    def write(self, event):
+        """
+        Args:
+            event(fxdayu.event.Event): 事件
+
+        Returns:
+            None
+        """
+        record = self._encode(event)
+        with self._lock:
+            self._file.write(HEADER.pack(len(record)))
+            self._file.write(record)
+            self.count += 1
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_journal(path, streams=None, decode=loads):
+    """
+    按写入顺序读取日志中的事件。
+
+    Args:
+        path(str): 日志文件路径
+        streams(iterable): 只读取这些类型(EVENTS)的事件，None表示全部
+        decode(function): 事件反序列化函数
+
+    Returns:
+        generator: 事件
+    """
+    if streams is not None:
+        streams = set(streams)
+    size = HEADER.size
+    unpack = HEADER.unpack
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not an event journal: %s" % path)
+        while True:
+            header = f.read(size)
+            if len(header) < size:
+                return
+            length = unpack(header)[0]
+            record = f.read(length)
+            if len(record) < length:
+                # 未写完的最后一条记录
+                return
+            event = decode(record)
+            if streams is None or event.type in streams:
+                yield event
+
+
+def replay(engine, path, streams=None, decode=loads):
+    """
+    将日志中的事件按记录(即处理)的顺序作为时钟加入引擎，配合BacktestEngine可以不依赖数据库和交易接口、
+    以最快速度重放生产环境中的事件。事件保留原有的排序键，与处理函数重新产生的事件按排序键合并。
+    重放时通常只选择外部输入的事件(如TICK、TIME)，订单、成交等由处理函数重新产生。
+
+    Args:
+        engine(fxdayu.engine.Engine): 事件驱动引擎
+        path(str): 日志文件路径
+        streams(iterable): 重放的事件类型(EVENTS)，None表示全部
+        decode(function): 事件反序列化函数
+
+    Returns:
+        None
+    """
+
+    def clock():
+        for event in read_journal(path, streams, decode):
+            yield event
+        yield ExitEvent()
+
+    engine.add_clock(clock())
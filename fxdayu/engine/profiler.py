@@ -0,0 +1,203 @@
+# encoding:utf-8
+import time
+from timeit import default_timer
+
+__all__ = ["DispatchProfiler"]
+
+CALLS, TOTAL, MAX = 0, 1, 2
+COUNT, DEPTH_TOTAL, DEPTH_MAX, AGED, AGE_TOTAL, AGE_MAX = 0, 1, 2, 3, 4, 5
+
+
+def handler_name(handler):
+    """
+    Readable name of a handler, "ClassName.method" for bound methods.
+
+    Args:
+        handler: event handler
+
+    Returns:
+        str: name of the handler
+    """
+    name = getattr(handler, "__name__", None)
+    if name is None:
+        return repr(handler)
+    owner = getattr(handler, "__self__", None)
+    if owner is not None:
+        return "%s.%s" % (owner.__class__.__name__, name)
+    return name
+
+
+class DispatchProfiler(object):
+    """
+    Opt-in instrumentation of the Engine's dispatch loop, enabled by
+    :meth:`fxdayu.engine.Engine.enable_profiler`.
+
+    For each handler under each stream and topic it records call count, total
+    and max wall time. For each stream and topic it records dequeued count,
+    queue depth at dequeue and event age (wall time since put) at dequeue.
+    Events never put into the queue, such as lazily pulled clock events,
+    have no age.
+
+    Put times are keyed by ``event.seq``, which is unique for the life of the
+    process, unlike ``id(event)`` which may be reused once an event is freed.
+    An entry is removed when its event is dequeued or discarded.
+    """
+
+    def __init__(self):
+        self._handlers = {}
+        self._events = {}
+        self._put_time = {}
+
+    def on_put(self, event):
+        """
+        Record when event entered the queue, may be called from any thread.
+
+        Args:
+            event(fxdayu.event.Event): event put into the engine
+
+        Returns:
+            None
+        """
+        self._put_time[event.seq] = time.time()
+
+    def discard(self, event):
+        """
+        Forget the put time of an event that will not be dequeued, such as an
+        event merged into a pending one by an ingress.
+
+        Args:
+            event(fxdayu.event.Event): event dropped before dispatch
+
+        Returns:
+            None
+        """
+        self._put_time.pop(event.seq, None)
+
+    def dispatch(self, event, handlers, depth, kwargs):
+        """
+        Call handlers on event and record their wall time. An exception raised
+        by a handler is re-raised with the handler set as its ``handler``
+        attribute, so the engine can log which handler failed.
+
+        Args:
+            event(fxdayu.event.Event): event dequeued
+            handlers(tuple): handlers chain of the event
+            depth(int): queue depth after dequeue
+            kwargs(dict): shared data of the handlers chain
+
+        Returns:
+            None
+        """
+        self.dequeue(event, depth)
+        stream, topic = event.type, event.topic
+        for handle in handlers:
+            st = default_timer()
+            try:
+                handle(event, kwargs)
+            except Exception as e:
+                e.handler = handle
+                raise
+            finally:
+                self.record(stream, topic, handle, default_timer() - st)
+
+    def dequeue(self, event, depth):
+        """
+        Record queue depth and event age when event is dequeued.
+
+        Args:
+            event(fxdayu.event.Event): event dequeued
+            depth(int): queue depth after dequeue
+
+        Returns:
+            None
+        """
+        stats = self._events.get((event.type, event.topic))
+        if stats is None:
+            stats = self._events[(event.type, event.topic)] = [0, 0, 0, 0, 0.0, 0.0]
+        stats[COUNT] += 1
+        stats[DEPTH_TOTAL] += depth
+        if depth > stats[DEPTH_MAX]:
+            stats[DEPTH_MAX] = depth
+        put_time = self._put_time.pop(event.seq, None)
+        if put_time is not None:
+            age = time.time() - put_time
+            stats[AGED] += 1
+            stats[AGE_TOTAL] += age
+            if age > stats[AGE_MAX]:
+                stats[AGE_MAX] = age
+
+    def record(self, stream, topic, handle, elapsed):
+        """
+        Record one call of handle.
+
+        Args:
+            stream(EVENTS): stream of the event
+            topic(str): topic of the event
+            handle: event handler
+            elapsed(float): wall time of the call in seconds
+
+        Returns:
+            None
+        """
+        key = (stream, topic, handle)
+        record = self._handlers.get(key)
+        if record is None:
+            record = self._handlers[key] = [0, 0.0, 0.0]
+        record[CALLS] += 1
+        record[TOTAL] += elapsed
+        if elapsed > record[MAX]:
+            record[MAX] = elapsed
+
+    def reset(self):
+        self._handlers = {}
+        self._events = {}
+        self._put_time = {}
+
+    def snapshot(self):
+        """
+        Copy of current statistics, safe to call from another thread while
+        the engine is running.
+
+        Returns:
+            dict: {"handler": [dict], "event": [dict]}
+        """
+        handlers = [
+            {"stream": key[0].name if hasattr(key[0], "name") else key[0], "topic": key[1],
+             "handler": handler_name(key[2]),
+             "calls": record[CALLS], "total": record[TOTAL], "max": record[MAX]}
+            for key, record in list(dict(self._handlers).items())
+        ]
+        events = [
+            {"stream": key[0].name if hasattr(key[0], "name") else key[0], "topic": key[1],
+             "count": stats[COUNT], "depth_mean": float(stats[DEPTH_TOTAL]) / stats[COUNT],
+             "depth_max": stats[DEPTH_MAX],
+             "age_mean": stats[AGE_TOTAL] / stats[AGED] if stats[AGED] else None,
+             "age_max": stats[AGE_MAX] if stats[AGED] else None}
+            for key, stats in list(dict(self._events).items())
+        ]
+        return {"handler": handlers, "event": events}
+
+    def to_frame(self, kind="handler"):
+        """
+        Statistics as a DataFrame.
+
+        Args:
+            kind(str): "handler" for per handler wall time, sorted by total time descending;
+                "event" for queue depth and event age per stream and topic.
+
+        Returns:
+            pandas.DataFrame
+        """
+        import pandas as pd
+
+        records = self.snapshot()[kind]
+        if kind == "handler":
+            columns = ["stream", "topic", "handler", "calls", "total", "mean", "max"]
+            for record in records:
+                record["mean"] = record["total"] / record["calls"]
+            sort = "total"
+        else:
+            columns = ["stream", "topic", "count", "depth_mean", "depth_max", "age_mean", "age_max"]
+            sort = "count"
+        frame = pd.DataFrame(records, columns=columns)
+        return frame.sort_values(sort, ascending=False).reset_index(drop=True)
@@ -0,0 +1,125 @@
+# encoding:utf-8
+import ctypes
+import struct
+import time
+from multiprocessing.sharedctypes import RawArray, RawValue
+
+__all__ = ["SharedRing", "RingFull", "RingEmpty"]
+
+HEADER = struct.Struct("<I")
+
+
+class RingFull(Exception):
+    pass
+
+
+class RingEmpty(Exception):
+    pass
+
+
+class SharedRing(object):
+    """
+    进程间共享内存上的单生产者单消费者环形缓冲区，每条记录为4字节小端长度加数据。
+    head和tail为累计写入和读出的字节数，生产者只修改head，消费者只修改tail，无需加锁。
+    在创建子进程前创建，作为参数传给子进程。同一端有多个线程读或写时由调用者加锁。
+
+    Attributes:
+        capacity(int): 缓冲区字节数
+    """
+
+    def __init__(self, capacity=1 << 22, spin_tries=100, sleep=0.0005):
+        """
+        Args:
+            capacity(int): 缓冲区字节数
+            spin_tries(int): 等待时不让出CPU的轮询次数
+            sleep(float): 轮询次数用完后每次轮询间隔的秒数
+        """
+        self.capacity = capacity
+        self.spin_tries = spin_tries
+        self.sleep = sleep
+        self._buffer = RawArray(ctypes.c_char, capacity)
+        self._head = RawValue(ctypes.c_uint64, 0)
+        self._tail = RawValue(ctypes.c_uint64, 0)
+
+    def __len__(self):
+        """
+        未读出的字节数
+        """
+        return self._head.value - self._tail.value
+
+    def _wait(self, ready, timeout, exception):
+        tries = self.spin_tries
+        deadline = None if timeout is None else time.time() + timeout
+        while not ready():
+            if tries:
+                tries -= 1
+                continue
+            if deadline is not None and time.time() >= deadline:
+                raise exception()
+            time.sleep(self.sleep)
+
+    def _write(self, offset, data):
+        buffer, capacity = self._buffer, self.capacity
+        start = offset % capacity
+        end = start + len(data)
+        if end <= capacity:
+            buffer[start:end] = data
+        else:
+            split = capacity - start
+            buffer[start:capacity] = data[:split]
+            buffer[0:end - capacity] = data[split:]
+
+    def _read(self, offset, length):
+        buffer, capacity = self._buffer, self.capacity
+        start = offset % capacity
+        end = start + length
+        if end <= capacity:
+            return buffer[start:end]
+        return buffer[start:capacity] + buffer[0:end - capacity]
+
+    def put(self, data, timeout=None):
+        """
+        写入一条记录，缓冲区空间不足时等待消费者读出。
+
+        Args:
+            data(bytes): 数据
+            timeout(float): 最长等待秒数，None表示一直等待
+
+        Returns:
+            None
+
+        Raises:
+            RingFull: 超时仍没有足够空间
+            ValueError: 记录比缓冲区大
+        """
+        size = HEADER.size + len(data)
+        if size > self.capacity:
+            raise ValueError("record of %s bytes exceeds ring capacity %s" % (size, self.capacity))
+        head, tail = self._head, self._tail
+        offset = head.value
+        if self.capacity - (offset - tail.value) < size:
+            self._wait(lambda: self.capacity - (offset - tail.value) >= size, timeout, RingFull)
+        self._write(offset, HEADER.pack(len(data)) + data)
+        head.value = offset + size
+
+    def get(self, timeout=None):
+        """
+        读出一条记录，缓冲区为空时等待生产者写入。
+
+        Args:
+            timeout(float): 最长等待秒数，None表示一直等待
+
+        Returns:
+            bytes: 数据
+
+        Raises:
+            RingEmpty: 超时仍没有记录
+        """
+        head, tail = self._head, self._tail
+        offset = tail.value
+        if head.value == offset:
+            self._wait(lambda: head.value != offset, timeout, RingEmpty)
+        length = HEADER.unpack(self._read(offset, HEADER.size))[0]
+        data = self._read(offset + HEADER.size, length)
+        tail.value = offset + HEADER.size + length
+        return data
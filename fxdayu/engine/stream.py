@@ -1,6 +1,5 @@
 import bisect
 from itertools import chain
-from collections import deque
 
 __all__ = ["PriorityList", "StreamManager", "StreamEnd"]
 
@@ -39,7 +38,7 @@ class PriorityList(object):
             pos = bisect.bisect(self._p, -priority)
             self._p.insert(pos, -priority)
             self._v.insert(pos, value)
-            self._i[value] = pos
+            self._i[value] = -priority
 
     def remove(self, value):
         """
@@ -52,7 +51,7 @@ class PriorityList(object):
             None
         """
         if value in self._i:
-            pos = self._i[value]
+            pos = self._v.index(value, bisect.bisect_left(self._p, self._i[value]))
             self._v.pop(pos)
             self._p.pop(pos)
             del self._i[value]
@@ -88,15 +87,67 @@ class PriorityList(object):
         return self._v.__len__()
 
 
+class TopicNode(object):
+    """
+    Node of the topic trie, one level of a dot separated topic.
+
+    head holds handlers registered on the topic itself (e.g. "bar"), called
+    before those of deeper topics; tail holds handlers registered on the topic
+    with a trailing dot (e.g. "bar."), called after those of deeper topics.
+    """
+    __slots__ = ["children", "head", "tail"]
+
+    def __init__(self):
+        self.children = {}
+        self.head = None
+        self.tail = None
+
+    def is_empty(self):
+        return not (self.children or self.head or self.tail)
+
+
 class StreamManager(object):
     """
     Manager all event stream
+
+    Handlers of a stream are kept in a trie of dot separated topics, so a
+    topic of depth n is resolved by walking n nodes. A "*" level matches any
+    single level, e.g. handlers on "execution.*" receive events of every
+    "execution.<symbol>" topic; at the same level wildcard heads are called
+    before exact heads and exact tails before wildcard tails.
+
+    Resolved handler chains are cached per stream and topic, the cache of a
+    stream is dropped whenever a handler is registered or unregistered on it.
     """
 
+    CACHE_SIZE = 100000
+    WILDCARD = "*"
+
     def __init__(self):
         self._streams = {}
+        self._cache = {}
 
     def get_iter(self, stream, topic):
+        """
+        Get handlers chain in given event stream under given topic
+
+        Args:
+            stream(fxdayu.event.EVENTS): type of event stream
+            topic(str): topic of event
+        Returns:
+            tuple: chain of the handlers
+        """
+        try:
+            return self._cache[stream][topic]
+        except KeyError:
+            pass
+        cache = self._cache.setdefault(stream, {})
+        if len(cache) >= self.CACHE_SIZE:
+            cache.clear()
+        handlers = cache[topic] = tuple(self._resolve(stream, topic))
+        return handlers
+
+    def _resolve(self, stream, topic):
         """
         Search for handlers chain in given event stream under given topic
 
@@ -106,24 +157,63 @@ class StreamManager(object):
         Returns:
             chain: chain of the handlers
         """
-        if stream in self._streams:
-            handlers = self._streams[stream]
-            head = deque([handlers[""]]) if "" in handlers else deque()
-            tail = deque([handlers["."]]) if "." in handlers else deque()
-            if topic:
-                paths = topic.split(".")
-                path = ""
-                for s in paths:
-                    path += s
-                    path_ = path + "."
-                    if path in handlers:
-                        head.append(handlers[path])
-                    if path_ in handlers:
-                        tail.appendleft(handlers[path_])
-                    path += "."
-            return chain(*chain(head, tail))
-        else:
+        root = self._streams.get(stream, None)
+        if root is None:
             return chain()
+        head = [root.head] if root.head else []
+        tail = [root.tail] if root.tail else []
+        if topic:
+            wildcard = self.WILDCARD
+            nodes = [root]
+            for name in topic.split("."):
+                matched = []
+                for node in nodes:
+                    children = node.children
+                    if wildcard in children:
+                        matched.append(children[wildcard])
+                    if name in children:
+                        matched.append(children[name])
+                if not matched:
+                    break
+                for node in matched:
+                    if node.head:
+                        head.append(node.head)
+                    if node.tail:
+                        tail.append(node.tail)
+                nodes = matched
+        tail.reverse()
+        return chain(*(head + tail))
+
+    def _find(self, stream, topic, create=False):
+        """
+        Find the trie node and the handlers slot ("head" or "tail") of a
+        registered topic.
+
+        Args:
+            stream(fxdayu.event.EVENTS): type of event stream
+            topic(str): topic of handlers
+            create(bool): create missing nodes
+
+        Returns:
+            tuple: (path, slot), path is the list of nodes from the root,
+                None if not found
+        """
+        if topic.endswith("."):
+            topic, slot = topic[:-1], "tail"
+        else:
+            slot = "head"
+        node = self._streams[stream]
+        path = [node]
+        if topic:
+            for name in topic.split("."):
+                child = node.children.get(name, None)
+                if child is None:
+                    if not create:
+                        return None, slot
+                    child = node.children[name] = TopicNode()
+                node = child
+                path.append(node)
+        return path, slot
 
     def register_stream(self, stream):
         """
@@ -136,7 +226,7 @@ class StreamManager(object):
             None
         """
         if stream not in self._streams:
-            self._streams[stream] = {}
+            self._streams[stream] = TopicNode()
 
     def unregister_stream(self, stream):
         """
@@ -150,6 +240,7 @@ class StreamManager(object):
         """
         if stream in self._streams:
             del self._streams[stream]
+        self._cache.pop(stream, None)
 
     def register_handler(self, handler, stream, topic=".", priority=0):
         """
@@ -159,17 +250,21 @@ class StreamManager(object):
         Args:
             handler(fxdayu.engine.handler.Handler): event handler
             stream(fxdayu.event.EVENTS): type of event stream
-            topic(str): topic of event
+            topic(str): topic of event, a level of "*" matches any level
             priority(int): priority of handler
 
         Returns:
             None
         """
         self.register_stream(stream)
-        handlers = self._streams[stream]
-        if topic not in handlers:
-            handlers[topic] = PriorityList()
-        handlers[topic].put(priority, handler)
+        path, slot = self._find(stream, topic, create=True)
+        node = path[-1]
+        handlers = getattr(node, slot)
+        if handlers is None:
+            handlers = PriorityList()
+            setattr(node, slot, handlers)
+        handlers.put(priority, handler)
+        self._cache.pop(stream, None)
 
     def unregister_handler(self, handler, stream, topic="."):
         """
@@ -185,11 +280,25 @@ class StreamManager(object):
         """
         if stream not in self._streams:
             return
-        handlers = self._streams[stream]
-        handlers[topic].remove(handler)
-        if len(handlers[topic]) == 0:
-            del handlers[topic]
+        path, slot = self._find(stream, topic)
+        if path is None:
+            return
+        node = path[-1]
+        handlers = getattr(node, slot)
+        if handlers is None:
+            return
+        handlers.remove(handler)
+        self._cache.pop(stream, None)
         if len(handlers) == 0:
+            setattr(node, slot, None)
+        # prune empty nodes from the leaf up
+        names = topic.rstrip(".").split(".") if topic.rstrip(".") else []
+        for parent, name in reversed(list(zip(path[:-1], names))):
+            if parent.children[name].is_empty():
+                del parent.children[name]
+            else:
+                break
+        if path[0].is_empty():
             self.unregister_stream(stream)
 
     def _show_flows(self, stream):
@@ -0,0 +1,115 @@
+# encoding:utf-8
+import time
+from datetime import datetime
+
+try:
+    from Queue import Empty
+except ImportError:
+    from queue import Empty
+
+from fxdayu.event import Event, MIN_PRIORITY
+
+__all__ = ["WaitStrategy", "BusySpinWait", "YieldingWait", "BlockingWait"]
+
+
+class WaitStrategy(object):
+    """
+    Strategy of how the Engine waits for the next event in its event queue.
+    A strategy object is bound to one engine and is called only by the engine's
+    working thread.
+    """
+
+    def get(self, queue):
+        """
+        Get next event from queue.
+
+        Args:
+            queue(Queue.Queue): event queue of the engine
+
+        Returns:
+            fxdayu.event.Event: next event
+
+        Raises:
+            Empty: no event arrived during this wait
+        """
+        raise NotImplementedError("Should implement get()")
+
+    def wake(self, queue):
+        """
+        Wake up the working thread if it is waiting on queue, called when the
+        engine is stopped from another thread.
+
+        Args:
+            queue(Queue.Queue): event queue of the engine
+
+        Returns:
+            None
+        """
+        pass
+
+
+class BusySpinWait(WaitStrategy):
+    """
+    Poll the queue without ever giving up the CPU, lowest latency but pins
+    a full core even when the engine is idle.
+    """
+
+    def get(self, queue):
+        return queue.get(False)
+
+
+class YieldingWait(WaitStrategy):
+    """
+    Poll the queue for a number of tries, then yield the CPU (and the GIL)
+    to other threads between each further try.
+    """
+
+    def __init__(self, spin_tries=100, sleep=0):
+        """
+        Args:
+            spin_tries(int): tries of polling before yielding.
+            sleep(float): seconds to sleep when yielding, 0 means just give up
+                the rest of the time slice.
+        """
+        self.spin_tries = spin_tries
+        self.sleep = sleep
+        self._counter = spin_tries
+
+    def get(self, queue):
+        try:
+            event = queue.get(False)
+        except Empty:
+            if self._counter > 0:
+                self._counter -= 1
+            else:
+                time.sleep(self.sleep)
+            raise
+        self._counter = self.spin_tries
+        return event
+
+
+class BlockingWait(WaitStrategy):
+    """
+    Block on the queue until an event arrives or timeout expires, the engine
+    costs no CPU when idle.
+    """
+
+    def __init__(self, timeout=None):
+        """
+        Args:
+            timeout(float): seconds to block in each wait, None means block
+                until an event arrives or the engine is woken up by stop().
+                Note that in Python 2 a blocking wait with timeout is
+                implemented by polling with sleeps of up to 50ms.
+        """
+        self.timeout = timeout
+        self._wakeup = Event(None, MIN_PRIORITY, datetime.now())
+
+    def get(self, queue):
+        event = queue.get(True, self.timeout)
+        if event is self._wakeup:
+            raise Empty()
+        return event
+
+    def wake(self, queue):
+        queue.put(self._wakeup)
@@ -0,0 +1,189 @@
+from heapq import heappush, heappop
+from itertools import count
+
+from fxdayu.event import time_key
+
+__all__ = ["Timer", "TimerWheel"]
+
+
+class Timer(object):
+    """
+    A timer in the TimerWheel, cancelled lazily by flag.
+    """
+    __slots__ = ["when", "tick", "seq", "callback", "args", "cancelled"]
+
+    def __init__(self, when, tick, seq, callback, args):
+        self.when = when
+        self.tick = tick
+        self.seq = seq
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def fire(self):
+        return self.callback(*self.args)
+
+
+class TimerWheel(object):
+    """
+    Hierarchical timer wheel driven by an external clock.
+
+    Time is cut into ticks of the given resolution. Level 0 has one slot per
+    tick, each higher level has one slot per full turn of the level below.
+    A timer is put in the lowest level whose range covers it and is moved down
+    (cascaded) when the clock enters its slot, timers beyond the top level wait
+    in an overflow heap. Adding and cancelling a timer are O(1); advancing the
+    clock is O(1) amortized per timer plus O(levels) per empty stretch skipped,
+    so jumping over a night or a weekend of daily bars costs a few steps.
+
+    Timers are fired at the first advance to a time at or after their time.
+    The wheel is not thread safe, use it from the engine thread.
+
+    Attributes:
+        time: timestamp of the last advance, None before the first one
+    """
+
+    def __init__(self, resolution=1000000, slots=(256, 64, 64, 64)):
+        """
+        Args:
+            resolution(int): microseconds per tick
+            slots(tuple): number of slots of each level
+        """
+        self.resolution = resolution
+        self._slots = slots
+        self._spans = []
+        span = 1
+        for n in slots:
+            self._spans.append(span)
+            span *= n
+        self._range = span
+        self._wheels = [[[] for _ in range(n)] for n in slots]
+        self._counts = [0] * len(slots)
+        self._overflow = []
+        self._due = []
+        self._tick = None
+        self._seq = count()
+        self.time = None
+
+    def __len__(self):
+        return sum(self._counts) + len(self._overflow) + len(self._due)
+
+    def add(self, timestamp, callback, *args):
+        """
+        Add a timer calling callback(*args) at timestamp.
+
+        Args:
+            timestamp(datetime): time to fire
+            callback(function): function called when fired
+            *args: arguments of callback
+
+        Returns:
+            Timer: the timer, call its cancel() to cancel it
+        """
+        when = time_key(timestamp)
+        tick = when // self.resolution
+        timer = Timer(when, tick, next(self._seq), callback, args)
+        if self._tick is None:
+            self._tick = tick - 1
+        self._place(timer, self._tick + 1)
+        return timer
+
+    def _place(self, timer, base):
+        """
+        Put timer in the wheel relative to base, the first tick not processed yet.
+        """
+        delta = timer.tick - base
+        if delta < 0:
+            self._due.append(timer)
+            return
+        for level, span in enumerate(self._spans):
+            if delta < span * self._slots[level]:
+                self._wheels[level][(timer.tick // span) % self._slots[level]].append(timer)
+                self._counts[level] += 1
+                return
+        heappush(self._overflow, (timer.tick, timer.seq, timer))
+
+    def _cascade(self, level, tick):
+        slot = (tick // self._spans[level]) % self._slots[level]
+        timers = self._wheels[level][slot]
+        if not timers:
+            return
+        self._wheels[level][slot] = []
+        self._counts[level] -= len(timers)
+        for timer in timers:
+            if not timer.cancelled:
+                self._place(timer, tick)
+
+    def _skip_to(self, target):
+        """
+        Next tick to process on the way to target, skipping ticks where
+        nothing can fire or cascade.
+        """
+        tick = self._tick + 1
+        for level, n in enumerate(self._counts):
+            if n:
+                if level == 0:
+                    return tick
+                span = self._spans[level]
+                return min(target, -(-tick // span) * span)
+        if self._overflow:
+            # first boundary of the top level where the earliest overflow timer comes in range
+            span = self._spans[-1]
+            boundary = max(tick, self._overflow[0][0] - self._range + 1)
+            return min(target, -(-boundary // span) * span)
+        return target + 1
+
+    def advance(self, timestamp):
+        """
+        Move the clock to timestamp and collect the timers due.
+
+        Args:
+            timestamp(datetime): current time
+
+        Returns:
+            list: due Timers in order of time, not cancelled
+        """
+        self.time = timestamp
+        now = time_key(timestamp)
+        target = now // self.resolution
+        fired, self._due = self._due, []
+        if self._tick is None:
+            self._tick = target
+        top = len(self._slots) - 1
+        wheel = self._wheels[0]
+        n0 = self._slots[0]
+        while self._tick < target:
+            tick = self._skip_to(target)
+            if tick > target:
+                self._tick = target
+                break
+            if tick % self._spans[top] == 0:
+                while self._overflow and self._overflow[0][0] - tick < self._range:
+                    timer = heappop(self._overflow)[2]
+                    if not timer.cancelled:
+                        self._place(timer, tick)
+            for level in range(top, 0, -1):
+                if tick % self._spans[level] == 0:
+                    self._cascade(level, tick)
+            slot = tick % n0
+            if wheel[slot]:
+                self._counts[0] -= len(wheel[slot])
+                fired.extend(wheel[slot])
+                wheel[slot] = []
+            self._tick = tick
+
+        result = []
+        for timer in fired:
+            if timer.cancelled:
+                continue
+            if timer.when <= now:
+                result.append(timer)
+            else:
+                # same tick as now but later than now
+                self._due.append(timer)
+        if len(result) > 1:
+            result.sort(key=lambda t: (t.when, t.seq))
+        return result
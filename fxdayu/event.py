@@ -1,16 +1,45 @@
 # encoding: utf-8
 
-import threading
 from datetime import datetime
+from itertools import count
 
 from dateutil.parser import parse
 
 from fxdayu.const import *
 from fxdayu.models.data import ExecutionData
 
-G = threading.local()
-ID_WIDTH = 12  # 0xffffffffffff / (365 * 24 * 60 * 60 * 100000) = 89
-THREAD_ID_WITH = 5  # 0xfffff = 1048575
+EPOCH = datetime(1970, 1, 1)
+SEQUENCE = count()  # next() of itertools.count is atomic under the GIL, safe for gateway threads
+SEQUENCE_BITS = 40  # 0xffffffffff = 1099511627775 events
+TIME_BITS = 64  # microseconds since epoch, offset to be non-negative
+TIME_OFFSET = 1 << (TIME_BITS - 1)
+PRIORITY_BITS = 16
+PRIORITY_OFFSET = 1 << (PRIORITY_BITS - 1)
+MIN_PRIORITY = -PRIORITY_OFFSET
+MAX_PRIORITY = PRIORITY_OFFSET - 1
+
+
+def time_key(timestamp):
+    """
+    Convert timestamp to integer microseconds since epoch,
+    timezone aware timestamp is converted to UTC.
+
+    Args:
+        timestamp(datetime | pandas.Timestamp): timestamp
+
+    Returns:
+        int: microseconds since epoch
+    """
+    if timestamp.__class__ is not datetime:
+        if timestamp is None:
+            return 0
+        value = getattr(timestamp, "value", None)  # pandas.Timestamp in nanoseconds
+        if value is not None:
+            return value // 1000
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.replace(tzinfo=None) - timestamp.utcoffset()
+    delta = timestamp - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
 
 
 class EVENTS(Enum):
@@ -36,36 +65,29 @@ class EVENTS(Enum):
 class Event(object):
     """
     This is the base event class
-    it implements the __lt__ and __gt__ function
-    which compares its own priority and other event's priority
-    Other events that extends from this class must set the 'priority' attribution
+    it implements the __lt__ function which compares the sort key of events.
+    The sort key is an integer made of priority, integer timestamp and a global
+    sequence number, it is computed once at construction, so priority and time
+    should not be changed after that.
+    Other events that extends from this class must set the 'priority' attribution,
+    which should be an integer between MIN_PRIORITY and MAX_PRIORITY.
     """
-    __slots__ = ["type", "priority", "topic", "time", "pid"]
+    __slots__ = ["type", "priority", "topic", "time", "seq", "key"]
 
     def __init__(self, _type, priority, timestamp, topic=""):
         self.type = _type
         self.priority = priority
         self.topic = topic
         self.time = timestamp
-        self.pid = self.next_pid()
-
-    @classmethod
-    def next_pid(cls):
-        # XXX in a thread, event keep in order, but not totally threading-safe
-        global G
-        try:
-            G.count += 1
-        except AttributeError:
-            G.count = 1
-        result = hex(threading.current_thread().ident)[2:].replace("L", "").zfill(THREAD_ID_WITH)
-        result += hex(G.count)[2:].replace("L", "").zfill(ID_WIDTH)
-        return result
+        self.seq = next(SEQUENCE)
+        self.key = ((((priority + PRIORITY_OFFSET) << TIME_BITS) | (time_key(timestamp) + TIME_OFFSET))
+                    << SEQUENCE_BITS) | self.seq
 
     def to_dict(self):
         return {field: getattr(self, field) for field in self.__slots__}
 
     def __lt__(self, other):
-        return (self.priority, self.time, self.pid) < (other.priority, other.time, other.pid)
+        return self.key < other.key
 
 
 class TickEvent(Event):
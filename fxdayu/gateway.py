@@ -1,8 +1,14 @@
 # encoding:utf-8
+import logging
+from multiprocessing import Process
+from threading import Thread, Lock
 
 from fxdayu.adapter import VtAdapter
 from fxdayu.context import ContextMixin, InitializeMixin
 from fxdayu.engine.handler import HandlerCompose
+from fxdayu.engine.journal import dumps, loads
+from fxdayu.engine.ring import SharedRing
+from fxdayu.environment import Environment
 from fxdayu.event import *
 
 
@@ -11,6 +17,13 @@ class Gateway(HandlerCompose, ContextMixin, InitializeMixin):
     信息交换网关
     """
 
+    # 事件类型及其合并入口在context中的名字
+    INGRESS = {
+        EVENTS.TICK: "tick_ingress",
+        EVENTS.POSITION: "position_ingress",
+        EVENTS.ACCOUNT: "account_ingress",
+    }
+
     def __init__(self, eventEngine, gatewayName):
         """
 
@@ -21,7 +34,7 @@ class Gateway(HandlerCompose, ContextMixin, InitializeMixin):
         Returns:
 
         """
-        super(Gateway, self).__init__()
+        super(Gateway, self).__init__(eventEngine)
         InitializeMixin.__init__(self)
         ContextMixin.__init__(self)
         self.eventEngine = eventEngine
@@ -29,6 +42,48 @@ class Gateway(HandlerCompose, ContextMixin, InitializeMixin):
         self.gatewayName = gatewayName
         self._order_map_fx2vn = {}
         self._order_map_vn2fx = {}
+        self._ingress = {}
+
+    def init(self):
+        ContextMixin.init(self)
+        for stream, name in self.INGRESS.items():
+            if stream not in self._ingress:
+                self.set_ingress(stream, getattr(self.context, name, None))
+
+    def set_ingress(self, stream, ingress):
+        """
+        设置某类回报的合并入口，设置后该类事件不直接放入事件引擎，而是经过入口合并。
+
+        Args:
+            stream(EVENTS): 事件类型
+            ingress(fxdayu.engine.ingress.ConflatingIngress): 合并入口，None表示直接放入引擎
+
+        Returns:
+            None
+        """
+        if ingress is None:
+            self._ingress.pop(stream, None)
+        else:
+            self._ingress[stream] = ingress
+
+    def set_tick_ingress(self, ingress):
+        """
+        设置行情推送的合并入口，设置后tick不直接放入事件引擎，而是经过入口按品种合并。
+
+        Args:
+            ingress(fxdayu.engine.ingress.TickIngress): 行情合并入口，None表示直接放入引擎
+
+        Returns:
+            None
+        """
+        self.set_ingress(EVENTS.TICK, ingress)
+
+    def _put(self, event):
+        ingress = self._ingress.get(event.type, None)
+        if ingress is not None:
+            ingress.put(event)
+        else:
+            self.eventEngine.put(event)
 
     def onTick(self, tick):
         """
@@ -42,7 +97,7 @@ class Gateway(HandlerCompose, ContextMixin, InitializeMixin):
         """
         tick_ = VtAdapter.transform(tick)
         event = TickEvent(tick_, topic=tick_.symbol)
-        self.eventEngine.event_queue.put(event)
+        self._put(event)
 
     def onTrade(self, trade):
         """
@@ -54,7 +109,7 @@ class Gateway(HandlerCompose, ContextMixin, InitializeMixin):
         execution = VtAdapter.transform(trade)
         execution.account = self.context.account.id
         event = ExecutionEvent(execution)
-        self.eventEngine.event_queue.put(event)
+        self.eventEngine.put(event)
 
     def onOrder(self, order):
         """
@@ -68,7 +123,7 @@ class Gateway(HandlerCompose, ContextMixin, InitializeMixin):
         # TODO 过滤掉不在本次发出的订单
         order_status.account = self.context.account.id
         event = OrderStatusEvent(order_status, topic=order_status.gClOrdID)
-        self.eventEngine.event_queue.put(event)
+        self.eventEngine.put(event)
 
     def onPosition(self, position):
         """
@@ -79,7 +134,7 @@ class Gateway(HandlerCompose, ContextMixin, InitializeMixin):
         """
         position_ = VtAdapter.transform(position)
         event = PositionEvent(position_, topic=position_.symbol)
-        self.eventEngine.event_queue.put(event)
+        self._put(event)
 
     def onAccount(self, account):
         """
@@ -93,7 +148,7 @@ class Gateway(HandlerCompose, ContextMixin, InitializeMixin):
         """
         account_ = VtAdapter.transform(account)
         event = AccountEvent(account_, topic=account_.gateway)
-        self.eventEngine.event_queue.put(event)
+        self._put(event)
 
     def onError(self, error):
         """
@@ -106,7 +161,7 @@ class Gateway(HandlerCompose, ContextMixin, InitializeMixin):
             None
         """
         error = VtAdapter.transform(error)
-        self.eventEngine.event_queue.put(ErrorEvent(error))
+        self.eventEngine.put(ErrorEvent(error))
 
     def onLog(self, log):
         """
@@ -119,7 +174,7 @@ class Gateway(HandlerCompose, ContextMixin, InitializeMixin):
             None
         """
         log_ = VtAdapter.transform(log)
-        self.eventEngine.event_queue.put(LogEvent(log_))
+        self.eventEngine.put(LogEvent(log_))
 
     def onContract(self, event):
         pass
@@ -205,3 +260,207 @@ class Gateway(HandlerCompose, ContextMixin, InitializeMixin):
         self.environment.set_private("real_send_order", self.send_order)
         self.environment.set_private("real_cancel_order", self.cancel_order)
         self.environment["subscribe"] = self.subscribe_contract
+
+
+class RingPublisher(object):
+    """
+    网关进程中代替事件引擎，将网关放入的事件序列化后写入一个或多个环形缓冲区，
+    每个缓冲区由一个引擎进程读取。
+    """
+
+    def __init__(self, rings, encode=dumps):
+        """
+        Args:
+            rings(list(fxdayu.engine.ring.SharedRing)): 事件环形缓冲区
+            encode(function): 事件序列化函数
+        """
+        self.rings = rings
+        self._encode = encode
+        self._lock = Lock()
+
+    def put(self, event):
+        data = self._encode(event)
+        with self._lock:
+            for ring in self.rings:
+                ring.put(data)
+
+    def close(self):
+        """
+        写入空记录通知读取方网关进程已退出。
+        """
+        with self._lock:
+            for ring in self.rings:
+                ring.put(b"")
+
+
+def serve_gateway(constructor, gatewayName, args, kwargs, rings, requests, encode=dumps, decode=loads):
+    """
+    网关进程的入口：创建网关，执行requests中的请求，网关的回报写入rings，
+    收到close请求后关闭网关并退出。
+
+    Args:
+        constructor(type): 网关类，以(eventEngine, gatewayName, *args, **kwargs)创建
+        gatewayName(str): 网关名
+        args(tuple): 网关类的其他参数
+        kwargs(dict): 网关类的其他关键字参数
+        rings(list(fxdayu.engine.ring.SharedRing)): 事件环形缓冲区
+        requests(fxdayu.engine.ring.SharedRing): 请求环形缓冲区，记录为(方法名, 参数)
+        encode(function): 事件序列化函数
+        decode(function): 请求反序列化函数
+
+    Returns:
+        None
+    """
+    publisher = RingPublisher(rings, encode)
+    try:
+        gateway = constructor(publisher, gatewayName, *args, **(kwargs or {}))
+        # 账户号在读取方填写
+        context = Environment()
+        context.account = Environment()
+        context.account.id = None
+        gateway.set_context(context)
+        while True:
+            method, params = decode(requests.get())
+            if method == "close":
+                gateway.close()
+                return
+            try:
+                getattr(gateway, method)(*params)
+            except Exception as e:
+                logging.error("error occurs when gateway %s calls %s" % (gatewayName, method))
+                logging.exception(e)
+    finally:
+        publisher.close()
+
+
+class ProcessGateway(Gateway):
+    """
+    在独立进程中运行的网关，网关及其请求、推送线程不再与策略共用一个解释器和GIL。
+    网关进程的回报经共享内存环形缓冲区传回，由读取线程放入本进程的事件引擎，
+    行情、仓位和账户回报同样经过合并入口；下单、撤单、订阅等请求经另一个环形缓冲区发往网关进程。
+
+    每个环形缓冲区只有一个读取方。其他进程(如记录行情的进程)也要读取回报时，
+    在启动前调用add_consumer为其增加一个缓冲区，网关进程将每条回报写入所有缓冲区。
+    任一缓冲区写满时网关进程等待其读取方，各读取方都须持续读取。
+    """
+
+    def __init__(self, eventEngine, gatewayName, constructor, args=(), kwargs=None,
+                 capacity=1 << 22, encode=dumps, decode=loads):
+        """
+        Args:
+            eventEngine(fxdayu.engine.Engine): 事件驱动引擎
+            gatewayName(str): 网关名
+            constructor(type): 在网关进程中创建的网关类，须可被pickle
+            args(tuple): 网关类的其他参数
+            kwargs(dict): 网关类的其他关键字参数
+            capacity(int): 每个环形缓冲区的字节数
+            encode(function): 序列化函数
+            decode(function): 反序列化函数
+        """
+        super(ProcessGateway, self).__init__(eventEngine, gatewayName)
+        self.capacity = capacity
+        self.events = SharedRing(capacity)
+        self.requests = SharedRing(capacity)
+        self._rings = [self.events]
+        self._encode = encode
+        self._decode = decode
+        self._request_lock = Lock()
+        self._process = Process(
+            target=serve_gateway,
+            args=(constructor, gatewayName, tuple(args), kwargs, self._rings, self.requests, encode, decode),
+            name="gateway-%s" % gatewayName
+        )
+        self._process.daemon = True
+        self._reader = Thread(target=self._receive, name="gateway-%s-reader" % gatewayName)
+        self._reader.daemon = True
+
+    def init(self):
+        super(ProcessGateway, self).init()
+        self.start()
+
+    def add_consumer(self):
+        """
+        为本进程读取线程之外的读取方增加一个回报的环形缓冲区，须在start之前调用，
+        并在读取方进程创建前取得，作为参数传给读取方进程。
+        缓冲区中的记录以创建时的decode函数反序列化，网关进程退出时写入一条空记录。
+
+        Returns:
+            fxdayu.engine.ring.SharedRing: 回报的环形缓冲区
+        """
+        if self._process.is_alive() or self._process.exitcode is not None:
+            raise RuntimeError("consumers must be added before the gateway process starts")
+        ring = SharedRing(self.capacity)
+        self._rings.append(ring)
+        return ring
+
+    def start(self):
+        """
+        启动网关进程和读取线程，重复调用时直接返回。
+
+        Returns:
+            None
+        """
+        if self._process.is_alive():
+            return
+        self._process.start()
+        self._reader.start()
+
+    def _receive(self):
+        get, decode = self.events.get, self._decode
+        while True:
+            data = get()
+            if not data:
+                return
+            event = decode(data)
+            if event.type in (EVENTS.EXECUTION, EVENTS.ORD_STATUS):
+                event.data.account = self.context.account.id
+            self._put(event)
+
+    def _request(self, method, *params):
+        data = self._encode((method, params))
+        with self._request_lock:
+            self.requests.put(data)
+
+    def connect(self, *args):
+        self._request("connect", *args)
+
+    def subscribe(self, subscribeReq):
+        self._request("subscribe", subscribeReq)
+
+    def subscribe_contract(self, contract):
+        self._request("subscribe_contract", contract)
+
+    def qryAccount(self):
+        self._request("qryAccount")
+
+    def qryPosition(self):
+        self._request("qryPosition")
+
+    def send_order(self, order):
+        """
+        发往网关进程下单，订单号的对应关系保存在网关进程中。
+
+        Args:
+            order(fxdayu.models.order.OrderReq):
+        """
+        self._request("send_order", order)
+        order.gateway = self.gatewayName
+
+    def cancel_order(self, cancel):
+        self._request("cancel_order", cancel)
+
+    def close(self, timeout=None):
+        """
+        关闭网关进程，等待其写完回报后退出。
+
+        Args:
+            timeout(float): 等待网关进程退出的最长秒数，None表示一直等待
+
+        Returns:
+            None
+        """
+        if not self._process.is_alive():
+            return
+        self._request("close")
+        self._process.join(timeout)
+        self._reader.join(timeout)
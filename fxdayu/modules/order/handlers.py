@@ -2,10 +2,12 @@
 
 import copy
 from collections import OrderedDict
+from datetime import datetime, time
 
 import pandas as pd
+from dateutil.parser import parse
 
-from fxdayu.const import OrderStatus
+from fxdayu.const import OrderStatus, TimeInForce
 from fxdayu.context import ContextMixin
 from fxdayu.engine.handler import HandlerCompose, Handler
 from fxdayu.event import EVENTS, OrderEvent, CancelEvent
@@ -28,6 +30,7 @@ class OrderStatusHandler(HandlerCompose, ContextMixin, OrderSenderMixin):
         self._order_status_dao = None
         self._open_orders = {}
         self._order_proxies = {}
+        self._expiry = {}
         self._client_ord_id = 0
         self._handlers["on_order"] = Handler(self.on_order, EVENTS.ORDER, topic="", priority=0)
         self._handlers["on_execution"] = Handler(self.on_execution, EVENTS.EXECUTION, topic=".", priority=-100)
@@ -84,9 +87,36 @@ class OrderStatusHandler(HandlerCompose, ContextMixin, OrderSenderMixin):
             if order.symbol not in self._open_orders:
                 self._open_orders[order.symbol] = OrderedDict()
             self._open_orders[order.symbol][order.gClOrdID] = order_proxy
+            expire_time = self._expire_time(order, status.orderTime)
+            if expire_time is not None:
+                self._expiry[order.gClOrdID] = self.engine.put_at(
+                    expire_time, CancelEvent(CancelReq(order.gClOrdID), expire_time)
+                )
         else:
             pass  # TODO warning Order send failed
 
+    @staticmethod
+    def _expire_time(order, order_time):
+        """
+        订单的过期时间：指定了expireTime(或timeInForce为GTD)的订单在expireTime过期，
+        timeInForce为DAY的订单在下单当日结束时过期，其他订单不过期。
+
+        Args:
+            order(fxdayu.models.order.OrderReq): 订单
+            order_time(datetime): 下单时间
+
+        Returns:
+            datetime | None: 过期时间
+        """
+        if order.expireTime:
+            expire_time = order.expireTime
+            if not isinstance(expire_time, datetime):
+                expire_time = parse(expire_time)
+            return expire_time
+        if order.timeInForce == TimeInForce.DAY.value and order_time is not None:
+            return datetime.combine(order_time.date(), time.max)
+        return None
+
     def on_execution(self, event, kwargs=None):
         """
 
@@ -115,6 +145,9 @@ class OrderStatusHandler(HandlerCompose, ContextMixin, OrderSenderMixin):
         self._order_proxies[status_new.gClOrdID]._order_stat = status_new
         # TODO patch of order proxies
         if status_new.ordStatus == OrderStatus.ALLTRADED.value or status_new.ordStatus == OrderStatus.CANCELLED.value:
+            timer = self._expiry.pop(status_new.gClOrdID, None)
+            if timer is not None:
+                timer.cancel()
             try:
                 self._open_orders[status_new.symbol].pop(status_new.gClOrdID, None)
             except KeyError:
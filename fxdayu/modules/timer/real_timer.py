@@ -1,6 +1,7 @@
 # encoding:utf-8
 from fxdayu.context import ContextMixin
 from fxdayu.event import TimeEvent, ScheduleEvent, EVENTS
+from fxdayu.modules.timer.timers import is_timer_rule, schedule_timer
 from fxdayu.utils.api_support import api_method
 from fxdayu.engine.handler import HandlerCompose
 from datetime import datetime
@@ -13,9 +14,13 @@ class RealTimer(HandlerCompose, ContextMixin):
 
         self._ahead = []
         self._behind = []
+        self._timed = []
 
     def init(self):
         super(RealTimer, self).init()
+        now = datetime.now()
+        for func, time_rule, topic in self._timed:
+            schedule_timer(self.engine, time_rule, topic, now)
         self.data.subscribe('tick')
         self.data.listen(self.put_time)
 
@@ -36,11 +41,15 @@ class RealTimer(HandlerCompose, ContextMixin):
 
     @api_method
     def time_schedule(self, func, time_rule, ahead=True):
-        if ahead:
+        if is_timer_rule(time_rule):
+            # datetime or timedelta, fired by the engine's timer wheel
+            topic = 'timer'+str(len(self._timed))
+            self.set_schedule(func, time_rule, topic, self._timed)
+        elif ahead:
             topic = 'ahead'+str(len(self._ahead))
             self.set_schedule(func, time_rule, topic, self._ahead)
         else:
-            topic = 'behind'+str(len(self._ahead))
+            topic = 'behind'+str(len(self._behind))
             self.set_schedule(func, time_rule, topic, self._behind)
 
     def set_schedule(self, func, time_rule, topic, l):
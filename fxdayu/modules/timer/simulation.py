@@ -1,5 +1,6 @@
 from fxdayu.context import ContextMixin
 from fxdayu.event import EVENTS, TimeEvent, ScheduleEvent, ExitEvent
+from fxdayu.modules.timer.timers import is_timer_rule, schedule_timer
 from fxdayu.utils.api_support import api_method
 
 
@@ -9,50 +10,94 @@ class TimeSimulation(ContextMixin):
         self.engine = engine
         self._ahead = []
         self._behind = []
+        self._timed = []
+        self._rules = None
 
     def link_context(self):
         self.environment['time_schedule'] = self.time_schedule
 
     @api_method
     def time_schedule(self, func, time_rule, ahead=True):
-        if ahead:
+        if is_timer_rule(time_rule):
+            # datetime or timedelta, fired by the engine's timer wheel
+            self._timed.append((func, time_rule))
+        elif ahead:
             self._ahead.append((func, time_rule))
         else:
             self._behind.append((func, time_rule))
 
-    def put_ahead(self):
-        head = 'ahead'
-        count = 0
-        for func, time_rule in self._ahead:
-            topic = head + str(count)
-            self.put_ruled(func, time_rule, topic)
-            count += 1
-
-    def put_ruled(self, func, time_rule, topic):
-        for time_ in self.data.all_time:
-            if time_rule(time_):
-                self.engine.put(ScheduleEvent(time_, topic))
-
+    def register_ruled(self, func, topic):
         def schedule(event, kwargs=None):
             func(self.context, self.data)
 
         self.engine.register(schedule, EVENTS.SCHEDULE, topic)
 
-    def put_behind(self):
-        head = 'behind'
-        count = 0
-        for func, time_rule in self._behind:
+    def register_schedules(self, head, schedules):
+        """
+        Register handlers of scheduled functions
+
+        Args:
+            head(str): 'ahead' or 'behind', prefix of schedule topics
+            schedules(list): list of (func, time_rule)
+
+        Returns:
+            list: list of (time_rule, topic)
+        """
+        rules = []
+        for count, (func, time_rule) in enumerate(schedules):
             topic = head + str(count)
-            self.put_ruled(func, time_rule, topic)
-            count += 1
+            self.register_ruled(func, topic)
+            rules.append((time_rule, topic))
+        return rules
 
-    def put_main(self):
-        for time_ in self.data.all_time:
-            self.engine.put(TimeEvent(time_, "bar.open"))
-            self.engine.put(TimeEvent(time_, "bar.close"))
-        self.engine.put(ExitEvent())
+    @staticmethod
+    def clock(times, ahead, behind, exit=True):
+        """
+        Generate clock events lazily: scheduled events ahead, bar.open and
+        bar.close TimeEvents and scheduled events behind for each time, then
+        an ExitEvent.
+
+        Args:
+            times(iterable): sorted bar times
+            ahead(list): list of (time_rule, topic) fired before the bar
+            behind(list): list of (time_rule, topic) fired after the bar
+            exit(bool): whether to end with an ExitEvent
+
+        Returns:
+            generator: clock events in order
+        """
+        for time_ in times:
+            for time_rule, topic in ahead:
+                if time_rule(time_):
+                    yield ScheduleEvent(time_, topic)
+            yield TimeEvent(time_, "bar.open")
+            yield TimeEvent(time_, "bar.close")
+            for time_rule, topic in behind:
+                if time_rule(time_):
+                    yield ScheduleEvent(time_, topic)
+        if exit:
+            yield ExitEvent()
 
     def put_time(self):
-        self.put_ahead()
-        self.put_main()
-        self.put_behind()
+        ahead = self.register_schedules('ahead', self._ahead)
+        behind = self.register_schedules('behind', self._behind)
+        times = self.data.all_time
+        if self._timed and len(times):
+            for time_rule, topic in self.register_schedules('timer', self._timed):
+                schedule_timer(self.engine, time_rule, topic, times[0])
+        self._rules = ahead, behind
+        self.engine.add_clock(self.clock(times, ahead, behind))
+
+    def extend_time(self, times):
+        """
+        Add clock events of bar times appended after put_time, for incremental
+        backtests with BacktestEngine.run_until.
+
+        Args:
+            times(iterable): sorted new bar times, later than those already put
+
+        Returns:
+            None
+        """
+        ahead, behind = self._rules
+        self.engine.add_clock(self.clock(times, ahead, behind, exit=False))
@@ -0,0 +1,48 @@
+# encoding:utf-8
+from datetime import datetime, timedelta
+
+from fxdayu.event import ScheduleEvent
+
+
+def is_timer_rule(time_rule):
+    """
+    定时任务的时间条件是否由引擎定时器触发：datetime为在该时间触发一次，
+    timedelta为每隔该时间触发一次；其他(如time_rules返回的函数)为逐个时间判断的条件。
+
+    Args:
+        time_rule: 定时任务的时间条件
+
+    Returns:
+        bool
+    """
+    return isinstance(time_rule, (datetime, timedelta))
+
+
+def schedule_timer(engine, time_rule, topic, start):
+    """
+    用引擎定时器按时间条件放入ScheduleEvent。
+    周期任务在引擎时钟跳过多个周期时(如日线回测中按小时的任务)只触发一次。
+
+    Args:
+        engine(fxdayu.engine.Engine): 事件驱动引擎
+        time_rule(datetime | timedelta): 时间条件
+        topic(str): ScheduleEvent的topic
+        start(datetime): 周期任务的起始时间
+
+    Returns:
+        fxdayu.engine.wheel.Timer: 第一次触发的定时器
+    """
+    if not isinstance(time_rule, timedelta):
+        return engine.put_at(time_rule, ScheduleEvent(time_rule, topic))
+
+    def fire(when):
+        engine.put(ScheduleEvent(when, topic))
+        now = engine.timers.time
+        when += time_rule
+        if now is not None and when <= now:
+            when += int((now - when).total_seconds() // time_rule.total_seconds()) * time_rule
+            while when <= now:
+                when += time_rule
+        engine.call_at(when, fire, when)
+
+    return engine.call_at(start + time_rule, fire, start + time_rule)
@@ -0,0 +1,45 @@
+# encoding:utf-8
+"""
+单元测试共用的辅助对象。
+"""
+import logging
+
+
+class NullContext(object):
+    """
+    不做任何事的上下文，用作不经过Trader创建的引擎的运行环境。
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class Collect(logging.Handler):
+    """
+    收集日志记录的logging.Handler，加在根logger上检查引擎输出的日志。
+
+    Attributes:
+        records(list): 收集到的logging.LogRecord
+    """
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+    @property
+    def messages(self):
+        return [record.getMessage() for record in self.records]
+
+    def __enter__(self):
+        logging.getLogger().addHandler(self)
+        return self
+
+    def __exit__(self, *args):
+        logging.getLogger().removeHandler(self)
+        return False
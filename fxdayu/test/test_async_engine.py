@@ -0,0 +1,126 @@
+# encoding:utf-8
+import threading
+import time
+import unittest
+from datetime import datetime
+
+from fxdayu.event import EVENTS, TickEvent, TimeEvent, CancelEvent, ExitEvent
+from fxdayu.test.support import NullContext, Collect
+
+try:
+    from fxdayu.engine import AsyncEngine
+except ImportError:
+    AsyncEngine = None
+
+
+@unittest.skipIf(AsyncEngine is None, "asyncio is not available")
+class AsyncEngineTest(unittest.TestCase):
+    """
+    处理函数返回的可等待对象完成后才调用工作流中的下一个处理函数，期间不处理其他事件。
+    """
+
+    def setUp(self):
+        self.engine = AsyncEngine()
+        self.engine.set_context(NullContext())
+        self.calls = []
+
+    def tearDown(self):
+        self.engine.loop.close()
+
+    def later(self, delay, result=None, error=None):
+        future = self.engine.loop.create_future()
+        if error is None:
+            self.engine.loop.call_later(delay, future.set_result, result)
+        else:
+            self.engine.loop.call_later(delay, future.set_exception, error)
+        return future
+
+    def test_awaiting_handler_blocks_chain_and_queue(self):
+        def waiting(event, kwargs):
+            self.calls.append(("waiting", event.data))
+            if event.data == 1:
+                # 等待期间从其他线程放入的事件排在本事件的工作流之后处理
+                threading.Thread(target=self.engine.put, args=(TickEvent(3, datetime(2016, 1, 4, 9, 31)),)).start()
+            return self.later(0.05)
+
+        def after(event, kwargs):
+            self.calls.append(("after", event.data))
+
+        self.engine.register(waiting, EVENTS.TICK, topic="", priority=1)
+        self.engine.register(after, EVENTS.TICK, topic="", priority=0)
+        self.engine.put(TickEvent(1, datetime(2016, 1, 4, 9, 30)))
+        self.engine.put(TickEvent(2, datetime(2016, 1, 4, 9, 30)))
+        self.engine.loop.call_later(0.5, self.engine.put, ExitEvent())
+        self.engine.run()
+        self.assertEqual(self.calls, [("waiting", 1), ("after", 1), ("waiting", 2), ("after", 2),
+                                      ("waiting", 3), ("after", 3)])
+
+    def test_run_blocking_result(self):
+        def fetch(event, kwargs):
+            future = self.engine.run_blocking(lambda: time.sleep(0.01) or event.data * 2)
+            future.add_done_callback(lambda f: self.calls.append(("fetched", f.result())))
+            return future
+
+        def after(event, kwargs):
+            self.calls.append(("after", event.data))
+
+        self.engine.register(fetch, EVENTS.TICK, topic="", priority=1)
+        self.engine.register(after, EVENTS.TICK, topic="", priority=0)
+        self.engine.put(TickEvent(21, datetime(2016, 1, 4, 9, 30)))
+        self.engine.loop.call_later(0.5, self.engine.put, ExitEvent())
+        self.engine.run()
+        self.assertEqual(self.calls, [("fetched", 42), ("after", 21)])
+
+    def test_failed_handler_logged_with_traceback(self):
+        self.engine.register(lambda event, kwargs: self.later(0.01, error=ValueError("broken")),
+                             EVENTS.TICK, topic="", priority=1)
+        self.engine.register(lambda event, kwargs: self.calls.append(event.data), EVENTS.TICK, topic="")
+        self.engine.put(TickEvent(1, datetime(2016, 1, 4, 9, 30)))
+        self.engine.put(TickEvent(2, datetime(2016, 1, 4, 9, 30)))
+        self.engine.loop.call_later(0.5, self.engine.put, ExitEvent())
+        with Collect() as collect:
+            self.engine.run()
+        # 出错的事件不再调用之后的处理函数，之后的事件照常处理
+        self.assertEqual(self.calls, [])
+        errors = [record for record in collect.records if record.exc_info is not None]
+        self.assertEqual(len(errors), 2)
+        self.assertIsInstance(errors[0].exc_info[1], ValueError)
+
+    def test_profiler_records_failed_handler(self):
+        def broken(event, kwargs):
+            raise ValueError("broken")
+
+        profiler = self.engine.enable_profiler()
+        self.engine.register(broken, EVENTS.TICK, topic="", priority=1)
+        self.engine.register(lambda event, kwargs: self.later(0.01), EVENTS.TICK, topic="")
+        self.engine.put(TickEvent(1, datetime(2016, 1, 4, 9, 30)))
+        self.engine.put(TickEvent(2, datetime(2016, 1, 4, 9, 30)))
+        self.engine.loop.call_later(0.5, self.engine.put, ExitEvent())
+        with Collect():
+            self.engine.run()
+        calls = {record["handler"]: record["calls"] for record in profiler.snapshot()["handler"]}
+        # 出错的处理函数同样计入调用次数，之后的处理函数不再调用
+        self.assertEqual(calls["broken"], 2)
+        self.assertNotIn("<lambda>", calls)
+
+    def test_timer_event_before_time_event(self):
+        def on_time(event, kwargs):
+            self.calls.append(("time", event.time))
+
+        def on_cancel(event, kwargs):
+            self.calls.append(("cancel", event.time))
+
+        moment = datetime(2016, 1, 5, 9, 30)
+        self.engine.register(on_time, EVENTS.TIME, topic="")
+        self.engine.register(on_cancel, EVENTS.CANCEL, topic="")
+        self.engine.put(TimeEvent(datetime(2016, 1, 4, 15)))
+        self.engine.put_at(datetime(2016, 1, 4, 23), CancelEvent(None, datetime(2016, 1, 4, 23)))
+        self.engine.put(TimeEvent(moment))
+        self.engine.put(ExitEvent())
+        self.engine.run()
+        self.assertEqual(self.calls, [("time", datetime(2016, 1, 4, 15)), ("cancel", datetime(2016, 1, 4, 23)),
+                                      ("time", moment)])
+
+
+if __name__ == '__main__':
+    unittest.main()
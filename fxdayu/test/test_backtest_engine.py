@@ -0,0 +1,93 @@
+# encoding:utf-8
+import unittest
+from datetime import datetime, timedelta
+
+from fxdayu.engine import BacktestEngine
+from fxdayu.event import EVENTS, TimeEvent, ScheduleEvent, OrderEvent, ExitEvent
+from fxdayu.test.support import NullContext
+
+START = datetime(2016, 1, 4, 9)
+
+
+def hours(*offsets):
+    return [START + timedelta(hours=offset) for offset in offsets]
+
+
+class RunUntilTest(unittest.TestCase):
+    """
+    run_until在第一个时间晚于给定时间的时钟事件前暂停，step处理正好n个事件，
+    暂停期间可以put事件和追加时钟，之后从暂停处继续运行。
+    """
+
+    def setUp(self):
+        self.engine = BacktestEngine()
+        self.engine.set_context(NullContext())
+        self.dispatched = []
+        self.engine.register(self.record, EVENTS.TIME, topic="")
+        self.engine.register(self.record, EVENTS.SCHEDULE, topic="")
+        self.engine.register(self.record, EVENTS.ORDER, topic="")
+        # 两个时钟惰性合并
+        self.engine.add_clock(TimeEvent(t) for t in hours(0, 2, 4, 6))
+        self.engine.add_clock(ScheduleEvent(t) for t in hours(1, 2, 5))
+
+    def record(self, event, kwargs=None):
+        self.dispatched.append((event.type, event.time))
+        if event.type == EVENTS.TIME and event.time == hours(2)[0]:
+            # 处理时放入的订单事件优先级更高，排在同一时间的时钟事件之前
+            self.engine.put(OrderEvent(None, event.time))
+
+    def test_run_until_stops_at_timestamp(self):
+        processed = self.engine.run_until(hours(2)[0])
+        self.assertEqual(self.dispatched, [
+            (EVENTS.TIME, hours(0)[0]), (EVENTS.SCHEDULE, hours(1)[0]), (EVENTS.TIME, hours(2)[0]),
+            (EVENTS.ORDER, hours(2)[0]), (EVENTS.SCHEDULE, hours(2)[0])
+        ])
+        self.assertEqual(processed, 5)
+        self.assertEqual(self.engine.next_event.time, hours(4)[0])
+        # 时间没有前进时不处理事件
+        self.assertEqual(self.engine.run_until(hours(3)[0]), 0)
+        self.assertEqual(self.engine.run_until(hours(4)[0]), 1)
+        self.assertEqual(self.dispatched[-1], (EVENTS.TIME, hours(4)[0]))
+        self.assertEqual(self.engine.run_until(hours(10)[0]), 2)
+        self.assertIsNone(self.engine.next_event)
+
+    def test_step(self):
+        for n in (1, 2, 3):
+            before = len(self.dispatched)
+            self.assertEqual(self.engine.step(n), n)
+            self.assertEqual(len(self.dispatched) - before, n)
+        # 剩下2个事件，超出的步数不处理
+        self.assertEqual(self.engine.step(5), 2)
+        self.assertEqual(len(self.dispatched), 8)
+        self.assertEqual(self.engine.step(), 0)
+
+    def test_alternate_with_put(self):
+        self.engine.step()
+        self.engine.put(OrderEvent(None, hours(0)[0]))
+        self.engine.put(ScheduleEvent(hours(3)[0]))
+        self.assertEqual(self.engine.step(), 1)
+        self.assertEqual(self.dispatched[-1], (EVENTS.ORDER, hours(0)[0]))
+        self.engine.run_until(hours(3)[0])
+        self.assertEqual(self.dispatched[-1], (EVENTS.SCHEDULE, hours(3)[0]))
+        self.assertEqual(self.engine.next_event.time, hours(4)[0])
+        # 追加的时钟与剩下的时钟合并
+        self.engine.add_clock(TimeEvent(t) for t in hours(5, 7))
+        self.engine.put(OrderEvent(None, hours(4)[0]))
+        self.assertEqual(self.engine.step(2), 2)
+        self.assertEqual(self.dispatched[-2:], [(EVENTS.ORDER, hours(4)[0]), (EVENTS.TIME, hours(4)[0])])
+        self.engine.run_until(hours(5)[0])
+        self.assertEqual(self.dispatched[-2:], [(EVENTS.SCHEDULE, hours(5)[0]), (EVENTS.TIME, hours(5)[0])])
+        self.engine.run()
+        self.assertEqual([time for _, time in self.dispatched[-2:]], hours(6, 7))
+
+    def test_exit_event(self):
+        self.engine.add_clock([ExitEvent()])
+        self.engine.run_until(hours(10)[0])
+        # ExitEvent的时间为创建时的当前时间，run_until暂停在它之前
+        self.assertEqual(self.engine.next_event.type, EVENTS.EXIT)
+        self.engine.step()
+        self.assertIsNone(self.engine.next_event)
+
+
+if __name__ == '__main__':
+    unittest.main()
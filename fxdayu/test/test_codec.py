@@ -0,0 +1,161 @@
+# encoding:utf-8
+import math
+import unittest
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from fxdayu.const import OrderSide, OrderAction, OrderType, OrderStatus, TimeInForce, EMPTY_STRING
+from fxdayu.engine.codec import encode, decode, event_fields
+from fxdayu.event import *
+from fxdayu.models.data import TickData, AccountData, PositionData, ExecutionData, LogData, ErrorData
+from fxdayu.models.order import OrderStatusData, OrderReq, CancelReq
+
+NOW = datetime(2016, 1, 4, 9, 30, 0, 500000)
+
+
+def tick_data():
+    tick = TickData()
+    tick.gateway, tick.exchange, tick.symbol = "CTP", None, u"螺纹钢1701"
+    tick.lastPrice, tick.volume, tick.openPrice = 2550.0, 123456, float("nan")
+    tick.askPrice[:5] = [2551, 2552, 2553, 2554, 2555]
+    tick.bidPrice[:3] = [2550, 2549, 2548]
+    tick.askVolume[:5] = tick.bidVolume[:5] = [10, 20, 30, 40, 50]
+    return tick
+
+
+def order_req():
+    order = OrderReq()
+    order.account, order.gateway, order.clOrdID, order.symbol = "BACKTEST", "CTP", 1, u"中文"
+    order.side, order.action, order.ordType = OrderSide.BUY, OrderAction.OPEN, OrderType.LIMIT
+    order.orderQty, order.price, order.transactTime = 10, float("nan"), NOW
+    order.timeInForce = TimeInForce.DAY
+    order.stopPx = None
+    return order
+
+
+def order_status():
+    status = OrderStatusData()
+    status.account, status.gateway, status.clOrdID, status.symbol = "BACKTEST", "CTP", 1, u"rb1701"
+    status.ordStatus, status.orderQty, status.orderTime = OrderStatus.ALLTRADED, 10, pd.Timestamp(NOW)
+    status.price = np.float64("nan")
+    status.text = None
+    return status
+
+
+def execution_data():
+    execution = ExecutionData()
+    execution.account, execution.clOrdID, execution.symbol = "BACKTEST", np.int64(1), u"rb1701"
+    execution.side, execution.time = OrderSide.SELL, NOW
+    execution.lastQty, execution.lastPx, execution.commission = 10, np.float64(2550.5), float("nan")
+    execution.gateway = None
+    return execution
+
+
+def position_data():
+    position = PositionData()
+    position.account, position.gateway, position.symbol = "BACKTEST", None, u"股票"
+    position.volume, position.avgPrice = 10, float("nan")
+    # 多出的属性和缺失的属性
+    position.note = {"a": [1, 2]}
+    del position.marketValue
+    return position
+
+
+def log_data():
+    log = LogData()
+    log.logTime = "2016-01-04 09:30:00"
+    log.logContent = u"日志"
+    return log
+
+
+def error_data():
+    error = ErrorData()
+    error.errorTime = "2016-01-04 09:30:00"
+    error.errorMsg = u"错误"
+    error.additionalInfo = None
+    return error
+
+
+def events():
+    return [
+        TickEvent(tick_data(), NOW, u"螺纹钢"),
+        BarEvent("000001", pd.Timestamp(NOW), 1.0, 2.0, float("nan"), 1.5, 100),
+        OrderEvent(order_req(), NOW),
+        CancelEvent(CancelReq(u"CTP.BACKTEST.1"), NOW),
+        ExecutionEvent(execution_data(), timestamp=NOW),
+        TimeEvent(pd.Timestamp(NOW), "bar.close"),
+        ScheduleEvent(NOW, "schedule"),
+        ConfigEvent(NOW, "config", a=1, b=None),
+        ExitEvent(),
+        AccountEvent(AccountData(), timestamp=NOW),
+        PositionEvent(position_data(), timestamp=NOW),
+        OrderStatusEvent(order_status(), timestamp=NOW),
+        LogEvent(log_data()),
+        ErrorEvent(error_data()),
+        InitEvent(timestamp=NOW),
+    ]
+
+
+class CodecTest(unittest.TestCase):
+    """
+    编码再解码得到类型、属性和值都相同的对象，包括None、NaN、unicode、numpy数组和缺失或多出的属性。
+    """
+
+    def assertSame(self, a, b):
+        if isinstance(a, np.generic):
+            # numpy的标量解码为python的int和float
+            a = a.item()
+        self.assertIs(type(a), type(b))
+        if isinstance(a, Event):
+            self.assertEqual(a.key, b.key)
+            for name in event_fields(type(a)):
+                self.assertEqual(hasattr(a, name), hasattr(b, name), name)
+                if hasattr(a, name):
+                    self.assertSame(getattr(a, name), getattr(b, name))
+        elif isinstance(a, np.ndarray):
+            np.testing.assert_array_equal(a, b)
+        elif isinstance(a, float) and math.isnan(a):
+            self.assertTrue(math.isnan(b))
+        elif type(a).__module__.startswith("fxdayu"):
+            self.assertEqual(sorted(a.__dict__), sorted(b.__dict__))
+            for name, value in a.__dict__.items():
+                # 导入fxdayu.models.dao后数据对象带有sqlalchemy的状态，解码后是另一个对象
+                if name != "_sa_instance_state":
+                    self.assertSame(value, b.__dict__[name])
+        else:
+            self.assertEqual(a, b)
+
+    def test_events(self):
+        for event in events():
+            self.assertSame(event, decode(encode(event)))
+
+    def test_data(self):
+        for data in [tick_data(), order_req(), order_status(), execution_data(), position_data(),
+                     CancelReq(None), AccountData(), log_data(), error_data()]:
+            self.assertSame(data, decode(encode(data)))
+
+    def test_tick_depth(self):
+        tick = decode(encode(tick_data()))
+        np.testing.assert_array_equal(tick.askPrice[:5], [2551, 2552, 2553, 2554, 2555])
+        self.assertTrue(np.isnan(tick.bidPrice[3:]).all())
+        self.assertEqual(tick.symbol, u"螺纹钢1701")
+        # 解码的数组可以修改
+        tick.askPrice[0] = 0
+
+    def test_same_type_different_values(self):
+        # 同一类型的字段值类型不同时各自解码
+        first, second = order_req(), order_req()
+        second.price, second.symbol, second.transactTime = 1, EMPTY_STRING, None
+        self.assertSame(first, decode(encode(first)))
+        self.assertSame(second, decode(encode(second)))
+        self.assertSame(first, decode(encode(first)))
+
+    def test_unregistered_pickled(self):
+        for obj in [[1, u"中文", None], {"a": float("inf")}]:
+            self.assertEqual(decode(encode(obj)), obj)
+
+
+if __name__ == '__main__':
+    unittest.main()
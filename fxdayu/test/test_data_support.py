@@ -0,0 +1,85 @@
+# encoding:utf-8
+import threading
+import time
+import unittest
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from pandas.util.testing import assert_frame_equal
+
+from fxdayu.data.data_support import MarketDataFreq
+from fxdayu.data.handler import DataHandler
+
+FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+class StubHandler(DataHandler):
+    """
+    内存中的行情，每次读取稍作等待使线程池中的读取交错进行，记录读取所在的线程。
+    """
+    db = None
+
+    def __init__(self, symbols, n=60, missing=()):
+        index = pd.date_range("2016-01-04 15:00", periods=n, freq="D", name="datetime")
+        rs = np.random.RandomState(0)
+        self.frames = {}
+        for k, symbol in enumerate(symbols):
+            # 各品种的起始时间不同
+            close = 10 + rs.randn(n - k % 5).cumsum() * 0.1
+            self.frames[symbol] = pd.DataFrame({"open": close, "high": close + 0.1, "low": close - 0.1,
+                                                "close": close, "volume": rs.randint(1, 100, n - k % 5) * 100.},
+                                               index=index[k % 5:])
+        self.missing = set(missing)
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def read(self, collection, db=None, index="datetime", start=None, end=None, length=None, projection=None,
+             **kwargs):
+        with self._lock:
+            self.threads.add(threading.current_thread().name)
+        # 后面的品种先读完
+        time.sleep(0.002 * (len(self.frames) - sorted(self.frames).index(collection)))
+        if collection in self.missing:
+            raise KeyError(index)
+        frame = self.frames[collection]
+        if start:
+            frame = frame[frame.index >= start]
+        if end:
+            frame = frame[frame.index <= end]
+        return frame[[column for column in (projection or frame.columns) if column != index]]
+
+
+class ParallelInitTest(unittest.TestCase):
+    """
+    线程池同时读取各品种的结果与逐个读取相同，进度按品种顺序报告。
+    """
+
+    def load(self, workers):
+        symbols = ["%06d" % i for i in range(12)]
+        handler = StubHandler(symbols, missing=["000005"])
+        data = MarketDataFreq(handler)
+        progress = []
+        data.init(symbols, "D", datetime(2016, 1, 1), workers=workers,
+                  progress=lambda done, total, symbol: progress.append((done, total, symbol)))
+        return data, handler, progress
+
+    def test_same_as_serial(self):
+        serial, serial_handler, serial_progress = self.load(1)
+        parallel, parallel_handler, parallel_progress = self.load(4)
+        self.assertEqual(len(serial_handler.threads), 1)
+        self.assertGreater(len(parallel_handler.threads), 1)
+
+        self.assertEqual(parallel_progress, serial_progress)
+        self.assertEqual([symbol for _, _, symbol in serial_progress], ["%06d" % i for i in range(12)])
+        self.assertEqual(sorted(parallel._store.symbols()), sorted(serial._store.symbols()))
+        self.assertNotIn("000005", parallel._store)
+        for symbol in serial._store.symbols():
+            assert_frame_equal(parallel._store[symbol].get(slice(None), FIELDS),
+                               serial._store[symbol].get(slice(None), FIELDS))
+        self.assertTrue(parallel._all_time.equals(serial._all_time))
+        self.assertEqual(dict(parallel._db), dict(serial._db))
+
+
+if __name__ == '__main__':
+    unittest.main()
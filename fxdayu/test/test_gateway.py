@@ -0,0 +1,147 @@
+# encoding:utf-8
+import threading
+import unittest
+
+from fxdayu.engine import Engine
+from fxdayu.engine.journal import loads
+from fxdayu.engine.ring import SharedRing, RingFull, RingEmpty
+from fxdayu.environment import Environment
+from fxdayu.event import EVENTS, ExecutionEvent, OrderStatusEvent
+from fxdayu.gateway import Gateway, ProcessGateway
+from fxdayu.models.data import ExecutionData
+from fxdayu.models.order import OrderReq, CancelReq, OrderStatusData
+
+
+class SharedRingTest(unittest.TestCase):
+    """
+    记录按写入顺序完整读出，跨越缓冲区末尾时拆成两段写入和读出。
+    """
+
+    def test_wraparound(self):
+        ring = SharedRing(64)
+        records = [(b"%d" % i) * (i % 7) for i in range(500)]
+        for record in records:
+            ring.put(record)
+            self.assertEqual(ring.get(), record)
+        self.assertEqual(len(ring), 0)
+
+    def test_wraparound_with_backlog(self):
+        ring = SharedRing(64)
+        written = []
+        read = []
+        for i in range(300):
+            record = (b"%02d" % (i % 100)) * (i % 5)
+            while True:
+                try:
+                    ring.put(record, timeout=0)
+                    break
+                except RingFull:
+                    read.append(ring.get())
+            written.append(record)
+        while len(ring):
+            read.append(ring.get())
+        self.assertEqual(read, written)
+
+    def test_threads(self):
+        ring = SharedRing(64)
+        records = [(b"x%d" % i) * (i % 5) for i in range(2000)]
+        read = []
+        reader = threading.Thread(target=lambda: read.extend(ring.get() for _ in records))
+        reader.start()
+        for record in records:
+            ring.put(record)
+        reader.join()
+        self.assertEqual(read, records)
+
+    def test_full_and_empty(self):
+        ring = SharedRing(16, spin_tries=0, sleep=0.001)
+        self.assertRaises(RingEmpty, ring.get, 0.01)
+        ring.put(b"12345678")
+        # 4字节长度加8字节数据，剩余4字节
+        self.assertEqual(len(ring), 12)
+        self.assertRaises(RingFull, ring.put, b"1", 0.01)
+        ring.put(b"")
+        self.assertEqual(ring.get(), b"12345678")
+        self.assertEqual(ring.get(), b"")
+        self.assertRaises(RingEmpty, ring.get, 0.01)
+
+    def test_oversize(self):
+        ring = SharedRing(16)
+        ring.put(b"x" * 12)
+        self.assertRaises(ValueError, ring.put, b"x" * 13)
+        self.assertEqual(ring.get(), b"x" * 12)
+
+
+class EchoGateway(Gateway):
+    """
+    收到下单时回报成交，收到撤单时回报撤单状态。
+    """
+
+    def send_order(self, order):
+        execution = ExecutionData()
+        execution.clOrdID = order.clOrdID
+        execution.symbol = order.symbol
+        self.eventEngine.put(ExecutionEvent(execution))
+
+    def cancel_order(self, cancel):
+        status = OrderStatusData()
+        status.clOrdID = cancel.orderID
+        self.eventEngine.put(OrderStatusEvent(status))
+
+    def close(self):
+        pass
+
+
+class ProcessGatewayTest(unittest.TestCase):
+    """
+    下单和撤单请求经环形缓冲区发往网关进程，回报由读取线程放入本进程的引擎并填写账户号。
+    """
+
+    def setUp(self):
+        self.engine = Engine()
+        self.engine.set_context(threading.Lock())
+        self.received = []
+        self.done = threading.Event()
+        self.engine.register(self.on_event, EVENTS.EXECUTION, topic="")
+        self.engine.register(self.on_event, EVENTS.ORD_STATUS, topic="")
+        self.gateway = ProcessGateway(self.engine, "ECHO", EchoGateway, capacity=1 << 16)
+        context = Environment()
+        context.account = Environment()
+        context.account.id = "ACCOUNT"
+        self.gateway.set_context(context)
+
+    def on_event(self, event, kwargs=None):
+        self.received.append(event)
+        if len(self.received) == 2:
+            self.done.set()
+
+    def test_send_and_cancel(self):
+        extra = self.gateway.add_consumer()
+        self.gateway.start()
+        self.engine.start()
+        try:
+            order = OrderReq()
+            order.clOrdID, order.symbol = 1, "000001"
+            self.gateway.send_order(order)
+            self.assertEqual(order.gateway, "ECHO")
+            self.gateway.cancel_order(CancelReq(1))
+            self.assertTrue(self.done.wait(10))
+        finally:
+            self.gateway.close(10)
+            self.engine.stop()
+        self.assertFalse(self.gateway._process.is_alive())
+        execution, status = self.received
+        self.assertEqual(execution.type, EVENTS.EXECUTION)
+        self.assertEqual((execution.data.clOrdID, execution.data.symbol, execution.data.account),
+                         (1, "000001", "ACCOUNT"))
+        self.assertEqual(status.type, EVENTS.ORD_STATUS)
+        self.assertEqual((status.data.clOrdID, status.data.account), (1, "ACCOUNT"))
+        # 另一个读取方收到同样的回报，最后是网关进程退出的空记录
+        records = [extra.get(1) for _ in range(3)]
+        self.assertEqual([loads(data).type for data in records[:2]], [EVENTS.EXECUTION, EVENTS.ORD_STATUS])
+        self.assertEqual(records[2], b"")
+        self.assertRaises(RuntimeError, self.gateway.add_consumer)
+
+
+if __name__ == '__main__':
+    unittest.main()
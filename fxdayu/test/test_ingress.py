@@ -0,0 +1,147 @@
+# encoding:utf-8
+import unittest
+from datetime import datetime
+
+from fxdayu.engine import BacktestEngine
+from fxdayu.engine.ingress import TickIngress, PositionIngress, AccountIngress
+from fxdayu.event import EVENTS, TickEvent, PositionEvent, AccountEvent
+from fxdayu.models.data import PositionData, AccountData
+from fxdayu.test.support import NullContext
+
+
+def time(minute):
+    return datetime(2016, 1, 4, 9, minute)
+
+
+def position(symbol, side, volume, account="A1"):
+    data = PositionData()
+    data.gateway, data.account, data.symbol, data.side, data.volume = "CTP", account, symbol, side, volume
+    return data
+
+
+def account(account_id, balance, gateway="CTP"):
+    data = AccountData()
+    data.gateway, data.accountID, data.balance = gateway, account_id, balance
+    return data
+
+
+class IngressTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = BacktestEngine()
+        self.engine.set_context(NullContext())
+        self.dispatched = []
+
+    def listen(self, stream):
+        self.engine.register(lambda event, kwargs=None: self.dispatched.append(event), stream, topic=".")
+
+
+class TickIngressTest(IngressTestCase):
+    """
+    同一品种的tick在处理前只保留一个待处理事件，数据和时间为最新的tick。
+    """
+
+    def setUp(self):
+        super(TickIngressTest, self).setUp()
+        self.ingress = TickIngress(self.engine)
+        self.ingress.register()
+        self.listen(EVENTS.TICK)
+
+    def test_merge_by_topic(self):
+        for i in range(5):
+            self.ingress.put(TickEvent(("a", i), time(i), "a"))
+        self.ingress.put(TickEvent(("b", 0), time(0), "b"))
+        self.assertEqual((self.ingress.merged, self.ingress.pending), (4, 2))
+        self.engine.run()
+        self.assertEqual([(event.topic, event.data, event.time) for event in self.dispatched],
+                         [("a", ("a", 4), time(4)), ("b", ("b", 0), time(0))])
+        self.assertEqual(self.ingress.pending, 0)
+
+    def test_merged_event_keeps_queue_position(self):
+        # 合并只覆盖数据和时间，事件的排序键仍为第一次放入时的，排在之后放入的事件之前
+        first = TickEvent(1, time(0), "a")
+        key = first.key
+        self.ingress.put(first)
+        self.ingress.put(TickEvent(1, time(1), "b"))
+        self.ingress.put(TickEvent(2, time(5), "a"))
+        self.assertEqual(first.key, key)
+        self.engine.run()
+        self.assertEqual([(event.topic, event.data, event.time) for event in self.dispatched],
+                         [("a", 2, time(5)), ("b", 1, time(1))])
+
+    def test_put_after_release(self):
+        def put_more(event, kwargs=None):
+            if event.data == 0:
+                # 处理中的事件已移出待处理表，同品种的新tick重新放入队列
+                self.ingress.put(TickEvent(1, time(1), "a"))
+                self.ingress.put(TickEvent(2, time(2), "a"))
+
+        self.engine.register(put_more, EVENTS.TICK, topic="")
+        self.ingress.put(TickEvent(0, time(0), "a"))
+        self.engine.run()
+        self.assertEqual([event.data for event in self.dispatched], [0, 2])
+        self.assertEqual(self.ingress.merged, 1)
+
+    def test_maxsize(self):
+        ingress = TickIngress(BacktestEngine(), maxsize=2)
+        for symbol in "abc":
+            ingress.put(TickEvent(0, time(0), symbol))
+        # 已有的key仍然合并，新的key被丢弃
+        ingress.put(TickEvent(1, time(1), "a"))
+        ingress.put(TickEvent(1, time(1), "c"))
+        self.assertEqual((ingress.pending, ingress.merged, ingress.dropped), (2, 1, 2))
+        ingress.reset_counts()
+        self.assertEqual((ingress.merged, ingress.dropped), (0, 0))
+
+
+class PositionIngressTest(IngressTestCase):
+    """
+    持仓按(gateway, account, symbol, side)合并，不同方向或账户的持仓各自保留。
+    """
+
+    def setUp(self):
+        super(PositionIngressTest, self).setUp()
+        self.ingress = PositionIngress(self.engine)
+        self.ingress.register()
+        self.listen(EVENTS.POSITION)
+
+    def test_merge_by_position_key(self):
+        puts = [
+            position("rb1701", "long", 1), position("rb1701", "short", 5), position("rb1701", "long", 2),
+            position("rb1701", "long", 1, "A2"), position("rb1701", "long", 3), position("rb1701", "short", 6),
+        ]
+        for i, data in enumerate(puts):
+            self.ingress.put(PositionEvent(data, timestamp=time(i), topic=data.symbol))
+        self.assertEqual(self.ingress.merged, 3)
+        self.engine.run()
+        # 按第一次放入的顺序处理，每个持仓为最新的数据
+        self.assertEqual([(event.data.account, event.data.side, event.data.volume, event.time)
+                          for event in self.dispatched],
+                         [("A1", "long", 3, time(4)), ("A1", "short", 6, time(5)), ("A2", "long", 1, time(3))])
+
+
+class AccountIngressTest(IngressTestCase):
+    """
+    账户按(gateway, accountID)合并。
+    """
+
+    def setUp(self):
+        super(AccountIngressTest, self).setUp()
+        self.ingress = AccountIngress(self.engine)
+        self.ingress.register()
+        self.listen(EVENTS.ACCOUNT)
+
+    def test_merge_by_account_key(self):
+        puts = [account("A1", 100), account("A2", 200), account("A1", 101, "IB"), account("A1", 102),
+                account("A2", 201)]
+        for i, data in enumerate(puts):
+            self.ingress.put(AccountEvent(data, timestamp=time(i), topic=data.gateway))
+        self.assertEqual((self.ingress.merged, self.ingress.pending), (2, 3))
+        self.engine.run()
+        self.assertEqual([(event.data.gateway, event.data.accountID, event.data.balance)
+                          for event in self.dispatched],
+                         [("CTP", "A1", 102), ("CTP", "A2", 201), ("IB", "A1", 101)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# encoding:utf-8
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from fxdayu.engine import BacktestEngine
+from fxdayu.engine.ingress import TickIngress
+from fxdayu.engine.journal import read_journal, replay
+from fxdayu.event import EVENTS, TimeEvent, TickEvent, ExitEvent
+from fxdayu.test.support import NullContext
+
+
+class Recorder(object):
+
+    def __init__(self, engine):
+        self.calls = []
+        for stream in (EVENTS.TIME, EVENTS.TICK):
+            engine.register(self.on_event, stream, topic=".", priority=0)
+
+    def on_event(self, event, kwargs=None):
+        self.calls.append((event.type, event.topic, event.time, event.data if event.type == EVENTS.TICK else None))
+
+
+class JournalRoundTripTest(unittest.TestCase):
+    """
+    记录的事件按处理顺序重放，处理函数收到的事件序列与记录时相同。
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "events.journal")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self):
+        engine = BacktestEngine()
+        engine.set_context(NullContext())
+        engine.enable_journal(self.path)
+        ingress = TickIngress(engine)
+        ingress.register()
+        recorder = Recorder(engine)
+
+        def on_time(event, kwargs=None):
+            # 同一topic的第二个tick在第一个尚未处理时合并到第一个事件上
+            for i in range(2):
+                ingress.put(TickEvent(event.time.minute * 10 + i, event.time + timedelta(seconds=i), "000001"))
+            ingress.put(TickEvent(-1, event.time, "600016"))
+
+        engine.register(on_time, EVENTS.TIME, topic="", priority=100)
+        start = datetime(2016, 1, 4, 9, 30)
+        engine.add_clock([TimeEvent(start + timedelta(minutes=i), "bar.open") for i in range(5)] + [ExitEvent()])
+        engine.run()
+        engine.disable_journal()
+        return recorder.calls, ingress.merged
+
+    def test_replay_same_calls(self):
+        recorded, merged = self.record()
+        self.assertEqual(merged, 5)
+        # 记录的是合并后的数据
+        ticks = [call for call in recorded if call[1] == "000001"]
+        self.assertEqual([call[3] for call in ticks], [(30 + i) * 10 + 1 for i in range(5)])
+
+        engine = BacktestEngine()
+        engine.set_context(NullContext())
+        recorder = Recorder(engine)
+        replay(engine, self.path)
+        engine.run()
+        self.assertEqual(recorder.calls, recorded)
+
+    def test_journal_in_dispatch_order(self):
+        recorded, _ = self.record()
+        events = [event for event in read_journal(self.path) if event.type != EVENTS.EXIT]
+        self.assertEqual([(event.type, event.topic, event.time) for event in events],
+                         [call[:3] for call in recorded])
+
+
+if __name__ == '__main__':
+    unittest.main()
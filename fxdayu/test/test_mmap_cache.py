@@ -0,0 +1,133 @@
+# encoding:utf-8
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from fxdayu.data.mmap_cache import MmapCacheHandler
+
+
+class MemoryHandler(object):
+    """
+    内存中的单表数据库，查询语义与MongoHandler.read相同，记录查询次数和返回的记录数。
+    """
+    db = None
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.calls = 0
+        self.rows = 0
+
+    def read(self, collection, db=None, index='datetime', start=None, end=None, length=None, projection=None,
+             **kwargs):
+        self.calls += 1
+        frame = self.frame
+        if start is not None:
+            frame = frame[frame.index >= start]
+            if end is not None:
+                frame = frame[frame.index <= end]
+            elif length:
+                frame = frame.iloc[:length]
+        else:
+            if end is not None:
+                frame = frame[frame.index <= end]
+            if length:
+                frame = frame.iloc[-length:]
+        if not len(frame):
+            raise KeyError(index)
+        self.rows += len(frame)
+        return frame[sorted(c for c in (projection or frame.columns) if c != index)]
+
+
+class OpenEndedCoverageTest(unittest.TestCase):
+    """
+    不指定结束时间的查询只覆盖到当时最后一条记录，之后追加到数据库的记录仍能读到。
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        index = pd.date_range('2016-01-04', periods=100, freq='H', name='datetime')
+        self.full = pd.DataFrame({'close': np.arange(100.), 'volume': np.arange(100.)}, index=index)
+        self.db = MemoryHandler(self.full.iloc[:50])
+        self.cache = MmapCacheHandler(self.db, self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_appended_bars_are_read(self):
+        index = self.full.index
+        self.assertEqual(len(self.cache.read('s', start=index[10])), 40)
+        self.db.frame = self.full
+        self.assertEqual(len(self.cache.read('s', start=index[49])), 51)
+        self.assertEqual(self.cache.read('s', length=5).index[-1], index[-1])
+
+    def test_closed_query_served_from_cache(self):
+        index = self.full.index
+        self.cache.read('s', start=index[10])
+        calls = self.db.calls
+        result = self.cache.read('s', start=index[20], end=index[40])
+        self.assertEqual(self.db.calls, calls)
+        self.assertTrue(result.equals(self.full.iloc[20:41]))
+
+
+class OpenEndedReadTest(unittest.TestCase):
+    """
+    不指定结束时间的查询从缓存读取已缓存的部分，只向数据库查询之后的记录，没有新记录时不改写缓存。
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        index = pd.date_range('2016-01-04', periods=100, freq='H', name='datetime')
+        self.full = pd.DataFrame({'close': np.arange(100.), 'volume': np.arange(100.)}, index=index)
+        self.db = MemoryHandler(self.full.iloc[:50])
+        self.cache = MmapCacheHandler(self.db, self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def generation(self):
+        with open(os.path.join(self.root, '_', 's', 'manifest.json')) as f:
+            return json.load(f)['generation']
+
+    def test_repeated_reads(self):
+        index = self.full.index
+        self.cache.read('s')
+        generation = self.generation()
+        calls, rows = self.db.calls, self.db.rows
+        for start in (None, index[10], index[20], index[49]):
+            result = self.cache.read('s', start=start)
+            self.assertTrue(result.equals(self.full.iloc[:50].loc[start:]))
+        # 每次只查询缓存最后一条记录之后是否有新记录，数据库只返回最后一条
+        self.assertEqual(self.db.calls, calls + 4)
+        self.assertEqual(self.db.rows, rows + 4)
+        self.assertEqual(self.generation(), generation)
+
+    def test_appended_bars_fetched_once(self):
+        index = self.full.index
+        self.cache.read('s', start=index[10])
+        generation = self.generation()
+        self.db.frame = self.full.iloc[:60]
+        rows = self.db.rows
+        result = self.cache.read('s', start=index[20])
+        self.assertTrue(result.equals(self.full.iloc[20:60]))
+        # 只从数据库读取新增的记录，以及与缓存最后一条重叠的一条
+        self.assertEqual(self.db.rows, rows + 11)
+        self.assertNotEqual(self.generation(), generation)
+
+        generation = self.generation()
+        result = self.cache.read('s', start=index[10], projection=['close'])
+        self.assertTrue(result.equals(self.full.iloc[10:60][['close']]))
+        self.assertEqual(self.db.rows, rows + 12)
+        self.assertEqual(self.generation(), generation)
+        # 新增的记录同样可以由确定范围的查询读取
+        calls = self.db.calls
+        self.assertTrue(self.cache.read('s', start=index[55], end=index[59]).equals(self.full.iloc[55:60]))
+        self.assertEqual(self.db.calls, calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
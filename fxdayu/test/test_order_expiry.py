@@ -0,0 +1,103 @@
+# encoding:utf-8
+import unittest
+from datetime import datetime
+
+from fxdayu.const import TimeInForce
+from fxdayu.engine import BacktestEngine, Engine
+from fxdayu.event import EVENTS, TimeEvent, OrderEvent, CancelEvent, ExitEvent
+from fxdayu.models.order import OrderReq, CancelReq
+from fxdayu.modules.order.handlers import OrderStatusHandler
+from fxdayu.test.support import NullContext
+
+
+class StandInExchange(object):
+    """
+    按PaperExchange的工作流位置撮合：ORDER事件挂单，bar.open的TimeEvent以开盘价成交所有挂单，
+    CANCEL事件撤单。下单时按OrderStatusHandler.on_order的方式设置过期撤单。
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.now = None
+        self.orders = {}
+        self.filled = []
+        self.cancelled = []
+        engine.register(self.on_time, EVENTS.TIME, topic="", priority=10000)
+        engine.register(self.on_order_status, EVENTS.ORDER, topic="", priority=0)
+        engine.register(self.on_order, EVENTS.ORDER, topic=".", priority=-200)
+        engine.register(self.on_open, EVENTS.TIME, topic="bar.open", priority=200)
+        engine.register(self.on_cancel, EVENTS.CANCEL, priority=0)
+
+    def on_time(self, event, kwargs=None):
+        self.now = event.time
+
+    def on_order_status(self, event, kwargs=None):
+        order = event.data
+        expire_time = OrderStatusHandler._expire_time(order, self.now)
+        if expire_time is not None:
+            self.engine.put_at(expire_time, CancelEvent(CancelReq(order.gClOrdID), expire_time))
+
+    def on_order(self, event, kwargs=None):
+        self.orders[event.data.gClOrdID] = event.data
+
+    def on_open(self, event, kwargs=None):
+        for order_id in list(self.orders):
+            self.filled.append((order_id, event.time))
+            del self.orders[order_id]
+
+    def on_cancel(self, event, kwargs=None):
+        if self.orders.pop(event.data.orderID, None) is not None:
+            self.cancelled.append((event.data.orderID, event.time))
+
+
+def make_order(cl_ord_id, time_in_force):
+    order = OrderReq()
+    order.gateway = "BACKTEST"
+    order.account = "BACKTEST"
+    order.clOrdID = cl_ord_id
+    order.symbol = "000001"
+    order.orderQty = 100
+    order.price = 100.0
+    order.timeInForce = time_in_force
+    return order
+
+
+class OrderExpiryTest(unittest.TestCase):
+    """
+    收盘后下的DAY限价单在当日结束时过期，不能在下一交易日开盘成交。
+    """
+
+    def run_session(self, engine, time_in_force):
+        engine.set_context(NullContext())
+        exchange = StandInExchange(engine)
+
+        def send(event, kwargs=None):
+            if event.time == datetime(2016, 1, 4, 15):
+                engine.put(OrderEvent(make_order("1", time_in_force), event.time))
+
+        engine.register(send, EVENTS.TIME, topic="bar.close", priority=0)
+        engine.add_clock([
+            TimeEvent(datetime(2016, 1, 4, 9, 30), "bar.open"),
+            TimeEvent(datetime(2016, 1, 4, 15), "bar.close"),
+            TimeEvent(datetime(2016, 1, 5, 9, 30), "bar.open"),
+            TimeEvent(datetime(2016, 1, 5, 15), "bar.close"),
+            ExitEvent()
+        ])
+        engine.run()
+        return exchange
+
+    def test_day_order_expires_before_next_open(self):
+        for engine_type in (BacktestEngine, Engine):
+            exchange = self.run_session(engine_type(), TimeInForce.DAY.value)
+            self.assertEqual(exchange.filled, [])
+            self.assertEqual([order_id for order_id, _ in exchange.cancelled], ["BACKTEST.BACKTEST.1"])
+
+    def test_order_without_expiry_fills_at_next_open(self):
+        for engine_type in (BacktestEngine, Engine):
+            exchange = self.run_session(engine_type(), "")
+            self.assertEqual(exchange.filled, [("BACKTEST.BACKTEST.1", datetime(2016, 1, 5, 9, 30))])
+            self.assertEqual(exchange.cancelled, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+# encoding:utf-8
+import time
+import unittest
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from fxdayu.engine import BacktestEngine
+from fxdayu.event import EVENTS, TimeEvent, ScheduleEvent, TickEvent, ExitEvent
+from fxdayu.test.support import NullContext, Collect
+
+
+def first(event, kwargs=None):
+    pass
+
+
+def broken(event, kwargs=None):
+    raise ValueError("broken")
+
+
+class ProfilerErrorTest(unittest.TestCase):
+    """
+    开启性能统计时，处理函数出错的日志记录出错的处理函数。
+    """
+
+    def run_engine(self, profile):
+        engine = BacktestEngine()
+        engine.set_context(NullContext())
+        if profile:
+            engine.enable_profiler()
+        engine.register(first, EVENTS.TIME, topic="", priority=1)
+        engine.register(broken, EVENTS.TIME, topic="", priority=0)
+        engine.add_clock([TimeEvent(datetime(2016, 1, 4, 15)), ExitEvent()])
+        with Collect() as collect:
+            engine.run()
+        return [message for message in collect.messages if message.startswith("error occurs when in handler")]
+
+    def test_failing_handler_logged(self):
+        for profile in (False, True):
+            self.assertEqual(self.run_engine(profile), ["error occurs when in handler: %s" % broken])
+
+
+class ProfilerStatsTest(unittest.TestCase):
+    """
+    记录每个处理函数的调用次数和耗时，以及每类事件出队时的队列长度和在队列中等待的时间。
+    """
+
+    def setUp(self):
+        self.engine = BacktestEngine()
+        self.engine.set_context(NullContext())
+        self.profiler = self.engine.enable_profiler()
+
+    def on_time(self, event, kwargs=None):
+        # 每个时钟事件放入两个事件，第一个出队时队列中还有一个
+        self.engine.put(ScheduleEvent(event.time, "a"))
+        self.engine.put(ScheduleEvent(event.time, "a"))
+
+    @staticmethod
+    def on_schedule(event, kwargs=None):
+        time.sleep(0.005)
+
+    def test_stats(self):
+        self.engine.register(self.on_time, EVENTS.TIME, topic="")
+        self.engine.register(self.on_schedule, EVENTS.SCHEDULE, topic="")
+        self.engine.add_clock([TimeEvent(datetime(2016, 1, 4 + i, 15)) for i in range(3)] + [ExitEvent()])
+        self.engine.run()
+
+        handlers = {(record["stream"], record["handler"]): record for record in self.profiler.snapshot()["handler"]}
+        on_time = handlers[("TIME", "ProfilerStatsTest.on_time")]
+        on_schedule = handlers[("SCHEDULE", "on_schedule")]
+        self.assertEqual(on_time["calls"], 3)
+        self.assertEqual(on_schedule["calls"], 6)
+        self.assertGreaterEqual(on_schedule["total"], 6 * 0.005)
+        self.assertGreaterEqual(on_schedule["max"], 0.005)
+        self.assertLessEqual(on_schedule["max"], on_schedule["total"])
+        self.assertGreater(on_schedule["total"], on_time["total"])
+
+        events = {record["stream"]: record for record in self.profiler.snapshot()["event"]}
+        self.assertEqual(events["TIME"]["count"], 3)
+        self.assertEqual(events["TIME"]["depth_max"], 0)
+        # 时钟事件不经过队列，没有等待时间
+        self.assertIsNone(events["TIME"]["age_mean"])
+        schedule = events["SCHEDULE"]
+        self.assertEqual(schedule["count"], 6)
+        self.assertEqual(schedule["depth_max"], 1)
+        self.assertEqual(schedule["depth_mean"], 0.5)
+        # 第二个事件等待第一个事件处理完
+        self.assertGreaterEqual(schedule["age_max"], 0.005)
+        self.assertLessEqual(schedule["age_mean"], schedule["age_max"])
+        self.assertEqual(self.profiler._put_time, {})
+
+        frame = self.profiler.to_frame()
+        self.assertEqual(list(frame.columns), ["stream", "topic", "handler", "calls", "total", "mean", "max"])
+        self.assertEqual(frame["handler"].iloc[0], "on_schedule")
+        self.assertEqual(self.profiler.to_frame("event").shape, (3, 7))
+
+    def test_merged_events_not_kept(self):
+        from fxdayu.engine.ingress import TickIngress
+
+        ingress = TickIngress(self.engine)
+        ingress.register()
+        ticks = []
+        self.engine.register(lambda event, kwargs=None: ticks.append(event.data), EVENTS.TICK, topic=".")
+        for i in range(5):
+            ingress.put(TickEvent(i, datetime(2016, 1, 4, 9, 30), "000001"))
+        ingress.put(TickEvent(0, datetime(2016, 1, 4, 9, 30), "600016"))
+        self.assertEqual(ingress.merged, 4)
+        self.assertEqual(len(self.profiler._put_time), 2)
+        self.engine.run()
+        self.assertEqual(ticks, [4, 0])
+        self.assertEqual(self.profiler._put_time, {})
+        events = {record["topic"]: record for record in self.profiler.snapshot()["event"]}
+        self.assertEqual(events["000001"]["count"], 1)
+        self.assertIsNotNone(events["000001"]["age_max"])
+
+
+class MemoryClient(object):
+    """
+    内存中的日线行情，代替数据库供DataSupport读取。
+    """
+    db = None
+
+    def __init__(self, symbols, n=60):
+        index = pd.date_range("2016-01-04 15:00", periods=n, freq="D", name="datetime")
+        rs = np.random.RandomState(0)
+        self.frames = {}
+        for symbol in symbols:
+            close = 10 + rs.randn(n).cumsum() * 0.1
+            self.frames[symbol] = pd.DataFrame({"open": close, "high": close + 0.1, "low": close - 0.1,
+                                                "close": close, "volume": np.ones(n) * 1000.}, index=index)
+
+    def read(self, collection, db=None, index="datetime", start=None, end=None, length=None, projection=None,
+             **kwargs):
+        frame = self.frames[collection]
+        if start:
+            frame = frame[frame.index >= start]
+        if end:
+            frame = frame[frame.index <= end]
+        if length:
+            frame = frame.iloc[-length:]
+        return frame[[column for column in (projection or frame.columns) if column != index]]
+
+    def write(self, *args, **kwargs):
+        pass
+
+    inplace = write
+
+
+STRATEGY = """
+def initialize(context, data):
+    context.count = 0
+
+def handle_data(context, data):
+    context.count += 1
+    for symbol in ["000001", "600016"]:
+        order_target_percent(symbol, 0.4 if context.count % 10 < 5 else 0.0)
+"""
+
+
+class TraderProfileTest(unittest.TestCase):
+    """
+    以profile=True创建的Trader回测后，Trader.profile返回各处理函数和各类事件的统计。
+    """
+
+    def test_back_test(self):
+        from fxdayu.data.data_support import DataSupport
+        from fxdayu.trader.component import Component
+        from fxdayu.trader.packages import DEVELOP_MODE
+        from fxdayu.trader.trader import Trader
+
+        symbols = ["000001", "600016"]
+        settings = OrderedDict(DEVELOP_MODE)
+        settings["data"] = Component("data", DataSupport, (Component.Lazy("context"),),
+                                     {"client": MemoryClient(symbols)})
+        trader = Trader(settings, profile=True)
+        trader.initialize()
+        trader.back_test(STRATEGY, symbols, "D", datetime(2016, 1, 1), raw_code=True)
+
+        handlers = trader.profile()
+        self.assertEqual(list(handlers.columns), ["stream", "topic", "handler", "calls", "total", "mean", "max"])
+        self.assertGreater(len(handlers), 0)
+        self.assertTrue((handlers["total"].diff().dropna() <= 0).all())
+        self.assertTrue((handlers["max"] <= handlers["total"]).all())
+        events = trader.profile("event")
+        self.assertEqual(list(events.columns), ["stream", "topic", "count", "depth_mean", "depth_max", "age_mean",
+                                                "age_max"])
+        events = events.set_index(["stream", "topic"])
+        # 60根日线各有一个开盘和收盘的时钟事件，时钟事件不经过队列
+        self.assertEqual(events.loc[("TIME", "bar.open"), "count"], 60)
+        self.assertEqual(events.loc[("TIME", "bar.close"), "count"], 60)
+        self.assertTrue(np.isnan(events.loc[("TIME", "bar.close"), "age_max"]))
+        orders = events.loc[("ORDER", "")]
+        self.assertGreater(orders["count"], 0)
+        self.assertTrue(0 <= orders["age_mean"] <= orders["age_max"])
+        self.assertEqual(trader.engine.profiler._put_time, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
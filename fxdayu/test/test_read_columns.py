@@ -0,0 +1,114 @@
+# encoding:utf-8
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from pandas.util.testing import assert_frame_equal
+
+from fxdayu.data.handler import read_columns
+
+
+def documents(n, start=datetime(2016, 1, 4, 9, 30)):
+    """
+    模拟查询结果的文档，包括缺失的字段、None、int和float混合及只在部分文档中出现的字段。
+    """
+    docs = []
+    for i in range(n):
+        doc = {"datetime": start + timedelta(minutes=i), "close": 10.0 + i, "volume": i}
+        if i % 3 == 0:
+            doc["volume"] = float(i) + 0.5
+        if i % 4 == 1:
+            del doc["close"]
+        if i % 5 == 2:
+            doc["flag"] = i % 2 == 0
+        if 5 <= i < 9:
+            doc["note"] = None
+        if i >= 7:
+            doc["count"] = i
+        docs.append(doc)
+    return docs
+
+
+def old_read(docs, index=None, reverse=False):
+    """
+    原来的读取方式：全部文档转为list后构造DataFrame。
+    """
+    docs = list(docs)
+    if reverse:
+        docs.reverse()
+    data = pd.DataFrame(docs)
+    if index:
+        data.index = data.pop(index)
+    return data[sorted(data.columns)]
+
+
+class ReadColumnsTest(unittest.TestCase):
+    """
+    按批写入预先分配的列，结果与pandas.DataFrame(list(cursor))相同。
+    """
+
+    def check(self, docs, index="datetime", count=None, reverse=False, batch_size=4):
+        got = read_columns(iter(docs), index, count, reverse, batch_size)
+        assert_frame_equal(got, old_read(docs, index, reverse))
+        return got
+
+    def test_same_as_dataframe(self):
+        docs = documents(23)
+        for batch_size in (1, 3, 4, 5, 22, 23, 24, 100):
+            self.check(docs, batch_size=batch_size)
+
+    def test_count(self):
+        docs = documents(23)
+        # 记录数准确、偏小和偏大时结果相同
+        for count in (None, 1, 10, 23, 24, 1000):
+            self.check(docs, count=count)
+
+    def test_reverse(self):
+        docs = documents(23)[::-1]
+        for batch_size in (1, 5, 23):
+            got = self.check(docs, reverse=True, batch_size=batch_size)
+            self.assertTrue(got.index.is_monotonic_increasing)
+
+    def test_promotion(self):
+        # 先int后float的列转为float，之后出现的字段在之前的行为NaN
+        got = self.check(documents(12), batch_size=3)
+        self.assertEqual(got["volume"].dtype, np.float64)
+        self.assertEqual(got["count"].dtype, np.float64)
+        self.assertTrue(got["count"].iloc[:7].isnull().all())
+        self.assertEqual(list(got["count"].iloc[7:]), [7, 8, 9, 10, 11])
+
+    def test_null_fields(self):
+        docs = [{"datetime": datetime(2016, 1, 4) + timedelta(days=i), "note": None, "close": 1.0}
+                for i in range(10)]
+        for i in (3, 7):
+            docs[i]["close"] = None
+        # 全为None的字段与pandas一样为object，None不改变数值列的类型
+        for batch_size in (1, 3, 10):
+            got = self.check(docs, batch_size=batch_size)
+            self.assertEqual(got["note"].dtype, np.object_)
+            self.assertEqual(got["close"].dtype, np.float64)
+        docs[0]["close"] = None
+        for batch_size in (1, 3, 10):
+            self.assertEqual(self.check(docs, batch_size=batch_size)["close"].dtype, np.float64)
+        del docs[4]["note"]
+        for batch_size in (1, 3, 10):
+            self.assertEqual(self.check(docs, batch_size=batch_size)["note"].dtype, np.float64)
+
+    def test_int_column(self):
+        docs = [{"datetime": datetime(2016, 1, 4) + timedelta(days=i), "volume": i} for i in range(10)]
+        got = self.check(docs, batch_size=3)
+        self.assertEqual(got["volume"].dtype.kind, "i")
+
+    def test_default_index(self):
+        self.check(documents(10), index=None)
+
+    def test_empty_cursor(self):
+        got = read_columns(iter([]))
+        self.assertEqual(len(got), 0)
+        self.assertEqual(len(got.columns), 0)
+        self.assertRaises(KeyError, read_columns, iter([]), "datetime")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# encoding:utf-8
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from fxdayu.data.resampler import SessionCalendar, TimeEdge, A_SHARE_SESSIONS
+
+NIGHT_SESSIONS = (("21:00", "02:30"), ("09:00", "10:15"), ("10:30", "11:30"), ("13:30", "15:00"))
+HOUR = 3600 * 10 ** 9
+
+
+def ns(*times):
+    return pd.DatetimeIndex(list(times)).asi8
+
+
+class SessionCalendarTest(unittest.TestCase):
+
+    def test_overnight_session(self):
+        calendar = SessionCalendar(NIGHT_SESSIONS)
+        # 交易日从夜盘开始时算起，夜盘跨越零点后仍按开盘时间划分小时区间
+        np.testing.assert_array_equal(
+            calendar.session_bins(ns("2016-01-04 21:01", "2016-01-04 22:00", "2016-01-04 23:59",
+                                     "2016-01-05 00:30", "2016-01-05 02:30"), HOUR),
+            ns("2016-01-04 22:00", "2016-01-04 22:00", "2016-01-05 00:00",
+               "2016-01-05 01:00", "2016-01-05 03:00")
+        )
+
+    def test_day_sessions_after_night(self):
+        calendar = SessionCalendar(NIGHT_SESSIONS)
+        # 开盘时间及之前(上一时段结束之后)的K线单独为一个区间
+        np.testing.assert_array_equal(
+            calendar.session_bins(ns("2016-01-05 09:00", "2016-01-05 09:01", "2016-01-05 10:15",
+                                     "2016-01-05 10:30", "2016-01-05 10:31", "2016-01-05 13:30",
+                                     "2016-01-05 15:00", "2016-01-05 15:30"), HOUR),
+            ns("2016-01-05 09:00", "2016-01-05 10:00", "2016-01-05 11:00",
+               "2016-01-05 10:30", "2016-01-05 11:30", "2016-01-05 13:30",
+               "2016-01-05 15:30", "2016-01-05 15:30")
+        )
+
+    def test_same_trading_day(self):
+        calendar = SessionCalendar(NIGHT_SESSIONS)
+        x = ns("2016-01-04 20:59", "2016-01-04 21:00", "2016-01-05 02:00", "2016-01-05 14:00", "2016-01-05 21:00")
+        day = (x - calendar.day_start) // (24 * HOUR)
+        # 21:00开盘到次日收盘属于同一个交易日，21:00之前属于上一个交易日
+        self.assertEqual(list(day - day[1]), [-1, 0, 0, 0, 1])
+
+    def test_overlapping_sessions(self):
+        self.assertRaises(ValueError, SessionCalendar, (("09:30", "11:30"), ("11:00", "15:00")))
+        self.assertRaises(ValueError, SessionCalendar, (("21:00", "02:30"), ("01:00", "03:00")))
+
+    def test_week_starts_monday(self):
+        calendar = SessionCalendar(A_SHARE_SESSIONS)
+        np.testing.assert_array_equal(
+            calendar.week_bins(ns("2016-01-03 23:59", "2016-01-04 00:00", "2016-01-08 15:00", "2016-01-10 12:00")),
+            ns("2015-12-28", "2016-01-04", "2016-01-04", "2016-01-04")
+        )
+
+
+class TimeEdgeTest(unittest.TestCase):
+
+    def test_overnight_groups_labelled_by_last_bar(self):
+        edge = TimeEdge(SessionCalendar(NIGHT_SESSIONS), "60min")
+        index = pd.DatetimeIndex(["2016-01-04 21:30", "2016-01-04 22:00", "2016-01-04 23:30", "2016-01-05 00:00",
+                                  "2016-01-05 00:15", "2016-01-05 09:00", "2016-01-05 09:30"])
+        self.assertEqual(list(edge(index)),
+                         list(pd.DatetimeIndex(["2016-01-04 22:00", "2016-01-04 22:00", "2016-01-05 00:00",
+                                                "2016-01-05 00:00", "2016-01-05 00:15", "2016-01-05 09:00",
+                                                "2016-01-05 09:30"])))
+
+    def test_scalar_rejected(self):
+        self.assertRaises(TypeError, TimeEdge(SessionCalendar(), "60min"), pd.Timestamp("2016-01-04 10:00"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+# encoding:utf-8
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from fxdayu.data.store import SymbolBars, ResampledBars, RollingWindow, CURSOR_STEPS
+
+HOW = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+FIELDS = ["open", "high", "low", "close", "volume"]
+HOUR = 3600 * 10 ** 9
+
+
+def hourly(index):
+    return pd.DatetimeIndex(pd.DatetimeIndex(index).asi8 // HOUR * HOUR)
+
+
+def minute_bars(n, seed=0):
+    rs = np.random.RandomState(seed)
+    index = pd.date_range("2016-01-04 09:31", periods=n, freq="7min", name="datetime")
+    close = 10 + rs.randn(n).cumsum() * 0.1
+    return pd.DataFrame({"open": close - 0.05, "high": close + 0.1, "low": close - 0.1, "close": close,
+                         "volume": rs.randint(1, 100, n).astype(float)}, index=index, columns=FIELDS)
+
+
+def expected(frame, last, length, label_last):
+    """
+    按pandas分组聚合截至last的K线，取最后length根。
+    """
+    frame = frame.iloc[:last + 1]
+    keys = hourly(frame.index)
+    result = frame.groupby(keys).agg(HOW)[FIELDS]
+    if label_last:
+        result.index = frame.index.to_series().groupby(keys).last().values
+    result.index.name = "datetime"
+    return result if length is None else result.iloc[-length:]
+
+
+class CursorTest(unittest.TestCase):
+    """
+    locate和contains的游标查找与二分查找的结果相同。
+    """
+
+    def setUp(self):
+        # 间隔不等的时间，包括大段的空缺
+        self.times = np.cumsum(np.random.RandomState(0).randint(1, 5, 100)) * 60 * 10 ** 9
+        self.times[60:] += 1000 * 60 * 10 ** 9
+        self.bars = SymbolBars.from_frame(pd.DataFrame({"close": np.arange(100.)},
+                                                       index=pd.DatetimeIndex(self.times)))
+
+    def check(self, keys):
+        for key in keys:
+            key = int(key)
+            self.assertEqual(self.bars.locate(key), self.times.searchsorted(key, "right") - 1)
+            i = self.times.searchsorted(key)
+            self.assertEqual(self.bars.contains(key), bool(i < len(self.times) and self.times[i] == key))
+
+    def test_forward_steps(self):
+        minute = 60 * 10 ** 9
+        self.check(range(int(self.times[0]) - minute, int(self.times[59]) + minute, minute))
+
+    def test_fallback_after_steps(self):
+        # 每次跳过超过CURSOR_STEPS根K线，以及跳过空缺
+        self.check(self.times[::CURSOR_STEPS + 3])
+        self.check([self.times[0], self.times[59] + 1, self.times[60], self.times[-1] + 1])
+
+    def test_backwards(self):
+        self.check(self.times[::-7])
+        self.check([self.times[50], self.times[3] - 1, self.times[0] - 1, self.times[20]])
+
+    def test_random_order(self):
+        rs = np.random.RandomState(1)
+        self.check(rs.randint(self.times[0] - 10, self.times[-1] + 10, 300))
+        self.check(rs.choice(self.times, 300))
+
+
+class ResampledBarsTest(unittest.TestCase):
+
+    def check(self, frame, resampled, label_last):
+        for last in range(0, len(frame), 9):
+            for length in (None, 1, 3, 10):
+                want = expected(frame, last, length, label_last)
+                got = resampled.get(last, length, FIELDS)
+                # 正好length根，第一根基础K线之前没有数据时为全部
+                self.assertEqual(len(got), len(want))
+                np.testing.assert_array_equal(got.index.asi8, pd.DatetimeIndex(want.index).asi8)
+                np.testing.assert_allclose(got.values, want.values)
+
+    def test_same_as_groupby(self):
+        frame = minute_bars(200)
+        for label_last in (False, True):
+            self.check(frame, ResampledBars(SymbolBars.from_frame(frame), hourly, HOW, label_last), label_last)
+
+    def test_incremental_update(self):
+        frame = minute_bars(200)
+        bars = SymbolBars.from_frame(frame.iloc[:77])
+        resampled = ResampledBars(bars, hourly, HOW)
+        resampled.get(76, 3, FIELDS)
+        bars.append(frame.iloc[77:150])
+        bars.append(frame.iloc[150:])
+        self.check(frame, resampled, False)
+
+    def test_nan_skipped(self):
+        frame = minute_bars(120)
+        rs = np.random.RandomState(1)
+        for field in FIELDS:
+            frame.loc[rs.rand(len(frame)) < 0.3, field] = np.nan
+        # 整个小时的价格都缺失，全为NaN时sum的结果随pandas版本不同，不包括volume
+        frame.iloc[10:20, :4] = np.nan
+        bars = SymbolBars.from_frame(frame.iloc[:60])
+        resampled = ResampledBars(bars, hourly, HOW)
+        bars.append(frame.iloc[60:])
+        self.check(frame, resampled, False)
+
+    def test_single_field(self):
+        frame = minute_bars(50)
+        resampled = ResampledBars(SymbolBars.from_frame(frame), hourly, HOW)
+        series = resampled.get(40, 4, "close")
+        self.assertIsInstance(series, pd.Series)
+        np.testing.assert_allclose(series.values, expected(frame, 40, 4, False)["close"].values)
+
+
+class RollingWindowTest(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = minute_bars(50)
+        self.index = self.frame.index.asi8
+        self.window = RollingWindow(7, FIELDS, dict(self.frame.dtypes))
+
+    def write(self, start, stop):
+        self.window.write(self.index[start:stop], {field: self.frame[field].values[start:stop] for field in FIELDS})
+
+    def check(self, last):
+        start = max(last + 1 - self.window.length, 0)
+        np.testing.assert_array_equal(self.window.index, self.index[start:last + 1])
+        for field in FIELDS:
+            np.testing.assert_array_equal(self.window.values(field), self.frame[field].values[start:last + 1])
+        frame = self.window.frame()
+        self.assertEqual(list(frame.columns), FIELDS)
+        np.testing.assert_array_equal(frame.values, self.frame.values[start:last + 1])
+
+    def test_one_bar_at_a_time_wraps_around(self):
+        # 环形缓冲区绕回多圈后，窗口仍为连续的最近length根
+        for last in range(len(self.frame)):
+            self.write(last, last + 1)
+            self.check(last)
+            self.assertEqual(len(self.window), min(last + 1, 7))
+
+    def test_batches(self):
+        last = -1
+        for n in [3, 5, 1, 7, 12, 2, 6, 9]:
+            self.write(last + 1, last + 1 + n)
+            last += n
+            self.check(last)
+
+    def test_read_only_view(self):
+        self.write(0, 10)
+        values = self.window.values("close")
+        self.assertRaises(ValueError, values.__setitem__, 0, 0.0)
+        frame = self.window.frame()
+        self.assertIs(self.window.frame(), frame)
+        self.write(10, 11)
+        self.assertIsNot(self.window.frame(), frame)
+
+    def test_clear(self):
+        self.write(0, 10)
+        self.window.clear()
+        self.assertEqual(len(self.window), 0)
+        self.write(20, 23)
+        np.testing.assert_array_equal(self.window.index, self.index[20:23])
+
+
+if __name__ == '__main__':
+    unittest.main()
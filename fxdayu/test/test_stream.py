@@ -0,0 +1,132 @@
+# encoding:utf-8
+import random
+import unittest
+from itertools import chain
+
+from fxdayu.engine.stream import PriorityList, StreamManager
+
+
+class PriorityListTest(unittest.TestCase):
+
+    def test_order(self):
+        plist = PriorityList()
+        for priority, value in [(0, "a"), (5, "b"), (0, "c"), (-1, "d"), (5, "e")]:
+            plist.put(priority, value)
+        # 优先级高的靠前，优先级相同的加入早的靠前
+        self.assertEqual(list(plist), ["b", "e", "a", "c", "d"])
+
+    def test_remove_after_later_inserts(self):
+        plist = PriorityList()
+        plist.put(0, "a")
+        plist.put(0, "b")
+        # 之后插入的高优先级项使a、b在列表中的位置后移
+        plist.put(10, "c")
+        plist.put(10, "d")
+        plist.remove("b")
+        self.assertEqual(list(plist), ["c", "d", "a"])
+        plist.remove("c")
+        self.assertEqual(list(plist), ["d", "a"])
+        self.assertNotIn("c", plist)
+        plist.remove("x")
+        self.assertEqual(len(plist), 2)
+
+    def test_remove_each(self):
+        values = [(i % 3, i) for i in range(12)]
+        for removed in range(12):
+            plist = PriorityList()
+            for priority, value in values:
+                plist.put(priority, value)
+            expected = [value for value in list(plist) if value != removed]
+            plist.remove(removed)
+            self.assertEqual(list(plist), expected)
+
+
+class HandlerCacheTest(unittest.TestCase):
+
+    def test_cache_dropped_on_register(self):
+        manager = StreamManager()
+        manager.register_handler("a", 1, "bar")
+        self.assertEqual(manager.get_iter(1, "bar"), ("a",))
+        manager.register_handler("b", 1, "bar", priority=1)
+        self.assertEqual(manager.get_iter(1, "bar"), ("b", "a"))
+        manager.unregister_handler("b", 1, "bar")
+        self.assertEqual(manager.get_iter(1, "bar"), ("a",))
+
+
+class LinearStreamManager(object):
+    """
+    原来的实现：每个topic一个PriorityList，按topic的各级前缀逐一查找。
+    """
+
+    def __init__(self):
+        self._handlers = {}
+
+    def register_handler(self, handler, topic):
+        self._handlers.setdefault(topic, PriorityList()).put(0, handler)
+
+    def unregister_handler(self, handler, topic):
+        self._handlers[topic].remove(handler)
+        if not len(self._handlers[topic]):
+            del self._handlers[topic]
+
+    def get_iter(self, topic):
+        handlers = self._handlers
+        head = [handlers[""]] if "" in handlers else []
+        tail = [handlers["."]] if "." in handlers else []
+        if topic:
+            path = ""
+            for name in topic.split("."):
+                path += name
+                if path in handlers:
+                    head.append(handlers[path])
+                if path + "." in handlers:
+                    tail.insert(0, handlers[path + "."])
+                path += "."
+        return tuple(chain(*(head + tail)))
+
+
+class TopicTrieTest(unittest.TestCase):
+
+    def test_same_order_as_linear_scan(self):
+        rnd = random.Random(1)
+        topics = [""] + [".".join(rnd.choice("abc") for _ in range(depth)) for depth in (1, 2, 3) for _ in range(6)]
+        registered = []
+        for i in range(200):
+            topic = rnd.choice(topics) + rnd.choice(["", "."])
+            registered.append((i, "." if topic == "" and rnd.random() < 0.5 else topic))
+        trie, linear = StreamManager(), LinearStreamManager()
+        for handler, topic in registered:
+            trie.register_handler(handler, 1, topic)
+            linear.register_handler(handler, topic)
+        queried = set(topics) | {"a.b.c.a", "x", "a.x"}
+        rnd.shuffle(registered)
+        for handler, topic in registered:
+            for query in queried:
+                self.assertEqual(trie.get_iter(1, query), linear.get_iter(query), query)
+            trie.unregister_handler(handler, 1, topic)
+            linear.unregister_handler(handler, topic)
+        # 所有处理函数取消注册后，空的节点和工作流都被移除
+        self.assertEqual(trie._streams, {})
+
+    def test_wildcard(self):
+        manager = StreamManager()
+        for handler, topic in [("all", ""), ("end", "."), ("execution", "execution"), ("any", "execution.*"),
+                               ("any_tail", "execution.*."), ("symbol", "execution.000001"),
+                               ("symbol_tail", "execution.000001."), ("deeper", "execution.*.fill")]:
+            manager.register_handler(handler, 1, topic)
+        # 同一级中通配的head在精确的head之前，精确的tail在通配的tail之前
+        self.assertEqual(manager.get_iter(1, "execution.000001"),
+                         ("all", "execution", "any", "symbol", "symbol_tail", "any_tail", "end"))
+        self.assertEqual(manager.get_iter(1, "execution.600016"),
+                         ("all", "execution", "any", "any_tail", "end"))
+        self.assertEqual(manager.get_iter(1, "execution.600016.fill"),
+                         ("all", "execution", "any", "deeper", "any_tail", "end"))
+        self.assertEqual(manager.get_iter(1, "execution"), ("all", "execution", "end"))
+        self.assertEqual(manager.get_iter(1, "order.000001"), ("all", "end"))
+        manager.unregister_handler("any", 1, "execution.*")
+        self.assertEqual(manager.get_iter(1, "execution.600016.fill"),
+                         ("all", "execution", "deeper", "any_tail", "end"))
+
+
+if __name__ == '__main__':
+    unittest.main()
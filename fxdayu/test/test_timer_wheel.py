@@ -0,0 +1,79 @@
+# encoding:utf-8
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from fxdayu.engine.wheel import TimerWheel
+from fxdayu.event import time_key
+
+
+class TimerWheelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.wheel = TimerWheel()
+        self.start = datetime(2016, 1, 4, 9, 30)
+
+    def at(self, **kwargs):
+        return self.start + timedelta(**kwargs)
+
+    def test_fire_in_time_order(self):
+        fired = []
+        for name, delta in [("b", 5), ("a", 1), ("c", 5), ("d", 3600 * 24 * 400)]:
+            self.wheel.add(self.at(seconds=delta), fired.append, name)
+        self.wheel.advance(self.start)
+        for timer in self.wheel.advance(self.at(seconds=10)):
+            timer.fire()
+        # 时间相同的按加入顺序
+        self.assertEqual(fired, ["a", "b", "c"])
+        self.assertEqual(len(self.wheel), 1)
+        # 跨过一年多只需推进一次，超出最高层范围的定时器也能触发
+        for timer in self.wheel.advance(self.at(days=401)):
+            timer.fire()
+        self.assertEqual(fired, ["a", "b", "c", "d"])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_cancel(self):
+        first = self.wheel.add(self.at(seconds=1), None)
+        second = self.wheel.add(self.at(seconds=2), None)
+        first.cancel()
+        self.assertEqual(self.wheel.advance(self.at(seconds=5)), [second])
+        self.assertEqual(self.wheel.advance(self.at(seconds=10)), [])
+
+    def test_not_before_time(self):
+        timer = self.wheel.add(self.at(microseconds=600000), None)
+        # 与当前时间在同一个tick内但晚于当前时间的定时器不触发
+        self.assertEqual(self.wheel.advance(self.at(microseconds=300000)), [])
+        self.assertEqual(self.wheel.advance(self.at(microseconds=600000)), [timer])
+
+    def test_past_timer_fires_on_next_advance(self):
+        self.wheel.advance(self.at(hours=1))
+        timer = self.wheel.add(self.start, None)
+        self.assertEqual(self.wheel.advance(self.at(hours=1)), [timer])
+        self.assertEqual(self.wheel.time, self.at(hours=1))
+
+    def test_same_as_sorted_reference(self):
+        rnd = random.Random(0)
+        for trial in range(100):
+            wheel = TimerWheel(rnd.choice([1, 7, 1000000]), rnd.choice([(4, 4, 4), (8, 2), (256, 64, 64, 64)]))
+            now = self.start
+            pending = {}
+            for step in range(200):
+                op = rnd.random()
+                if op < 0.5:
+                    when = now + timedelta(microseconds=rnd.random() * rnd.choice([0, 5, 10 ** 6, 10 ** 9, 10 ** 11]))
+                    pending[wheel.add(when, None)] = time_key(when)
+                elif op < 0.6 and pending:
+                    timer = rnd.choice(list(pending))
+                    timer.cancel()
+                    del pending[timer]
+                else:
+                    now += timedelta(microseconds=rnd.random() * rnd.choice([1, 10 ** 6, 10 ** 8, 10 ** 10, 10 ** 12]))
+                    due = sorted((timer for timer, key in pending.items() if key <= time_key(now)),
+                                 key=lambda t: (t.when, t.seq))
+                    self.assertEqual(wheel.advance(now), due, (trial, step))
+                    for timer in due:
+                        del pending[timer]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@ from collections import OrderedDict
 
 from fxdayu.data.active_stock import ActiveDataSupport
 from fxdayu.data.data_support import DataSupport
+from fxdayu.engine import BacktestEngine
 from fxdayu.modules.account.handlers import AccountHandler
 from fxdayu.modules.order.handlers import OrderStatusHandler
 from fxdayu.modules.portfolio.handlers import PortfolioHandler
@@ -14,6 +15,7 @@ from fxdayu.trader.component import Component
 from fxdayu.models.dao.engine import PersistenceEngine
 
 DEVELOP_MODE = OrderedDict([
+    ("engine", Component("engine", BacktestEngine, (), {})),
     ("data", Component("data", DataSupport, (Component.Lazy('context'), ), {})),
     ("timer", Component("timer", TimeSimulation, (), {'engine': Component.Lazy('engine')})),
     ("portfolio", Component("PortfolioHandler", PortfolioHandler, (), {})),
@@ -48,8 +48,16 @@ class Trader(object):
     用于自由组织模块并进行回测
     """
 
-    def __init__(self, settings=None):
-        self.engine = Engine()
+    def __init__(self, settings=None, profile=False, journal=None):
+        if settings:
+            self.settings = settings
+        else:
+            self.settings = DEVELOP_MODE
+        self.engine = self._make_engine()
+        if profile:
+            self.engine.enable_profiler()
+        if journal:
+            self.engine.enable_journal(journal)
         self.context = Context(self.engine)
         self.context.register()
         self.environment = Environment()
@@ -58,11 +66,20 @@ class Trader(object):
         self.modules = {'context': self.context,
                         'engine': self.engine,
                         'environment': self.environment}
-        if settings:
-            self.settings = settings
-        else:
-            self.settings = DEVELOP_MODE
         self.initialized = False
+        self._prepared = False
+
+    def _make_engine(self):
+        """
+        按settings中的"engine"组件创建事件驱动引擎，未设置时使用多线程的Engine。
+
+        Returns:
+            fxdayu.engine.Engine
+        """
+        co = self.settings.get("engine", None)
+        if co is None:
+            return Engine()
+        return co.constructor(*co.args, **co.kwargs)
 
     def __getitem__(self, item):
         return self.settings[item]
@@ -92,6 +109,8 @@ class Trader(object):
         """
         """
         for name, co in self.settings.items():
+            if name == "engine":
+                continue
             args = [self.modules[para.name] if isinstance(para, Component.Lazy) else para for para in co.args]
             kwargs = {key: self.modules[para.name] if isinstance(para, Component.Lazy) else para for key, para in
                       co.kwargs.items()}
@@ -118,15 +137,59 @@ class Trader(object):
         self.initialized = True
         return self
 
-    def activate(self):
-        context, data, engine = self.context, self.modules["data"], self.engine
+    def _prepare(self):
+        if self._prepared:
+            return
+        context, engine = self.context, self.engine
         context.account = Environment()
         context.account.id = "BACKTEST"
 
         engine.set_context(self.environment_context)
+        self._prepared = True
+
+    def activate(self):
+        engine = self.engine
+        self._prepare()
         engine.start()
         engine.join()
         engine.stop()
+        if engine.journal is not None:
+            engine.journal.flush()
+
+    def run_until(self, timestamp):
+        """
+        回测到timestamp后暂停，可以检查账户状态后再次调用run_until、extend或activate继续回测。
+        需在settings中使用BacktestEngine。
+
+        Args:
+            timestamp(datetime): 暂停的时间
+
+        Returns:
+            账户对象
+        """
+        engine = self.engine
+        if not hasattr(engine, "run_until"):
+            raise TypeError("run_until requires BacktestEngine, not: %s" % type(engine))
+        self._prepare()
+        engine.run_until(timestamp)
+        if engine.journal is not None:
+            engine.journal.flush()
+        return self.modules["portfolio"]
+
+    def extend(self, end=None):
+        """
+        追加数据库中新增的行情和对应的时钟，之后调用run_until继续回测，不必从头运行。
+
+        Args:
+            end(datetime): 读取的截止时间，None表示读取全部
+
+        Returns:
+            pandas.DatetimeIndex: 追加的K线时间
+        """
+        times = self.modules["data"].extend(end)
+        if len(times):
+            self.modules["timer"].extend_time(times)
+        return times
 
     def run(self, symbols, frequency=None, start=None, end=None, ticker_type=None, params=None, save=False):
         if not self.initialized:
@@ -182,9 +245,10 @@ class Trader(object):
         self.activate()
 
     def back_test(self, filename, symbols, frequency=None,
-                  start=None, end=None, db=None, params=None, save=False, raw_code=False):
+                  start=None, end=None, db=None, params=None, save=False, raw_code=False, until=None):
         """
-        运行一个策略, 完成后返回一个账户对象
+        运行一个策略, 完成后返回一个账户对象。
+        给定until时回测到until后暂停并返回，之后可用run_until和extend继续。
 
         Args:
             filename:
@@ -195,6 +259,7 @@ class Trader(object):
             ticker_type:
             params:
             save:
+            until:
         """
         if not self.initialized:
             self.initialize()
@@ -208,6 +273,8 @@ class Trader(object):
         self.use_file(filename, raw_code, params)
         self.modules['timer'].put_time()
         self.engine.register(on_stop, EVENTS.EXIT, priority=100)
+        if until is not None:
+            return self.run_until(until)
         self.activate()
 
         if save:
@@ -268,6 +335,21 @@ class Trader(object):
         self.performance.set_orders(trades)
         return self.performance
 
+    def profile(self, kind="handler"):
+        """
+        返回事件分发性能统计，需在创建Trader时传入profile=True。
+
+        Args:
+            kind(str): "handler"返回每个事件处理函数的调用次数和耗时，
+                "event"返回每个stream和topic下事件出队时的队列深度和等待时间。
+
+        Returns:
+            pandas.DataFrame
+        """
+        if self.engine.profiler is None:
+            raise ValueError("profiler not enabled, create Trader with profile=True")
+        return self.engine.profiler.to_frame(kind)
+
     def output(self, *args):
         return {attr: getattr(self.performance, attr, None) for attr in args}
 
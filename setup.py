@@ -10,7 +10,7 @@ except ImportError:
 setup(
     name="fxdayu",
     version="0.1",
-    packages=find_packages(exclude=["examples", "examples.*"]),
+    packages=find_packages(exclude=["examples", "examples.*", "benchmarks", "benchmarks.*"]),
     package_data={
         "": ["*.so", "*.dll", "*.csv", "*.pyd", "*.json"]
     },